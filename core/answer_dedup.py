@@ -0,0 +1,155 @@
+"""
+Duplicate detection for student answers within a grading batch.
+
+Identical answers (after normalizing whitespace, punctuation and case) are
+grouped so each group is graded once. Near-identical answers are found with
+MinHash over character n-grams and only flagged for teacher review, since a
+small wording change can legitimately change the score.
+"""
+
+import hashlib
+import math
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_answer(answer: Optional[str]) -> str:
+    """
+    Normalize an answer for duplicate detection.
+
+    Applies NFKC, lowercases, drops whitespace and drops punctuation that is not
+    next to a digit (so "3.5" and "35" or "-5" and "5" stay distinct). Symbols
+    such as arrows, comparison signs and +/- are kept, since they carry meaning
+    ("기온↑" vs "기온↓").
+
+    Args:
+        answer: Raw answer text (None/NaN are treated as empty)
+
+    Returns:
+        str: Normalized answer
+    """
+    if answer is None or (isinstance(answer, float) and math.isnan(answer)):
+        return ""
+    text = unicodedata.normalize("NFKC", str(answer)).lower()
+    chars = [c for c in text if not c.isspace()]
+
+    normalized = []
+    for i, char in enumerate(chars):
+        if unicodedata.category(char)[0] == "P":
+            prev_char = chars[i - 1] if i > 0 else ""
+            next_char = chars[i + 1] if i + 1 < len(chars) else ""
+            if not (prev_char.isdigit() or next_char.isdigit()):
+                continue
+        normalized.append(char)
+    return "".join(normalized)
+
+
+def answer_hash(answer: Optional[str]) -> str:
+    """Get the content hash of the normalized answer."""
+    return hashlib.sha1(normalize_answer(answer).encode("utf-8")).hexdigest()
+
+
+def group_identical_answers(answers: Sequence[Optional[str]]) -> List[List[int]]:
+    """
+    Group answer indices whose normalized content is identical.
+
+    Args:
+        answers: Answers in batch order
+
+    Returns:
+        list: Index groups in order of first occurrence; the first index of each
+            group is its representative
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, answer in enumerate(answers):
+        groups.setdefault(answer_hash(answer), []).append(index)
+    return list(groups.values())
+
+
+def _shingles(text: str, ngram_size: int) -> List[bytes]:
+    """Character n-grams of the normalized text (the whole text if shorter)."""
+    if len(text) <= ngram_size:
+        return [text.encode("utf-8")]
+    return [text[i:i + ngram_size].encode("utf-8") for i in range(len(text) - ngram_size + 1)]
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int = 64, ngram_size: int = 3,
+                       seed: int = 1) -> np.ndarray:
+    """
+    Compute MinHash signatures of character n-gram sets.
+
+    Args:
+        texts: Normalized texts
+        num_perm: Number of hash permutations (signature length)
+        ngram_size: Character n-gram size
+        seed: Seed for the permutation parameters
+
+    Returns:
+        np.ndarray: Signature matrix of shape (len(texts), num_perm)
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+    b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), "little")
+            for shingle in set(_shingles(text, ngram_size))
+        ], dtype=np.uint64)
+        # Universal hashing (a*h + b) mod p; uint64 overflow wraps as in standard MinHash implementations
+        with np.errstate(over="ignore"):
+            permuted = np.bitwise_and((np.outer(hashes, a) + b) % _MERSENNE_PRIME, _MAX_HASH)
+        signatures[row] = permuted.min(axis=0)
+    return signatures
+
+
+def find_near_duplicate_groups(answers: Sequence[Optional[str]], threshold: float = 0.8,
+                               num_perm: int = 64, ngram_size: int = 3) -> List[List[int]]:
+    """
+    Find groups of answers whose estimated Jaccard similarity is at least ``threshold``.
+
+    Answers that are exactly identical after normalization are collapsed first, and
+    empty answers are ignored. Pairs above the threshold are merged transitively.
+
+    Args:
+        answers: Answers in batch order
+        threshold: Minimum estimated Jaccard similarity of character n-gram sets
+        num_perm: Number of MinHash permutations
+        ngram_size: Character n-gram size
+
+    Returns:
+        list: Index groups containing at least two distinct (non-identical) answers
+    """
+    exact_groups = [
+        group for group in group_identical_answers(answers) if normalize_answer(answers[group[0]])
+    ]
+    if len(exact_groups) < 2:
+        return []
+
+    texts = [normalize_answer(answers[group[0]]) for group in exact_groups]
+    signatures = minhash_signatures(texts, num_perm=num_perm, ngram_size=ngram_size)
+
+    parent = list(range(len(exact_groups)))
+
+    def _find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(exact_groups) - 1):
+        similarities = (signatures[i + 1:] == signatures[i]).mean(axis=1)
+        for offset in np.nonzero(similarities >= threshold)[0]:
+            parent[_find(i + 1 + int(offset))] = _find(i)
+
+    clusters: Dict[int, List[List[int]]] = {}
+    for group_index, group in enumerate(exact_groups):
+        clusters.setdefault(_find(group_index), []).append(group)
+    return [sorted(index for group in members for index in group)
+            for members in clusters.values() if len(members) > 1]
@@ -0,0 +1,140 @@
+"""
+Concurrency helpers for grading many students at once.
+
+Tasks run on a bounded worker pool while completion is observed from the
+calling thread, so Streamlit widgets (e.g. the progress bar) are only ever
+touched from the script thread.
+"""
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+ProgressCallback = Callable[[int, int], None]
+ErrorHandler = Callable[[int, Exception], T]
+CoroutineFactory = Callable[[], Awaitable[T]]
+CoroutineSubmitter = Callable[[Coroutine[Any, Any, T]], Future]
+
+
+def run_ordered(tasks: Sequence[Callable[[], T]], max_workers: int = 1,
+                progress_callback: Optional[ProgressCallback] = None,
+                error_handler: Optional[ErrorHandler] = None) -> List[T]:
+    """
+    Run tasks with at most ``max_workers`` in flight and return results in task order.
+
+    Args:
+        tasks: Zero-argument callables to execute
+        max_workers: Maximum number of concurrently running tasks (<= 1 runs sequentially)
+        progress_callback: Called as ``progress_callback(completed, total)`` from the
+            calling thread every time a task finishes
+        error_handler: Called as ``error_handler(index, exception)`` when a task raises;
+            its return value is used as that task's result. Exceptions propagate if omitted.
+
+    Returns:
+        list: Task results, in the same order as ``tasks``
+    """
+    total = len(tasks)
+    results: List[Optional[T]] = [None] * total
+
+    def _handle_error(index: int, error: Exception) -> T:
+        if error_handler is None:
+            raise error
+        return error_handler(index, error)
+
+    if max_workers <= 1 or total <= 1:
+        for index, task in enumerate(tasks):
+            try:
+                results[index] = task()
+            except Exception as e:
+                results[index] = _handle_error(index, e)
+            if progress_callback:
+                progress_callback(index + 1, total)
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+        future_to_index = {executor.submit(task): index for index, task in enumerate(tasks)}
+
+        for completed, future in enumerate(as_completed(future_to_index), start=1):
+            index = future_to_index[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = _handle_error(index, e)
+            if progress_callback:
+                progress_callback(completed, total)
+
+    return results
+
+
+def run_ordered_coroutines(factories: Sequence[CoroutineFactory], submit: CoroutineSubmitter,
+                           max_concurrency: int = 32,
+                           progress_callback: Optional[ProgressCallback] = None,
+                           error_handler: Optional[ErrorHandler] = None) -> List[T]:
+    """
+    Run coroutines on an event loop owned elsewhere and return results in order.
+
+    The coroutines are scheduled through ``submit`` (e.g. ``LLMManager.run_async``),
+    which must return a ``concurrent.futures.Future``. The calling thread blocks on
+    completion so progress can be reported from it, exactly like ``run_ordered``.
+
+    Args:
+        factories: Zero-argument callables returning the coroutine for each task
+        submit: Schedules a coroutine on the event loop and returns a Future
+        max_concurrency: Maximum number of coroutines in flight
+        progress_callback: Called as ``progress_callback(completed, total)`` from the calling thread
+        error_handler: Called as ``error_handler(index, exception)`` when a task raises
+
+    Returns:
+        list: Task results, in the same order as ``factories``
+    """
+    total = len(factories)
+    results: List[Optional[T]] = [None] * total
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _bounded(factory: CoroutineFactory) -> T:
+        async with semaphore:
+            return await factory()
+
+    future_to_index = {submit(_bounded(factory)): index for index, factory in enumerate(factories)}
+
+    for completed, future in enumerate(as_completed(future_to_index), start=1):
+        index = future_to_index[future]
+        try:
+            results[index] = future.result()
+        except Exception as e:
+            if error_handler is None:
+                raise
+            results[index] = error_handler(index, e)
+        if progress_callback:
+            progress_callback(completed, total)
+
+    return results
+
+
+async def gather_ordered(factories: Sequence[CoroutineFactory], max_concurrency: int = 32,
+                         error_handler: Optional[ErrorHandler] = None) -> List[T]:
+    """
+    Await coroutines on the current event loop with bounded concurrency.
+
+    Args:
+        factories: Zero-argument callables returning the coroutine for each task
+        max_concurrency: Maximum number of coroutines in flight
+        error_handler: Called as ``error_handler(index, exception)`` when a task raises
+
+    Returns:
+        list: Task results, in the same order as ``factories``
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _bounded(index: int, factory: CoroutineFactory) -> T:
+        async with semaphore:
+            try:
+                return await factory()
+            except Exception as e:
+                if error_handler is None:
+                    raise
+                return error_handler(index, e)
+
+    return list(await asyncio.gather(*(_bounded(i, f) for i, f in enumerate(factories))))
@@ -1,10 +1,16 @@
 """
 Dynamic Pydantic model creation for grading results.
 This module creates Pydantic models based on rubric structure.
+
+Generated models only depend on the rubric's shape (number of main criteria and
+sub-criteria per criterion), so models, parsers and schemas are cached by that
+structural signature and shared across batches and reparse attempts.
 """
-from pydantic import BaseModel, Field, create_model
+import threading
+from dataclasses import dataclass
+from pydantic import BaseModel, Field, PrivateAttr, create_model
 from langchain_core.output_parsers import PydanticOutputParser
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 
 class 피드백(BaseModel):
@@ -14,6 +20,49 @@ class 피드백(BaseModel):
     의사_응답_설명: str = Field(description="의사 응답인 경우 설명, 아니면 빈 문자열")
 
 
+class CachedPydanticOutputParser(PydanticOutputParser):
+    """PydanticOutputParser that renders its format instructions only once."""
+
+    _format_instructions: Optional[str] = PrivateAttr(default=None)
+
+    def get_format_instructions(self) -> str:
+        if self._format_instructions is None:
+            self._format_instructions = super().get_format_instructions()
+        return self._format_instructions
+
+
+@dataclass(frozen=True)
+class GradingModels:
+    """Models, parser and schemas generated for one rubric structure.
+
+    The schemas are shared between callers and must be treated as read-only.
+    """
+    signature: Tuple[int, ...]
+    output_model: Any
+    parser: CachedPydanticOutputParser
+    json_schema: Dict[str, Any]
+    adaptive_schema: Dict[str, Any]
+    format_instructions: str
+
+
+def get_rubric_signature(rubric_items: List[Dict[str, Any]]) -> Tuple[int, ...]:
+    """
+    Get the structural signature of a rubric.
+
+    Args:
+        rubric_items: List of rubric items with main_criterion and sub_criteria
+
+    Returns:
+        Tuple with the sub-criteria count of each main criterion
+    """
+    return tuple(len(item.get('sub_criteria', [])) for item in rubric_items)
+
+
+_models_cache: Dict[Tuple[int, ...], GradingModels] = {}
+_models_cache_lock = threading.Lock()
+_models_cache_stats = {"hits": 0, "misses": 0}
+
+
 class DynamicModelFactory:
     """Factory class for creating dynamic Pydantic models based on rubric."""
     
@@ -62,6 +111,10 @@ class DynamicModelFactory:
         Returns:
             Dynamic Pydantic model class for complete grading output
         """
+        return DynamicModelFactory.get_grading_models(rubric_items).output_model
+
+    @staticmethod
+    def _build_grading_output_model(rubric_items: List[Dict[str, Any]]):
         Dynamic채점결과 = DynamicModelFactory.create_grading_result_model(rubric_items)
         
         DynamicGradingOutput = create_model(
@@ -83,8 +136,143 @@ class DynamicModelFactory:
         Returns:
             PydanticOutputParser configured for the dynamic model
         """
-        DynamicGradingOutput = DynamicModelFactory.create_grading_output_model(rubric_items)
-        return PydanticOutputParser(pydantic_object=DynamicGradingOutput)
+        return DynamicModelFactory.get_grading_models(rubric_items).parser
+
+    @staticmethod
+    def create_adaptive_schema(rubric_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Create a lenient JSON schema for validating parsed grading output.
+        
+        Only the total score and the essential feedback fields are required, so
+        validation succeeds on partially complete responses.
+        
+        Args:
+            rubric_items: List of rubric items with main_criterion and sub_criteria
+            
+        Returns:
+            JSON schema dictionary for validation
+        """
+        scoring_properties = {}
+        
+        for i, item in enumerate(rubric_items):
+            scoring_properties[f"주요_채점_요소_{i+1}_점수"] = {
+                "type": "integer",
+                "description": f"주요 채점 요소 {i+1}에 대한 점수",
+                "minimum": 0
+            }
+            for j, sub_item in enumerate(item.get('sub_criteria', [])):
+                scoring_properties[f"세부_채점_요소_{i+1}_{j+1}_점수"] = {
+                    "type": "integer",
+                    "description": f"세부 채점 요소 {i+1}-{j+1}에 대한 점수",
+                    "minimum": 0
+                }
+        
+        scoring_properties["합산_점수"] = {
+            "type": "integer",
+            "description": "모든 주요 채점 요소 점수의 합산",
+            "minimum": 0
+        }
+        scoring_properties["점수_판단_근거"] = {
+            "type": "object",
+            "description": "각 주요 채점 요소별 점수 판단 근거",
+            "additionalProperties": True  # Allow flexible structure
+        }
+        
+        feedback_properties = {
+            "교과_내용_피드백": {
+                "type": "string",
+                "description": "교과 내용에 대한 구체적인 피드백",
+                "minLength": 1
+            },
+            "의사_응답_여부": {
+                "type": "boolean",
+                "description": "학생 답안이 의사 응답(bluffing)인지 여부"
+            },
+            "의사_응답_설명": {
+                "type": "string",
+                "description": "의사 응답인 경우 설명, 아니면 빈 문자열",
+                "default": ""
+            }
+        }
+        
+        return {
+            "type": "object",
+            "properties": {
+                "채점결과": {
+                    "type": "object",
+                    "properties": scoring_properties,
+                    "required": ["합산_점수"],  # Only require essential fields
+                    "additionalProperties": False
+                },
+                "피드백": {
+                    "type": "object",
+                    "properties": feedback_properties,
+                    "required": ["교과_내용_피드백", "의사_응답_여부"],
+                    "additionalProperties": False
+                }
+            },
+            "required": ["채점결과", "피드백"],
+            "additionalProperties": False
+        }
+
+    @staticmethod
+    def get_grading_models(rubric_items: List[Dict[str, Any]]) -> GradingModels:
+        """
+        Get the cached models, parser and schemas for the rubric's structure.
+        
+        Field names only depend on the number of main criteria and sub-criteria,
+        so rubrics with the same shape share one entry.
+        
+        Args:
+            rubric_items: List of rubric items with main_criterion and sub_criteria
+            
+        Returns:
+            GradingModels for the rubric's structural signature
+        """
+        signature = get_rubric_signature(rubric_items)
+        with _models_cache_lock:
+            models = _models_cache.get(signature)
+            if models is not None:
+                _models_cache_stats["hits"] += 1
+                return models
+            
+            output_model = DynamicModelFactory._build_grading_output_model(rubric_items)
+            parser = CachedPydanticOutputParser(pydantic_object=output_model)
+            models = GradingModels(
+                signature=signature,
+                output_model=output_model,
+                parser=parser,
+                json_schema=output_model.model_json_schema(),
+                adaptive_schema=DynamicModelFactory.create_adaptive_schema(rubric_items),
+                format_instructions=parser.get_format_instructions()
+            )
+            _models_cache[signature] = models
+            _models_cache_stats["misses"] += 1
+            return models
+
+
+def get_model_cache_stats() -> Dict[str, int]:
+    """Get dynamic model cache statistics (entries, hits, misses)."""
+    with _models_cache_lock:
+        return {"entries": len(_models_cache), **_models_cache_stats}
+
+
+def clear_model_cache():
+    """Clear cached dynamic models (mainly for tests)."""
+    with _models_cache_lock:
+        _models_cache.clear()
+        _models_cache_stats.update(hits=0, misses=0)
+
+
+# Basic rubric structure for the default parser
+_DEFAULT_RUBRIC = [
+    {
+        'main_criterion': '기본 채점 요소',
+        'sub_criteria': [
+            {'score': 1, 'content': '기본 채점 내용'}
+        ]
+    }
+]
 
 
 def get_default_parser() -> PydanticOutputParser:
@@ -92,14 +280,4 @@ def get_default_parser() -> PydanticOutputParser:
     Get a default parser for basic grading structure.
     Used when no specific rubric is available.
     """
-    # Create a basic rubric structure for default parser
-    default_rubric = [
-        {
-            'main_criterion': '기본 채점 요소',
-            'sub_criteria': [
-                {'score': 1, 'content': '기본 채점 내용'}
-            ]
-        }
-    ]
-    
-    return DynamicModelFactory.create_parser(default_rubric)
\ No newline at end of file
+    return DynamicModelFactory.create_parser(_DEFAULT_RUBRIC)
\ No newline at end of file
@@ -5,10 +5,11 @@ This module provides the main parser class that orchestrates multiple parsing
 strategies, validation, and error recovery to robustly handle LLM responses.
 """
 
+import json
 import time
 import logging
 import re
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence
 from langchain_core.output_parsers import PydanticOutputParser
 
 from .parsing_models import (
@@ -68,6 +69,88 @@ class EnhancedResponseParser:
         """
         return self._parse_response_internal(response, parser, rubric)
     
+    def parse_batch_response(self, response: str, parser: PydanticOutputParser,
+                             rubric: Optional[List[Dict[str, Any]]], student_ids: Sequence[str],
+                             id_field: str = "학생_ID") -> Dict[str, ParsingResult]:
+        """Split a batched grading response into per-student parsing results.
+        
+        The response is expected to be a JSON array whose elements carry the
+        student id in ``id_field``; an object keyed by student id is accepted
+        as well. Each element is then parsed and validated like a single
+        response, so callers can retry only the students that failed.
+        
+        Args:
+            response: Raw LLM response string
+            parser: Pydantic output parser for validation
+            rubric: Rubric items for adaptive validation (standard validation if None)
+            student_ids: Ids of the students graded in the batch
+            id_field: Field holding the student id in each array element
+            
+        Returns:
+            Dict mapping every student id to its ParsingResult (FAILED if missing)
+        """
+        start_time = time.time()
+        elements = self._extract_batch_elements(response, id_field)
+        
+        results = {}
+        for student_id in student_ids:
+            element = elements.get(str(student_id))
+            if element is None:
+                results[student_id] = ParsingResult(
+                    success_level=SuccessLevel.FAILED,
+                    raw_response=response,
+                    errors=[f"No element with {id_field}={student_id} in batch response"],
+                    total_processing_time_ms=(time.time() - start_time) * 1000
+                )
+                continue
+            results[student_id] = self._parse_response_internal(
+                json.dumps(element, ensure_ascii=False), parser, rubric
+            )
+        
+        logger.debug(f"Batch response: {len(elements)} elements for {len(student_ids)} students")
+        return results
+    
+    def _extract_batch_elements(self, response: str, id_field: str) -> Dict[str, Dict[str, Any]]:
+        """Extract per-student objects from a batched response, keyed by student id."""
+        if not response or not response.strip():
+            return {}
+        
+        cleaned = re.sub(r'```(?:json)?|~~~(?:json)?', '', response, flags=re.IGNORECASE).strip()
+        data = None
+        candidates = [cleaned]
+        for opening, closing in (('[', ']'), ('{', '}')):
+            start, end = cleaned.find(opening), cleaned.rfind(closing)
+            if start != -1 and end > start:
+                candidates.append(cleaned[start:end + 1])
+        for candidate in candidates:
+            for text in (candidate, re.sub(r',\s*([}\]])', r'\1', candidate)):
+                try:
+                    data = json.loads(text)
+                    break
+                except json.JSONDecodeError:
+                    continue
+            if data is not None:
+                break
+        
+        # Unwrap {"결과": [...]}-style wrappers around the array
+        if isinstance(data, dict) and id_field not in data:
+            lists = [value for value in data.values() if isinstance(value, list)]
+            if len(lists) == 1:
+                data = lists[0]
+            elif all(isinstance(value, dict) for value in data.values()):
+                return {str(key): value for key, value in data.items()}
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            return {}
+        
+        elements = {}
+        for item in data:
+            if isinstance(item, dict) and id_field in item:
+                element = {key: value for key, value in item.items() if key != id_field}
+                elements.setdefault(str(item[id_field]), element)
+        return elements
+    
     def _parse_response_internal(self, response: str, parser: PydanticOutputParser, 
                                rubric: Optional[List[Dict[str, Any]]] = None) -> ParsingResult:
         """
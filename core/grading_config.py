@@ -0,0 +1,53 @@
+"""
+Configuration for the grading pipeline.
+
+This module defines the runtime options that control how a batch of student
+answers is processed, complementing ParsingConfig which controls the parser.
+"""
+
+from dataclasses import dataclass
+from enum import Enum
+
+
+class ConcurrencyMode(Enum):
+    """Enumeration for batch grading concurrency modes."""
+    SEQUENTIAL = "sequential"  # One student at a time (original behaviour)
+    THREAD = "thread"          # Bounded thread pool
+    ASYNC = "async"            # asyncio tasks on the LLM manager's event loop
+
+
+@dataclass
+class GradingConfig:
+    """Configuration for batch grading behaviour."""
+    concurrency_mode: ConcurrencyMode = ConcurrencyMode.THREAD
+    max_workers: int = 4                  # Thread pool size (THREAD mode)
+    max_concurrent_requests: int = 32     # In-flight students (ASYNC mode)
+    use_response_cache: bool = True       # Reuse LLM responses for identical prompts
+    deduplicate_answers: bool = True      # Grade identical (normalized) answers once
+    flag_near_duplicates: bool = False    # Flag near-identical answers (MinHash) for review
+    near_duplicate_threshold: float = 0.8 # Minimum estimated Jaccard similarity
+    batch_rerank: bool = True             # Rerank all students' (answer, chunk) pairs together
+    rerank_batch_size: int = 64           # CrossEncoder batch size for batch reranking
+    rubric_retrieval: bool = False        # Retrieve/rerank once per rubric criterion, shared by all students
+    rubric_context_top_n: int = 2         # Documents kept per rubric criterion (rubric retrieval)
+    answer_top_k: int = 0                 # Per-answer documents merged into the shared context (0 = none)
+    dedupe_context: bool = True           # Drop text repeated between overlapping chunks in the prompt
+    context_token_budget: int = 0         # Max tokens of reference text per answer (0 = no limit)
+    batch_grading_size: int = 1           # Answers graded per LLM call; shared context budget scales with it
+    structured_output: bool = False       # Ask for the provider's native JSON schema / JSON mode output
+
+    def get_concurrency_limit(self) -> int:
+        """Get the number of students that may be graded at the same time."""
+        if self.concurrency_mode == ConcurrencyMode.SEQUENTIAL:
+            return 1
+        if self.concurrency_mode == ConcurrencyMode.ASYNC:
+            return max(1, self.max_concurrent_requests)
+        return max(1, self.max_workers)
+
+    def is_concurrent(self) -> bool:
+        """Check if more than one student may be graded at the same time."""
+        return self.get_concurrency_limit() > 1
+
+    def is_async(self) -> bool:
+        """Check if students are graded as asyncio tasks."""
+        return self.concurrency_mode == ConcurrencyMode.ASYNC
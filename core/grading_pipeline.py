@@ -3,18 +3,35 @@ Core grading pipeline for processing student answers.
 Contains the main grading logic extracted from the original main.py.
 Now includes enhanced response parsing for robust LLM output handling.
 """
+import asyncio
+import copy
+import json
 import time
-from typing import Dict, Any, List
-from utils.retrieval import retrieve_documents, rerank_documents
-from prompts.prompt_templates import get_grading_prompt
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel
+from utils.retrieval import (
+    retrieve_documents, batch_retrieve_documents, rerank_documents, batch_rerank_documents, get_retrieval_cache,
+    merge_documents
+)
+from utils.context_builder import BuiltContext, build_context, get_token_counter
+from prompts.prompt_templates import BATCH_ID_FIELD, CompiledGradingPrompt, compile_grading_prompt, get_grading_prompt
 from .enhanced_response_parser import EnhancedResponseParser, parse_llm_response
-from .parsing_models import ParsingConfig, SuccessLevel
+from .parsing_models import ParsingConfig, ParsingResult, SuccessLevel
+from .grading_config import GradingConfig
+from .concurrency import run_ordered, run_ordered_coroutines, gather_ordered, ProgressCallback
+from .answer_dedup import group_identical_answers, find_near_duplicate_groups
 
 
 class GradingPipeline:
     """Pipeline for processing individual student answers through the grading system."""
     
-    def __init__(self, llm_manager, retriever, parsing_config=None):
+    DEFAULT_LLM_PROVIDER = "GROQ"
+    DEFAULT_LLM_MODEL = "llama-3.3-70b-versatile"  # Use generation model (not guard model)
+    
+    def __init__(self, llm_manager, retriever, parsing_config=None, grading_config=None,
+                 llm_provider: Optional[str] = None, llm_model: Optional[str] = None,
+                 response_cache=None):
         """
         Initialize the grading pipeline.
         
@@ -22,9 +39,17 @@ class GradingPipeline:
             llm_manager: LLM manager instance for making API calls
             retriever: Document retriever for RAG functionality
             parsing_config: Configuration for enhanced response parsing
+            grading_config: Configuration for batch grading (concurrency etc.)
+            llm_provider: Provider of the grading model (defaults to GROQ)
+            llm_model: Grading model name, e.g. the model selected in the sidebar
+            response_cache: LLMResponseCache for reusing responses to identical prompts (None disables it)
         """
         self.llm_manager = llm_manager
         self.retriever = retriever
+        self.llm_provider = llm_provider or self.DEFAULT_LLM_PROVIDER
+        self.llm_model = llm_model or self.DEFAULT_LLM_MODEL
+        self.response_cache = response_cache
+        self.grading_config = grading_config or GradingConfig()
         
         # Initialize enhanced parser
         self.parsing_config = parsing_config or ParsingConfig(
@@ -38,7 +63,11 @@ class GradingPipeline:
         self.enhanced_parser = EnhancedResponseParser(self.parsing_config)
     
     def process_student_answer(self, student_name: str, student_answer: str, 
-                             rubric: List[Dict], question_type: str, parser) -> Dict[str, Any]:
+                             rubric: List[Dict], question_type: str, parser,
+                             show_status: bool = True,
+                             retrieved_docs: Optional[List[Any]] = None,
+                             reranked_docs: Optional[List[Any]] = None,
+                             compiled_prompt: Optional[CompiledGradingPrompt] = None) -> Dict[str, Any]:
         """
         Process a single student answer through the complete grading pipeline.
         
@@ -51,6 +80,13 @@ class GradingPipeline:
             rubric: Grading rubric for evaluation
             question_type: Type of question being graded
             parser: Pydantic parser for structured output
+            show_status: Whether to show Streamlit status messages (disable off the script thread)
+            retrieved_docs: Documents already retrieved for this answer (e.g. by a batch search);
+                retrieved here if omitted
+            reranked_docs: Documents already reranked for this answer (e.g. by batch reranking);
+                skips both retrieval and reranking when given
+            compiled_prompt: Prompt compiled once for the batch; the prompt is built from
+                scratch if omitted
             
         Returns:
             dict: Complete grading result including scores, feedback, and metadata
@@ -58,145 +94,903 @@ class GradingPipeline:
         start_time = time.time()
         
         try:
-            # Step 1: Retrieve relevant documents using RAG
-            retrieved_docs = retrieve_documents(self.retriever, student_answer, student_name)
-            
-            # Step 2: Rerank documents for better relevance
-            reranked_docs = rerank_documents(retrieved_docs, student_answer)
+            reranked_docs, grading_prompt, context = self._prepare_grading_prompt(
+                student_name, student_answer, rubric, question_type, parser, show_status,
+                retrieved_docs, reranked_docs, compiled_prompt
+            )
             
-            # Step 3: Prepare context from retrieved documents
-            retrieved_docs_content = "\n\n".join([doc.page_content for doc in reranked_docs])
+            # Step 6: Call LLM for grading (skipped when an identical prompt was graded before)
+            cached_response, cache_key = self._lookup_cached_response(grading_prompt)
+            parsing_result = None
+            if cached_response is not None:
+                llm_response_str = cached_response
+            else:
+                llm_response_str, parsing_result = self._call_llm(grading_prompt, parser)
             
-            # Step 4: Get format instructions from parser
-            format_instructions = parser.get_format_instructions()
+            result = self._build_result(
+                student_name, student_answer, llm_response_str, reranked_docs, rubric, parser, start_time,
+                parsing_result=parsing_result
+            )
+            self._attach_context_stats(result, context)
+            if cached_response is None:
+                self._store_response(cache_key, llm_response_str, result)
+            return result
+        
+        except Exception as e:
+            return {"이름": student_name, "오류": f"채점 중 오류 발생: {e}"}
+    
+    async def aprocess_student_answer(self, student_name: str, student_answer: str,
+                                      rubric: List[Dict], question_type: str, parser,
+                                      retrieved_docs: Optional[List[Any]] = None,
+                                      reranked_docs: Optional[List[Any]] = None,
+                                      compiled_prompt: Optional[CompiledGradingPrompt] = None) -> Dict[str, Any]:
+        """
+        Async counterpart of process_student_answer.
+        
+        Retrieval and reranking are CPU-bound and run in a worker thread; the LLM call
+        uses the LLM manager's async API so waiting on the provider does not hold a thread.
+        
+        Args:
+            student_name: Name of the student
+            student_answer: The student's answer text
+            rubric: Grading rubric for evaluation
+            question_type: Type of question being graded
+            parser: Pydantic parser for structured output
+            retrieved_docs: Documents already retrieved for this answer; retrieved here if omitted
+            reranked_docs: Documents already reranked for this answer; skips retrieval and reranking
+            compiled_prompt: Prompt compiled once for the batch; built from scratch if omitted
             
-            # Step 5: Generate grading prompt
-            grading_prompt = get_grading_prompt(
-                question_type, rubric, student_answer, 
-                retrieved_docs_content, format_instructions
+        Returns:
+            dict: Complete grading result including scores, feedback, and metadata
+        """
+        start_time = time.time()
+        
+        try:
+            reranked_docs, grading_prompt, context = await asyncio.to_thread(
+                self._prepare_grading_prompt,
+                student_name, student_answer, rubric, question_type, parser, False,
+                retrieved_docs, reranked_docs, compiled_prompt
             )
             
-            # Step 6: Call LLM for grading
-            llm = self.llm_manager.get_llm("GROQ", "llama-3.3-70b-versatile")  # Use generation model (not guard model)
-            llm_response_str = self.llm_manager.call_llm_with_retry(llm, grading_prompt)
+            cached_response, cache_key = self._lookup_cached_response(grading_prompt)
+            parsing_result = None
+            if cached_response is not None:
+                llm_response_str = cached_response
+            else:
+                llm_response_str, parsing_result = await self._acall_llm(grading_prompt, parser)
             
-            if not llm_response_str:
-                return {"이름": student_name, "오류": "LLM 응답을 받지 못했습니다."}
+            result = self._build_result(
+                student_name, student_answer, llm_response_str, reranked_docs, rubric, parser, start_time,
+                parsing_result=parsing_result
+            )
+            self._attach_context_stats(result, context)
+            if cached_response is None:
+                self._store_response(cache_key, llm_response_str, result)
+            return result
+        
+        except Exception as e:
+            return {"이름": student_name, "오류": f"채점 중 오류 발생: {e}"}
+    
+    def _call_llm(self, grading_prompt: str, parser) -> Tuple[Optional[str], Optional[ParsingResult]]:
+        """
+        Call the grading model for one answer.
+        
+        With structured output enabled the provider's native JSON schema / JSON
+        mode is requested first, driven by the parser's dynamic model. A
+        schema-valid reply skips the response parser entirely; a malformed one
+        is handed to the parser as text, and a rejected request falls back to
+        the plain prompt call. Rate-limit and connection errors that outlast the
+        structured call's retries propagate instead of starting a second retry
+        loop on the plain call.
+        
+        Returns:
+            tuple: (llm_response_str, ParsingResult of a schema-valid reply or None)
+        """
+        llm = self.llm_manager.get_llm(self.llm_provider, self.llm_model)
+        if self.grading_config.structured_output:
+            parsed, raw_text = self.llm_manager.call_llm_structured_with_retry(
+                llm, grading_prompt, parser.pydantic_object
+            )
+            if parsed is not None:
+                return self._structured_response(parsed, raw_text)
+            if raw_text:
+                return raw_text, None
+        return self.llm_manager.call_llm_with_retry(llm, grading_prompt), None
+    
+    async def _acall_llm(self, grading_prompt: str, parser) -> Tuple[Optional[str], Optional[ParsingResult]]:
+        """Async counterpart of _call_llm."""
+        llm = await self.llm_manager.aget_llm(self.llm_provider, self.llm_model)
+        if self.grading_config.structured_output:
+            parsed, raw_text = await self.llm_manager.acall_llm_structured_with_retry(
+                llm, grading_prompt, parser.pydantic_object
+            )
+            if parsed is not None:
+                return self._structured_response(parsed, raw_text)
+            if raw_text:
+                return raw_text, None
+        return await self.llm_manager.acall_llm_with_retry(llm, grading_prompt), None
+    
+    @staticmethod
+    def _structured_response(parsed: Any, raw_text: Optional[str]) -> Tuple[str, ParsingResult]:
+        """Wrap a schema-valid structured output as a full parsing result."""
+        data = parsed.model_dump() if isinstance(parsed, BaseModel) else dict(parsed)
+        # The raw JSON is what gets cached; a cache hit later goes through the parser's direct JSON strategy
+        llm_response_str = raw_text or json.dumps(data, ensure_ascii=False)
+        return llm_response_str, ParsingResult(
+            success_level=SuccessLevel.FULL,
+            data=data,
+            raw_response=llm_response_str,
+            total_processing_time_ms=0.0,
+            recovery_notes=["provider structured output"]
+        )
+    
+    def _prepare_grading_prompt(self, student_name: str, student_answer: str, rubric: List[Dict],
+                                question_type: str, parser, show_status: bool = True,
+                                retrieved_docs: Optional[List[Any]] = None,
+                                reranked_docs: Optional[List[Any]] = None,
+                                compiled_prompt: Optional[CompiledGradingPrompt] = None):
+        """
+        Retrieve and rerank reference documents and render the grading prompt.
+        
+        With a compiled prompt only the reference documents and the answer are
+        spliced into its pre-rendered static prefix.
+        
+        Returns:
+            tuple: (reranked_docs, grading_prompt, BuiltContext)
+        """
+        reranked_docs = self._resolve_documents(
+            student_name, student_answer, show_status, retrieved_docs, reranked_docs
+        )
+        
+        # Step 3: Prepare context from retrieved documents (overlaps removed, within the token budget)
+        context = self._build_context(student_answer, reranked_docs)
+        retrieved_docs_content = context.content
+        
+        if compiled_prompt is not None:
+            return reranked_docs, compiled_prompt.render(student_answer, retrieved_docs_content), context
+        
+        # Step 4: Get format instructions from parser
+        format_instructions = parser.get_format_instructions()
+        
+        # Step 5: Generate grading prompt
+        grading_prompt = get_grading_prompt(
+            question_type, rubric, student_answer, 
+            retrieved_docs_content, format_instructions
+        )
+        
+        return reranked_docs, grading_prompt, context
+    
+    def _resolve_documents(self, student_name: str, student_answer: str, show_status: bool = True,
+                           retrieved_docs: Optional[List[Any]] = None,
+                           reranked_docs: Optional[List[Any]] = None) -> List[Any]:
+        """Retrieve and rerank the answer's reference documents unless they were prepared by the batch."""
+        if reranked_docs is None:
+            # Step 1: Retrieve relevant documents using RAG (unless prefetched by a batch search)
+            if retrieved_docs is None:
+                retrieved_docs = retrieve_documents(self.retriever, student_answer, student_name, show_status)
             
-            # Step 7: Parse LLM response using enhanced parser with adaptive validation
+            # Step 2: Rerank documents for better relevance
+            reranked_docs = rerank_documents(retrieved_docs, student_answer, show_status)
+        return reranked_docs
+    
+    def _build_context(self, student_answer: str, reranked_docs: List[Any],
+                       answer_count: int = 1) -> BuiltContext:
+        """
+        Join the reranked documents into the prompt's reference text.
+        
+        Text repeated between overlapping chunks is dropped and, with a token
+        budget, only the sentences closest to the answer are kept. Tokens are
+        counted with the grading model's tokenizer when it is available.
+        
+        Args:
+            answer_count: Answers sharing this context; the per-answer token
+                budget is scaled by it for batched prompts
+        
+        Returns:
+            BuiltContext: Reference text with original and final token counts
+        """
+        return build_context(
+            reranked_docs, query=student_answer,
+            token_budget=self.grading_config.context_token_budget * answer_count,
+            count_tokens=get_token_counter(self.llm_model),
+            dedupe=self.grading_config.dedupe_context
+        )
+    
+    @staticmethod
+    def _attach_context_stats(result: Dict[str, Any], context: BuiltContext):
+        """Report the reference text size and the tokens saved on graded results."""
+        if "채점결과" in result:
+            result["참고자료_토큰"] = context.context_tokens
+            result["참고자료_절약_토큰"] = context.tokens_saved
+    
+    def _lookup_cached_response(self, grading_prompt: str):
+        """
+        Look up a cached LLM response for the rendered prompt.
+        
+        Returns:
+            tuple: (cached_response or None, cache_key or None when caching is disabled)
+        """
+        if self.response_cache is None:
+            return None, None
+        cache_key = self.response_cache.make_key(self.llm_provider, self.llm_model, grading_prompt)
+        return self.response_cache.get(cache_key), cache_key
+    
+    def _store_response(self, cache_key: Optional[str], llm_response_str: Optional[str], result: Dict[str, Any]):
+        """Cache the LLM response, but only if it parsed completely so bad replies are retried next time."""
+        if cache_key and llm_response_str and "오류" not in result:
+            self.response_cache.set(cache_key, llm_response_str, self.llm_provider, self.llm_model)
+    
+    def _build_result(self, student_name: str, student_answer: str, llm_response_str: Optional[str],
+                      reranked_docs: List[Any], rubric: List[Dict], parser, start_time: float,
+                      parsing_result: Optional[ParsingResult] = None) -> Dict[str, Any]:
+        """
+        Parse the LLM response and assemble the per-student grading result.
+        
+        Args:
+            parsing_result: The student's part of an already parsed (batched) response;
+                ``llm_response_str`` is parsed here if omitted
+        
+        Returns:
+            dict: Complete grading result including scores, feedback, and metadata
+        """
+        if not llm_response_str:
+            return {"이름": student_name, "오류": "LLM 응답을 받지 못했습니다."}
+        
+        # Step 7: Parse LLM response using enhanced parser with adaptive validation
+        if parsing_result is None:
             parsing_result = self.enhanced_parser.parse_response_with_rubric(llm_response_str, parser, rubric)
-            
-            # Step 8: Handle parsing results based on success level
-            if parsing_result.success_level == SuccessLevel.FULL:
-                # Full parsing success
-                try:
-                    # Create parsed object from the corrected data
-                    parsed_output = parser.pydantic_object(**parsing_result.data)
-                    
-                    # Extract and format results
-                    score_results = parsed_output.채점결과.model_dump()
-                    feedback_results = parsed_output.피드백.model_dump()
-                    
-                    # Extract scoring rationale
-                    점수_판단_근거 = score_results.pop("점수_판단_근거", {})
-                    
-                    # Step 9: Prepare referenced documents information
-                    referenced_docs_info = [
-                        f"{doc.metadata.get('source', 'Unknown')} (p.{doc.metadata.get('page', 'N/A')})" 
-                        for doc in reranked_docs
-                    ]
-                    
-                    # Step 10: Calculate processing time
-                    end_time = time.time()
-                    processing_time = end_time - start_time
-                    
-                    # Step 11: Return complete result
-                    result = {
-                        "이름": student_name,
-                        "답안": student_answer,
-                        "채점결과": score_results,
-                        "피드백": feedback_results,
-                        "점수_판단_근거": 점수_판단_근거,
-                        "참고문서": "; ".join(referenced_docs_info),
-                        "채점_소요_시간": processing_time
-                    }
-                    
-                    # Add parsing warnings if any
-                    if parsing_result.warnings:
-                        result["파싱_경고"] = "; ".join(parsing_result.warnings)
-                    
-                    return result
-                    
-                except Exception as formatting_error:
-                    # Even with successful parsing, object creation failed
-                    return {
-                        "이름": student_name,
-                        "오류": f"파싱된 데이터 처리 오류: {formatting_error}",
-                        "파싱_데이터": parsing_result.data,
-                        "파싱_경고": "; ".join(parsing_result.warnings) if parsing_result.warnings else None
-                    }
-                    
-            elif parsing_result.success_level == SuccessLevel.PARTIAL:
-                # Partial parsing success - return what we can
-                best_data = parsing_result.get_best_data()
+        
+        # Step 8: Handle parsing results based on success level
+        if parsing_result.success_level == SuccessLevel.FULL:
+            # Full parsing success
+            try:
+                # Create parsed object from the corrected data
+                parsed_output = parser.pydantic_object(**parsing_result.data)
                 
-                return {
+                # Extract and format results
+                score_results = parsed_output.채점결과.model_dump()
+                feedback_results = parsed_output.피드백.model_dump()
+                
+                # Extract scoring rationale
+                점수_판단_근거 = score_results.pop("점수_판단_근거", {})
+                
+                # Step 9: Prepare referenced documents information
+                referenced_docs_info = [
+                    f"{doc.metadata.get('source', 'Unknown')} (p.{doc.metadata.get('page', 'N/A')})" 
+                    for doc in reranked_docs
+                ]
+                
+                # Step 10: Calculate processing time
+                end_time = time.time()
+                processing_time = end_time - start_time
+                
+                # Step 11: Return complete result
+                result = {
                     "이름": student_name,
                     "답안": student_answer,
-                    "오류": "부분적 파싱 성공",
-                    "채점결과": best_data.get("채점결과", {}) if best_data else {},
-                    "피드백": best_data.get("피드백", {}) if best_data else {},
-                    "점수_판단_근거": best_data.get("점수_판단_근거", {}) if best_data else {},
-                    "파싱_경고": "; ".join(parsing_result.warnings) if parsing_result.warnings else "부분 데이터 복구됨",
-                    "파싱_오류": "; ".join(parsing_result.errors) if parsing_result.errors else None,
-                    "원본_응답_샘플": llm_response_str[:200] + "..." if len(llm_response_str) > 200 else llm_response_str
+                    "채점결과": score_results,
+                    "피드백": feedback_results,
+                    "점수_판단_근거": 점수_판단_근거,
+                    "참고문서": "; ".join(referenced_docs_info),
+                    "채점_소요_시간": processing_time
                 }
                 
-            else:
-                # Complete parsing failure
+                # Add parsing warnings if any
+                if parsing_result.warnings:
+                    result["파싱_경고"] = "; ".join(parsing_result.warnings)
+                
+                return result
+            
+            except Exception as formatting_error:
+                # Even with successful parsing, object creation failed
                 return {
                     "이름": student_name,
-                    "오류": f"LLM 응답 파싱 실패: {'; '.join(parsing_result.errors)}",
-                    "파싱_시도_횟수": len(parsing_result.attempts),
-                    "파싱_전략들": [attempt.strategy.value for attempt in parsing_result.attempts],
-                    "처리_시간_ms": f"{parsing_result.total_processing_time_ms:.2f}",
-                    "원본_응답_샘플": llm_response_str[:500] + "..." if len(llm_response_str) > 500 else llm_response_str
+                    "오류": f"파싱된 데이터 처리 오류: {formatting_error}",
+                    "파싱_데이터": parsing_result.data,
+                    "파싱_경고": "; ".join(parsing_result.warnings) if parsing_result.warnings else None
                 }
         
-        except Exception as e:
-            return {"이름": student_name, "오류": f"채점 중 오류 발생: {e}"}
+        elif parsing_result.success_level == SuccessLevel.PARTIAL:
+            # Partial parsing success - return what we can
+            best_data = parsing_result.get_best_data()
+            
+            return {
+                "이름": student_name,
+                "답안": student_answer,
+                "오류": "부분적 파싱 성공",
+                "채점결과": best_data.get("채점결과", {}) if best_data else {},
+                "피드백": best_data.get("피드백", {}) if best_data else {},
+                "점수_판단_근거": best_data.get("점수_판단_근거", {}) if best_data else {},
+                "파싱_경고": "; ".join(parsing_result.warnings) if parsing_result.warnings else "부분 데이터 복구됨",
+                "파싱_오류": "; ".join(parsing_result.errors) if parsing_result.errors else None,
+                "원본_응답_샘플": llm_response_str[:200] + "..." if len(llm_response_str) > 200 else llm_response_str
+            }
+        
+        else:
+            # Complete parsing failure
+            return {
+                "이름": student_name,
+                "오류": f"LLM 응답 파싱 실패: {'; '.join(parsing_result.errors)}",
+                "파싱_시도_횟수": len(parsing_result.attempts),
+                "파싱_전략들": [attempt.strategy.value for attempt in parsing_result.attempts],
+                "처리_시간_ms": f"{parsing_result.total_processing_time_ms:.2f}",
+                "원본_응답_샘플": llm_response_str[:500] + "..." if len(llm_response_str) > 500 else llm_response_str
+            }
     
     def process_batch(self, student_answers_df, rubric: List[Dict], 
-                     question_type: str, parser) -> List[Dict[str, Any]]:
+                     question_type: str, parser,
+                     progress_callback: Optional[ProgressCallback] = None) -> List[Dict[str, Any]]:
         """
         Process multiple student answers in batch.
         
+        Students are graded concurrently according to ``grading_config``; results are
+        always returned in the DataFrame's row order. Answers that are identical after
+        normalization are graded once and the result is copied to every student in
+        the group (progress is then reported per group).
+        
         Args:
             student_answers_df: DataFrame containing student answers
             rubric: Grading rubric for evaluation
             question_type: Type of question being graded
             parser: Pydantic parser for structured output
+            progress_callback: Called as ``progress_callback(completed, total)`` from the
+                calling thread whenever a student (or duplicate group) finishes
             
         Returns:
             list: List of grading results for all students
         """
-        results = []
+        rows = self._collect_rows(student_answers_df)
+        groups = self._group_duplicate_rows(rows)
+        representative_rows = [rows[group[0]] for group in groups]
         
-        for index, row in student_answers_df.iterrows():
-            student_name = row["이름"]
-            
-            if "답안" not in row:
-                result = {"이름": student_name, "오류": f"{student_name} 학생의 답안 컬럼이 누락되었습니다."}
-            else:
-                student_answer = row["답안"]
-                result = self.process_student_answer(
-                    student_name, student_answer, rubric, question_type, parser
+        # Embed every answer in one pass and search the index once for the whole batch,
+        # then rerank all students' (answer, chunk) pairs together (or share per-criterion context)
+        show_status = not self.grading_config.is_concurrent()
+        retrieved_docs_list, reranked_docs_list = self._retrieve_context(
+            representative_rows, rubric, show_status=show_status
+        )
+        
+        grade_rows = self._grade_rows_batched if self.grading_config.batch_grading_size > 1 else self._grade_rows
+        representative_results = grade_rows(
+            representative_rows, rubric, question_type, parser, retrieved_docs_list, reranked_docs_list,
+            progress_callback, compiled_prompt=self._compile_prompt(rubric, question_type, parser)
+        )
+        return self._finalize_batch_results(rows, groups, representative_results)
+    
+    @staticmethod
+    def _compile_prompt(rubric: List[Dict], question_type: str, parser) -> CompiledGradingPrompt:
+        """Render the student-independent part of the grading prompt once for a batch."""
+        return compile_grading_prompt(question_type, rubric, parser.get_format_instructions())
+    
+    def _retrieve_context(self, rows: List[tuple], rubric: List[Dict], show_status: bool = False):
+        """
+        Prepare reference documents for all rows before grading.
+        
+        By default each answer is the retrieval query. With ``rubric_retrieval`` the
+        documents are retrieved and reranked once per rubric criterion and the same
+        context is shared by every student, optionally merged with the answer's own
+        top ``answer_top_k`` documents.
+        
+        Returns:
+            tuple: (retrieved_docs_list, reranked_docs_list), None entries are handled per student
+        """
+        shared_docs = self._rubric_context(rubric, show_status) if self.grading_config.rubric_retrieval else None
+        if shared_docs is None:
+            retrieved_docs_list = self._batch_retrieve(rows, show_status=show_status)
+            return retrieved_docs_list, self._batch_rerank(rows, retrieved_docs_list, show_status=show_status)
+        
+        answered = [index for index, (_, answer) in enumerate(rows) if answer is not None]
+        answer_docs: Dict[int, List[Any]] = {}
+        if self.grading_config.answer_top_k > 0 and answered:
+            retrieved_docs_list = self._batch_retrieve(rows, show_status=show_status)
+            try:
+                batch_docs = batch_rerank_documents(
+                    [retrieved_docs_list[index] for index in answered],
+                    [rows[index][1] for index in answered],
+                    top_n=self.grading_config.answer_top_k,
+                    batch_size=self.grading_config.rerank_batch_size,
+                    show_status=show_status
+                )
+                answer_docs = dict(zip(answered, batch_docs))
+            except Exception as e:
+                print(f"답안별 문서 재정렬 중 오류 발생, 루브릭 기준 문서만 사용합니다: {e}")
+        
+        context_docs_list: List[Optional[List[Any]]] = [None] * len(rows)
+        for index in answered:
+            context_docs_list[index] = merge_documents([shared_docs, answer_docs.get(index, [])])
+        return context_docs_list, context_docs_list
+    
+    def _rubric_context(self, rubric: List[Dict], show_status: bool = False) -> Optional[List[Any]]:
+        """
+        Retrieve and rerank reference documents once per rubric criterion.
+        
+        Returns:
+            list: Merged documents in criterion order, or None if the rubric has no
+                criterion text or retrieval fails (per-answer retrieval is used instead)
+        """
+        queries = self._rubric_queries(rubric)
+        if not queries or not self.retriever:
+            return None
+        try:
+            retrieved = batch_retrieve_documents(self.retriever, queries, show_status=show_status)
+            reranked = batch_rerank_documents(
+                retrieved, queries, top_n=self.grading_config.rubric_context_top_n,
+                batch_size=self.grading_config.rerank_batch_size, show_status=show_status
+            )
+        except Exception as e:
+            print(f"루브릭 기준 문서 검색 중 오류 발생, 답안별 검색으로 대체합니다: {e}")
+            return None
+        return merge_documents(reranked)
+    
+    @staticmethod
+    def _rubric_queries(rubric: List[Dict]) -> List[str]:
+        """Build one retrieval query per main criterion from its name and sub-criteria text."""
+        queries = []
+        for item in rubric or []:
+            parts = [str(item.get('main_criterion', ''))]
+            parts += [str(sub.get('content', '')) for sub in item.get('sub_criteria', []) if isinstance(sub, dict)]
+            query = " ".join(part.strip() for part in parts if part and part.strip())
+            if query:
+                queries.append(query)
+        return queries
+    
+    def _batch_retrieve(self, rows: List[tuple], show_status: bool = False) -> List[Optional[List[Any]]]:
+        """
+        Retrieve reference documents for all answered rows with a single batch search.
+        
+        Returns:
+            list: Documents per row (None for rows without an answer column)
+        """
+        answered = [index for index, (_, answer) in enumerate(rows) if answer is not None]
+        retrieved_docs_list: List[Optional[List[Any]]] = [None] * len(rows)
+        batch_docs = batch_retrieve_documents(
+            self.retriever, [rows[index][1] for index in answered], show_status=show_status
+        )
+        for index, docs in zip(answered, batch_docs):
+            retrieved_docs_list[index] = docs
+        return retrieved_docs_list
+    
+    def _batch_rerank(self, rows: List[tuple], retrieved_docs_list: List[Optional[List[Any]]],
+                      show_status: bool = False) -> List[Optional[List[Any]]]:
+        """
+        Rerank the retrieved documents of all rows with one CrossEncoder pass.
+        
+        Returns:
+            list: Top documents per row, or all None when batch reranking is disabled
+                (each student is then reranked on its own)
+        """
+        reranked_docs_list: List[Optional[List[Any]]] = [None] * len(rows)
+        if not self.grading_config.batch_rerank:
+            return reranked_docs_list
+        
+        answered = [index for index, docs in enumerate(retrieved_docs_list) if docs is not None]
+        try:
+            batch_docs = batch_rerank_documents(
+                [retrieved_docs_list[index] for index in answered],
+                [rows[index][1] for index in answered],
+                batch_size=self.grading_config.rerank_batch_size,
+                show_status=show_status
+            )
+        except Exception as e:
+            # Fall back to reranking inside each student's grading task
+            print(f"일괄 재정렬 중 오류 발생, 학생별 재정렬로 대체합니다: {e}")
+            return reranked_docs_list
+        for index, docs in zip(answered, batch_docs):
+            reranked_docs_list[index] = docs
+        return reranked_docs_list
+    
+    def _grade_rows(self, rows: List[tuple], rubric: List[Dict], question_type: str, parser,
+                    retrieved_docs_list: List[Optional[List[Any]]],
+                    reranked_docs_list: List[Optional[List[Any]]],
+                    progress_callback: Optional[ProgressCallback] = None,
+                    compiled_prompt: Optional[CompiledGradingPrompt] = None) -> List[Dict[str, Any]]:
+        """Grade (student_name, student_answer) rows with the configured concurrency, in order."""
+        student_names = [student_name for student_name, _ in rows]
+        
+        def _on_error(index: int, error: Exception) -> Dict[str, Any]:
+            return {"이름": student_names[index], "오류": f"채점 중 오류 발생: {error}"}
+        
+        if self.grading_config.is_async():
+            # Students run as asyncio tasks on the LLM manager's event loop
+            factories = [
+                partial(self._agrade_row, student_name, student_answer, rubric, question_type, parser,
+                        retrieved_docs, reranked_docs, compiled_prompt)
+                for (student_name, student_answer), retrieved_docs, reranked_docs
+                in zip(rows, retrieved_docs_list, reranked_docs_list)
+            ]
+            return run_ordered_coroutines(
+                factories,
+                submit=self.llm_manager.run_async,
+                max_concurrency=self.grading_config.get_concurrency_limit(),
+                progress_callback=progress_callback,
+                error_handler=_on_error
+            )
+        
+        concurrent = self.grading_config.is_concurrent()
+        tasks = [
+            partial(self._grade_row, student_name, student_answer, rubric, question_type, parser,
+                    show_status=not concurrent, retrieved_docs=retrieved_docs, reranked_docs=reranked_docs,
+                    compiled_prompt=compiled_prompt)
+            for (student_name, student_answer), retrieved_docs, reranked_docs
+            in zip(rows, retrieved_docs_list, reranked_docs_list)
+        ]
+        
+        return run_ordered(
+            tasks,
+            max_workers=self.grading_config.get_concurrency_limit(),
+            progress_callback=progress_callback,
+            error_handler=_on_error
+        )
+    
+    def _grade_rows_batched(self, rows: List[tuple], rubric: List[Dict], question_type: str, parser,
+                            retrieved_docs_list: List[Optional[List[Any]]],
+                            reranked_docs_list: List[Optional[List[Any]]],
+                            progress_callback: Optional[ProgressCallback] = None,
+                            compiled_prompt: Optional[CompiledGradingPrompt] = None) -> List[Dict[str, Any]]:
+        """
+        Grade rows ``batch_grading_size`` answers per LLM call, in order.
+        
+        Chunks run with the configured concurrency and progress is reported per chunk.
+        Answers the batched response does not cover are graded with their own call.
+        """
+        compiled_prompt = compiled_prompt or self._compile_prompt(rubric, question_type, parser)
+        chunks = self._chunk_indices(len(rows))
+        error_handler = partial(self._chunk_error_results, rows, chunks)
+        
+        if self.grading_config.is_async():
+            factories = [
+                partial(self._agrade_chunk, [rows[i] for i in chunk], rubric, question_type, parser,
+                        [retrieved_docs_list[i] for i in chunk], [reranked_docs_list[i] for i in chunk],
+                        compiled_prompt)
+                for chunk in chunks
+            ]
+            chunk_results = run_ordered_coroutines(
+                factories,
+                submit=self.llm_manager.run_async,
+                max_concurrency=self.grading_config.get_concurrency_limit(),
+                progress_callback=progress_callback,
+                error_handler=error_handler
+            )
+        else:
+            concurrent = self.grading_config.is_concurrent()
+            tasks = [
+                partial(self._grade_chunk, [rows[i] for i in chunk], rubric, question_type, parser,
+                        [retrieved_docs_list[i] for i in chunk], [reranked_docs_list[i] for i in chunk],
+                        compiled_prompt, show_status=not concurrent)
+                for chunk in chunks
+            ]
+            chunk_results = run_ordered(
+                tasks,
+                max_workers=self.grading_config.get_concurrency_limit(),
+                progress_callback=progress_callback,
+                error_handler=error_handler
+            )
+        return [result for results in chunk_results for result in results]
+    
+    def _chunk_indices(self, total: int) -> List[List[int]]:
+        """Split row indices into consecutive chunks of ``batch_grading_size``."""
+        size = max(1, self.grading_config.batch_grading_size)
+        return [list(range(start, min(start + size, total))) for start in range(0, total, size)]
+    
+    @staticmethod
+    def _chunk_error_results(rows: List[tuple], chunks: List[List[int]], index: int,
+                             error: Exception) -> List[Dict[str, Any]]:
+        """Report an unexpected chunk failure on every student of the chunk."""
+        return [{"이름": rows[i][0], "오류": f"채점 중 오류 발생: {error}"} for i in chunks[index]]
+    
+    def _grade_chunk(self, rows: List[tuple], rubric: List[Dict], question_type: str, parser,
+                     retrieved_docs_list: List[Optional[List[Any]]],
+                     reranked_docs_list: List[Optional[List[Any]]],
+                     compiled_prompt: CompiledGradingPrompt, show_status: bool = True) -> List[Dict[str, Any]]:
+        """
+        Grade a chunk of rows with one batched prompt.
+        
+        Students whose element of the response is missing or does not validate
+        against the rubric's model are regraded with a single-answer call.
+        
+        Returns:
+            list: Per-row results, in order
+        """
+        start_time = time.time()
+        results = self._missing_answer_results(rows)
+        answered = [index for index, result in enumerate(results) if result is None]
+        reranked_docs_list = list(reranked_docs_list)
+        
+        if len(answered) > 1:
+            try:
+                docs_list, student_ids, batch_prompt = self._prepare_batch_prompt(
+                    rows, answered, retrieved_docs_list, reranked_docs_list, compiled_prompt, show_status
+                )
+                for index, docs in zip(answered, docs_list):
+                    reranked_docs_list[index] = docs
+                cached_response, cache_key = self._lookup_cached_response(batch_prompt)
+                if cached_response is not None:
+                    llm_response_str = cached_response
+                else:
+                    llm = self.llm_manager.get_llm(self.llm_provider, self.llm_model)
+                    llm_response_str = self.llm_manager.call_llm_with_retry(llm, batch_prompt)
+                self._apply_batch_response(
+                    results, rows, answered, docs_list, student_ids, llm_response_str, rubric, parser,
+                    start_time, cache_key if cached_response is None else None
+                )
+            except Exception as e:
+                print(f"일괄 채점 중 오류 발생, 학생별 채점으로 대체합니다: {e}")
+        
+        for index in answered:
+            if results[index] is None:
+                student_name, student_answer = rows[index]
+                results[index] = self.process_student_answer(
+                    student_name, student_answer, rubric, question_type, parser, show_status=show_status,
+                    retrieved_docs=retrieved_docs_list[index], reranked_docs=reranked_docs_list[index],
+                    compiled_prompt=compiled_prompt
                 )
+        return results
+    
+    async def _agrade_chunk(self, rows: List[tuple], rubric: List[Dict], question_type: str, parser,
+                            retrieved_docs_list: List[Optional[List[Any]]],
+                            reranked_docs_list: List[Optional[List[Any]]],
+                            compiled_prompt: CompiledGradingPrompt) -> List[Dict[str, Any]]:
+        """Async counterpart of _grade_chunk."""
+        start_time = time.time()
+        results = self._missing_answer_results(rows)
+        answered = [index for index, result in enumerate(results) if result is None]
+        reranked_docs_list = list(reranked_docs_list)
+        
+        if len(answered) > 1:
+            try:
+                docs_list, student_ids, batch_prompt = await asyncio.to_thread(
+                    self._prepare_batch_prompt,
+                    rows, answered, retrieved_docs_list, reranked_docs_list, compiled_prompt, False
+                )
+                for index, docs in zip(answered, docs_list):
+                    reranked_docs_list[index] = docs
+                cached_response, cache_key = self._lookup_cached_response(batch_prompt)
+                if cached_response is not None:
+                    llm_response_str = cached_response
+                else:
+                    llm = await self.llm_manager.aget_llm(self.llm_provider, self.llm_model)
+                    llm_response_str = await self.llm_manager.acall_llm_with_retry(llm, batch_prompt)
+                self._apply_batch_response(
+                    results, rows, answered, docs_list, student_ids, llm_response_str, rubric, parser,
+                    start_time, cache_key if cached_response is None else None
+                )
+            except Exception as e:
+                print(f"일괄 채점 중 오류 발생, 학생별 채점으로 대체합니다: {e}")
+        
+        for index in answered:
+            if results[index] is None:
+                student_name, student_answer = rows[index]
+                results[index] = await self.aprocess_student_answer(
+                    student_name, student_answer, rubric, question_type, parser,
+                    retrieved_docs=retrieved_docs_list[index], reranked_docs=reranked_docs_list[index],
+                    compiled_prompt=compiled_prompt
+                )
+        return results
+    
+    @staticmethod
+    def _missing_answer_results(rows: List[tuple]) -> List[Optional[Dict[str, Any]]]:
+        """Error results for rows without an answer column, None for rows still to grade."""
+        return [
+            {"이름": student_name, "오류": f"{student_name} 학생의 답안 컬럼이 누락되었습니다."}
+            if student_answer is None else None
+            for student_name, student_answer in rows
+        ]
+    
+    def _prepare_batch_prompt(self, rows: List[tuple], answered: List[int],
+                              retrieved_docs_list: List[Optional[List[Any]]],
+                              reranked_docs_list: List[Optional[List[Any]]],
+                              compiled_prompt: CompiledGradingPrompt, show_status: bool = True):
+        """
+        Resolve every answer's documents and render one prompt for the answered rows.
+        
+        The answers share one reference section built from all their documents,
+        so chunks retrieved for several students are sent once. Its token budget
+        is the per-answer budget times the number of answers.
+        
+        Returns:
+            tuple: (docs per answered row, student ids, batch prompt)
+        """
+        docs_list = [
+            self._resolve_documents(rows[index][0], rows[index][1], show_status,
+                                    retrieved_docs_list[index], reranked_docs_list[index])
+            for index in answered
+        ]
+        answers = [rows[index][1] for index in answered]
+        context = self._build_context("\n".join(answers), merge_documents(docs_list), len(answered))
+        student_ids = [f"S{position + 1}" for position in range(len(answered))]
+        batch_prompt = compiled_prompt.render_batch(list(zip(student_ids, answers)), context.content)
+        return docs_list, student_ids, batch_prompt
+    
+    def _apply_batch_response(self, results: List[Optional[Dict[str, Any]]], rows: List[tuple],
+                              answered: List[int], docs_list: List[List[Any]], student_ids: List[str],
+                              llm_response_str: Optional[str], rubric: List[Dict], parser,
+                              start_time: float, cache_key: Optional[str] = None):
+        """
+        Fill in the results of students whose element of the batched response is valid.
+        
+        Other students keep a None result so the caller regrades them one by one.
+        The response is cached only if every student's element was usable.
+        """
+        if not llm_response_str:
+            return
+        parsing_results = self.enhanced_parser.parse_batch_response(
+            llm_response_str, parser, rubric, student_ids, id_field=BATCH_ID_FIELD
+        )
+        complete = True
+        for index, docs, student_id in zip(answered, docs_list, student_ids):
+            parsing_result = parsing_results[student_id]
+            if parsing_result.success_level != SuccessLevel.FULL:
+                complete = False
+                continue
+            student_name, student_answer = rows[index]
+            # The student's own element, so results never carry other students' answers
+            result = self._build_result(
+                student_name, student_answer, parsing_result.raw_response or llm_response_str, docs, rubric,
+                parser, start_time, parsing_result=parsing_result
+            )
+            if "오류" in result:
+                complete = False
+                continue
+            result["일괄_채점_인원"] = len(answered)
+            results[index] = result
+        if complete:
+            self._store_response(cache_key, llm_response_str, {})
+    
+    async def aprocess_batch(self, student_answers_df, rubric: List[Dict],
+                             question_type: str, parser) -> List[Dict[str, Any]]:
+        """
+        Async counterpart of process_batch for callers that already run an event loop.
+        
+        Retrieval runs on the caller's loop, but the LLM calls are handed to the
+        LLM manager's long-lived event loop: the providers' pooled HTTP
+        connections are bound to that loop, and using them from a caller's loop
+        that is closed afterwards would break every later async call.
+        
+        Args:
+            student_answers_df: DataFrame containing student answers
+            rubric: Grading rubric for evaluation
+            question_type: Type of question being graded
+            parser: Pydantic parser for structured output
             
-            results.append(result)
+        Returns:
+            list: List of grading results for all students, in row order
+        """
+        rows = self._collect_rows(student_answers_df)
+        groups = self._group_duplicate_rows(rows)
+        representative_rows = [rows[group[0]] for group in groups]
+        retrieved_docs_list, reranked_docs_list = await asyncio.to_thread(
+            self._retrieve_context, representative_rows, rubric
+        )
+        compiled_prompt = self._compile_prompt(rubric, question_type, parser)
+        
+        if self.grading_config.batch_grading_size > 1:
+            chunks = self._chunk_indices(len(representative_rows))
+            factories = [
+                partial(self._agrade_chunk, [representative_rows[i] for i in chunk], rubric, question_type, parser,
+                        [retrieved_docs_list[i] for i in chunk], [reranked_docs_list[i] for i in chunk],
+                        compiled_prompt)
+                for chunk in chunks
+            ]
+            chunk_results = await self._run_on_llm_loop(gather_ordered(
+                factories,
+                max_concurrency=self.grading_config.get_concurrency_limit(),
+                error_handler=partial(self._chunk_error_results, representative_rows, chunks)
+            ))
+            representative_results = [result for results in chunk_results for result in results]
+            return self._finalize_batch_results(rows, groups, representative_results)
+        
+        factories = [
+            partial(self._agrade_row, student_name, student_answer, rubric, question_type, parser,
+                    retrieved_docs, reranked_docs, compiled_prompt)
+            for (student_name, student_answer), retrieved_docs, reranked_docs
+            in zip(representative_rows, retrieved_docs_list, reranked_docs_list)
+        ]
+        
+        def _on_error(index: int, error: Exception) -> Dict[str, Any]:
+            return {"이름": representative_rows[index][0], "오류": f"채점 중 오류 발생: {error}"}
+        
+        representative_results = await self._run_on_llm_loop(gather_ordered(
+            factories,
+            max_concurrency=self.grading_config.get_concurrency_limit(),
+            error_handler=_on_error
+        ))
+        return self._finalize_batch_results(rows, groups, representative_results)
+    
+    async def _run_on_llm_loop(self, coro):
+        """Run a coroutine on the LLM manager's event loop and await its result from the caller's loop."""
+        return await asyncio.wrap_future(self.llm_manager.run_async(coro))
+    
+    def _collect_rows(self, student_answers_df) -> List[tuple]:
+        """Extract (student_name, student_answer) pairs; the answer is None if the column is missing."""
+        rows = []
+        for index, row in student_answers_df.iterrows():
+            rows.append((row["이름"], row["답안"] if "답안" in row else None))
+        return rows
+    
+    def _group_duplicate_rows(self, rows: List[tuple]) -> List[List[int]]:
+        """
+        Group row indices with identical normalized answers (one group per row if disabled).
+        Rows with a missing answer column always stay on their own.
+        """
+        if not self.grading_config.deduplicate_answers:
+            return [[index] for index in range(len(rows))]
+        
+        answered = [index for index, (_, answer) in enumerate(rows) if answer is not None]
+        groups = [
+            [answered[i] for i in group]
+            for group in group_identical_answers([rows[index][1] for index in answered])
+        ]
+        groups.extend([index] for index, (_, answer) in enumerate(rows) if answer is None)
+        return sorted(groups, key=lambda group: group[0])
+    
+    def _finalize_batch_results(self, rows: List[tuple], groups: List[List[int]],
+                                representative_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fan each group's result out to its students and flag near-duplicate answers.
+        
+        Duplicates get their own name and answer text, a grading time of zero (no LLM
+        call was made for them) and the representative student in ``중복_답안_대표``.
+        
+        Returns:
+            list: Per-student results in row order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        
+        for group, result in zip(groups, representative_results):
+            for position, index in enumerate(group):
+                student_name, student_answer = rows[index]
+                if position == 0:
+                    student_result = result
+                else:
+                    student_result = copy.deepcopy(result)
+                    student_result["이름"] = student_name
+                    if "답안" in student_result:
+                        student_result["답안"] = student_answer
+                    if "채점_소요_시간" in student_result:
+                        student_result["채점_소요_시간"] = 0.0
+                if len(group) > 1:
+                    student_result["중복_답안_대표"] = rows[group[0]][0]
+                    student_result["중복_답안_수"] = len(group)
+                results[index] = student_result
+        
+        if self.grading_config.flag_near_duplicates:
+            near_duplicate_groups = find_near_duplicate_groups(
+                [answer for _, answer in rows], threshold=self.grading_config.near_duplicate_threshold
+            )
+            for group in near_duplicate_groups:
+                for index in group:
+                    others = [rows[other][0] for other in group if other != index]
+                    results[index]["유사_답안_후보"] = ", ".join(str(name) for name in others)
         
         return results
     
+    def _grade_row(self, student_name: str, student_answer: Optional[str], rubric: List[Dict],
+                   question_type: str, parser, show_status: bool = True,
+                   retrieved_docs: Optional[List[Any]] = None,
+                   reranked_docs: Optional[List[Any]] = None,
+                   compiled_prompt: Optional[CompiledGradingPrompt] = None) -> Dict[str, Any]:
+        """Grade one DataFrame row, reporting a missing answer column as an error."""
+        if student_answer is None:
+            return {"이름": student_name, "오류": f"{student_name} 학생의 답안 컬럼이 누락되었습니다."}
+        return self.process_student_answer(
+            student_name, student_answer, rubric, question_type, parser,
+            show_status=show_status, retrieved_docs=retrieved_docs, reranked_docs=reranked_docs,
+            compiled_prompt=compiled_prompt
+        )
+    
+    async def _agrade_row(self, student_name: str, student_answer: Optional[str], rubric: List[Dict],
+                          question_type: str, parser,
+                          retrieved_docs: Optional[List[Any]] = None,
+                          reranked_docs: Optional[List[Any]] = None,
+                          compiled_prompt: Optional[CompiledGradingPrompt] = None) -> Dict[str, Any]:
+        """Async counterpart of _grade_row."""
+        if student_answer is None:
+            return {"이름": student_name, "오류": f"{student_name} 학생의 답안 컬럼이 누락되었습니다."}
+        return await self.aprocess_student_answer(
+            student_name, student_answer, rubric, question_type, parser,
+            retrieved_docs=retrieved_docs, reranked_docs=reranked_docs, compiled_prompt=compiled_prompt
+        )
+    
     def get_pipeline_info(self) -> Dict[str, Any]:
         """
         Get information about the current pipeline configuration.
@@ -206,9 +1000,36 @@ class GradingPipeline:
         """
         return {
             "llm_manager": type(self.llm_manager).__name__,
+            "llm": {"provider": self.llm_provider, "model": self.llm_model},
+            "response_cache": self.response_cache.get_stats() if self.response_cache else None,
             "retriever": type(self.retriever).__name__ if self.retriever else None,
+            "retrieval_cache": get_retrieval_cache().get_stats(),
+            "rubric_retrieval": {
+                "enabled": self.grading_config.rubric_retrieval,
+                "context_top_n": self.grading_config.rubric_context_top_n,
+                "answer_top_k": self.grading_config.answer_top_k
+            },
+            "context": {
+                "dedupe": self.grading_config.dedupe_context,
+                "token_budget": self.grading_config.context_token_budget
+            },
+            "batch_grading_size": self.grading_config.batch_grading_size,
+            "structured_output": {
+                "enabled": self.grading_config.structured_output,
+                "provider_stats": self.llm_manager.get_structured_output_stats()
+                if hasattr(self.llm_manager, "get_structured_output_stats") else None
+            },
             "pipeline_version": "2.0",
             "enhanced_parsing": True,
+            "concurrency": {
+                "mode": self.grading_config.concurrency_mode.value,
+                "limit": self.grading_config.get_concurrency_limit()
+            },
+            "deduplication": {
+                "exact": self.grading_config.deduplicate_answers,
+                "near_duplicate_flagging": self.grading_config.flag_near_duplicates,
+                "near_duplicate_threshold": self.grading_config.near_duplicate_threshold
+            },
             "parsing_config": {
                 "max_attempts": self.parsing_config.max_attempts,
                 "fallback_recovery": self.parsing_config.enable_fallback_recovery,
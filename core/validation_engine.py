@@ -12,6 +12,7 @@ import logging
 from difflib import SequenceMatcher
 from langchain_core.output_parsers import PydanticOutputParser
 
+from .dynamic_models import DynamicModelFactory
 from .parsing_models import (
     ValidationResult, RecoveryResult, ParsingConfig,
     SuccessLevel
@@ -359,86 +360,9 @@ class ValidationEngine:
             rubric_items: List of rubric items with main_criterion and sub_criteria
             
         Returns:
-            JSON schema dictionary for validation
+            JSON schema dictionary for validation (cached per rubric structure, read-only)
         """
-        logger.debug(f"Creating adaptive schema for {len(rubric_items)} rubric items")
-        
-        # Create schema for scoring results
-        scoring_properties = {}
-        
-        # Add score fields for each rubric item
-        for i, item in enumerate(rubric_items):
-            # Main criterion score field
-            main_field = f"주요_채점_요소_{i+1}_점수"
-            scoring_properties[main_field] = {
-                "type": "integer",
-                "description": f"주요 채점 요소 {i+1}에 대한 점수",
-                "minimum": 0
-            }
-            
-            # Sub-criteria score fields
-            for j, sub_item in enumerate(item.get('sub_criteria', [])):
-                sub_field = f"세부_채점_요소_{i+1}_{j+1}_점수"
-                scoring_properties[sub_field] = {
-                    "type": "integer",
-                    "description": f"세부 채점 요소 {i+1}-{j+1}에 대한 점수",
-                    "minimum": 0
-                }
-        
-        # Add required total score and reasoning fields
-        scoring_properties["합산_점수"] = {
-            "type": "integer",
-            "description": "모든 주요 채점 요소 점수의 합산",
-            "minimum": 0
-        }
-        
-        scoring_properties["점수_판단_근거"] = {
-            "type": "object",
-            "description": "각 주요 채점 요소별 점수 판단 근거",
-            "additionalProperties": True  # Allow flexible structure
-        }
-        
-        # Create schema for feedback
-        feedback_properties = {
-            "교과_내용_피드백": {
-                "type": "string",
-                "description": "교과 내용에 대한 구체적인 피드백",
-                "minLength": 1
-            },
-            "의사_응답_여부": {
-                "type": "boolean",
-                "description": "학생 답안이 의사 응답(bluffing)인지 여부"
-            },
-            "의사_응답_설명": {
-                "type": "string",
-                "description": "의사 응답인 경우 설명, 아니면 빈 문자열",
-                "default": ""
-            }
-        }
-        
-        # Combine into full schema
-        adaptive_schema = {
-            "type": "object",
-            "properties": {
-                "채점결과": {
-                    "type": "object",
-                    "properties": scoring_properties,
-                    "required": ["합산_점수"],  # Only require essential fields
-                    "additionalProperties": False
-                },
-                "피드백": {
-                    "type": "object",
-                    "properties": feedback_properties,
-                    "required": ["교과_내용_피드백", "의사_응답_여부"],
-                    "additionalProperties": False
-                }
-            },
-            "required": ["채점결과", "피드백"],
-            "additionalProperties": False
-        }
-        
-        logger.debug(f"Created adaptive schema with {len(scoring_properties)} scoring fields")
-        return adaptive_schema
+        return DynamicModelFactory.get_grading_models(rubric_items).adaptive_schema
     
     def validate_with_adaptive_schema(self, json_data: Dict[str, Any], 
                                     rubric_items: List[Dict[str, Any]]) -> ValidationResult:
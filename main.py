@@ -10,7 +10,6 @@ from utils.retrieval import get_retriever, retrieve_documents, rerank_documents
 from prompts.prompt_templates import get_grading_prompt
 from utils.map_item import grade_map_question # 백지도 채점 모듈 임포트
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import io
 import time
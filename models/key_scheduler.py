@@ -0,0 +1,393 @@
+"""
+API 키별 요청/토큰 한도와 상태를 추적하는 키 스케줄러.
+
+각 키의 분당 요청 수(RPM)와 분당 토큰 수(TPM) 사용량을 슬라이딩 윈도우로 기록하고,
+429 응답의 retry-after 힌트를 반영하며, 반복적으로 실패하는 키는 일정 시간 제외(bench)합니다.
+요금제/크레딧 한도가 소진된 키(OpenAI insufficient_quota 등)는 재시도로 해결되지 않으므로 사용 불가로 표시합니다.
+호출마다 여유 한도가 가장 큰 키를 선택합니다.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+@dataclass
+class RateLimits:
+    """키 하나에 적용되는 분당 한도."""
+    requests_per_minute: int
+    tokens_per_minute: int
+
+
+# 무료 등급 기준 기본값. <PROVIDER>_RPM_LIMIT / <PROVIDER>_TPM_LIMIT 환경 변수로 덮어쓸 수 있습니다.
+DEFAULT_RATE_LIMITS = {
+    "GROQ": RateLimits(requests_per_minute=30, tokens_per_minute=12000),
+    "OpenAI": RateLimits(requests_per_minute=500, tokens_per_minute=200000),
+    "Google": RateLimits(requests_per_minute=10, tokens_per_minute=250000),
+}
+
+WINDOW_SECONDS = 60.0
+FAILURE_BENCH_BASE_SECONDS = 1.0
+MAX_BENCH_SECONDS = 300.0
+RATE_LIMIT_DEFAULT_BENCH_SECONDS = 20.0
+# 한도가 소진된 키는 대기(MAX_BENCH_SECONDS)로 풀리지 않도록 더 오래 제외합니다.
+QUOTA_EXHAUSTED_BENCH_SECONDS = 3600.0
+# 재시도로 해결되지 않는 요금제/크레딧 한도 소진 오류의 표시
+QUOTA_EXHAUSTED_MARKERS = ("insufficient_quota", "exceeded your current quota")
+
+
+def get_rate_limits(provider: str) -> RateLimits:
+    """제공사의 키별 한도를 환경 변수 또는 기본값에서 가져옵니다."""
+    default = DEFAULT_RATE_LIMITS.get(provider, RateLimits(60, 100000))
+    prefix = provider.upper()
+    try:
+        rpm = int(os.getenv(f"{prefix}_RPM_LIMIT", default.requests_per_minute))
+        tpm = int(os.getenv(f"{prefix}_TPM_LIMIT", default.tokens_per_minute))
+    except ValueError:
+        return default
+    return RateLimits(requests_per_minute=rpm, tokens_per_minute=tpm)
+
+
+def estimate_tokens(prompt: Any, completion_allowance: int = 512) -> int:
+    """
+    프롬프트의 토큰 수를 대략 추정합니다 (한국어 기준 약 2자당 1토큰 + 응답 여유분).
+    멀티모달 콘텐츠의 이미지는 1000토큰으로 계산합니다.
+    """
+    if isinstance(prompt, str):
+        text_length, images = len(prompt), 0
+    elif isinstance(prompt, list):
+        text_length, images = 0, 0
+        for part in prompt:
+            if isinstance(part, dict):
+                if part.get("type") == "text":
+                    text_length += len(part.get("text", ""))
+                else:
+                    images += 1
+            else:
+                text_length += len(str(getattr(part, "content", part)))
+    else:
+        text_length, images = len(str(prompt)), 0
+    return text_length // 2 + images * 1000 + completion_allowance
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """'7.5', '7.66s', '2m59.56s', '120ms' 형식의 기간 문자열을 초로 변환합니다."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = re.fullmatch(r'(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?', value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds, millis = (float(g) if g else 0.0 for g in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    예외에서 재시도 대기 시간(초)을 추출합니다.
+    HTTP 헤더(retry-after, x-ratelimit-reset-*)와 오류 메시지("try again in 7.5s", retryDelay)를 확인합니다.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+            value = headers.get(header)
+            if value:
+                seconds = _parse_duration(str(value))
+                if seconds is not None:
+                    return seconds
+
+    message = str(error)
+    patterns = [
+        r'try again in\s+([0-9hms.]+)',
+        r'retry[_ ]?after[":\s]+([0-9hms.]+)',
+        r'retryDelay["\']?\s*[:=]\s*["\']?([0-9hms.]+)',
+        r'retry_delay\s*\{\s*seconds:\s*(\d+)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            seconds = _parse_duration(match.group(1).rstrip('.'))
+            if seconds is not None:
+                return seconds
+    return None
+
+
+def is_quota_exhausted_error(error: Exception) -> bool:
+    """
+    예외가 요금제/크레딧 한도 소진 오류인지 판단합니다.
+    OpenAI는 이 오류도 429로 응답하지만, 결제 전에는 기다려도 풀리지 않으므로 한도 초과와 구분합니다.
+    """
+    if getattr(error, "code", None) == "insufficient_quota":
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in QUOTA_EXHAUSTED_MARKERS)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """예외가 기다리면 풀리는 한도 초과(429) 오류인지 판단합니다 (요금제 한도 소진은 제외)."""
+    if is_quota_exhausted_error(error):
+        return False
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "rate limit", "rate_limit", "too many requests",
+                                                "resource_exhausted"))
+
+
+# 연결/시간 초과 예외 클래스 이름 (httpx, openai/groq SDK, google-api-core)
+TRANSPORT_ERROR_NAMES = ("TransportError", "TimeoutException", "APIConnectionError", "APITimeoutError",
+                         "ServiceUnavailable", "DeadlineExceeded", "InternalServerError")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """예외가 요청 내용과 무관한 일시적 오류(연결 끊김, 시간 초과, 5xx)인지 판단합니다."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if any(cls.__name__ in TRANSPORT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+@dataclass
+class KeyState:
+    """키 하나의 사용량과 상태."""
+    key_id: str
+    api_key: str
+    request_times: Deque[float] = field(default_factory=deque)
+    token_usage: Deque[Tuple[float, int]] = field(default_factory=deque)
+    benched_until: float = 0.0
+    consecutive_failures: int = 0
+    total_requests: int = 0
+    total_failures: int = 0
+    rate_limited_count: int = 0
+    quota_exhausted: bool = False
+    last_used: float = 0.0
+
+    def prune(self, now: float):
+        """윈도우를 벗어난 기록을 제거합니다."""
+        while self.request_times and now - self.request_times[0] >= WINDOW_SECONDS:
+            self.request_times.popleft()
+        while self.token_usage and now - self.token_usage[0][0] >= WINDOW_SECONDS:
+            self.token_usage.popleft()
+
+    def tokens_in_window(self) -> int:
+        return sum(tokens for _, tokens in self.token_usage)
+
+
+class KeyWaitTimeoutError(RuntimeError):
+    """대기 시간(max_wait) 안에 한도 여유가 있는 키를 확보하지 못했을 때 발생합니다."""
+
+
+class KeyScheduler:
+    """제공사 하나의 API 키들에 대해 호출을 분배하는 스케줄러."""
+
+    def __init__(self, provider: str, api_keys: List[str], limits: Optional[RateLimits] = None,
+                 failure_threshold: int = 3):
+        """
+        Args:
+            provider: LLM 제공사 이름
+            api_keys: 사용할 API 키 목록
+            limits: 키별 분당 한도 (기본값: get_rate_limits(provider))
+            failure_threshold: 이 횟수만큼 연속 실패한 키는 더 길게 제외됩니다
+        """
+        self.provider = provider
+        self.limits = limits or get_rate_limits(provider)
+        self.failure_threshold = failure_threshold
+        self._lock = threading.Lock()
+        self._states: Dict[str, KeyState] = {
+            f"{provider}#{i + 1}": KeyState(key_id=f"{provider}#{i + 1}", api_key=key)
+            for i, key in enumerate(api_keys)
+        }
+
+    def get_api_key(self, key_id: str) -> Optional[str]:
+        state = self._states.get(key_id)
+        return state.api_key if state else None
+
+    def _headroom(self, state: KeyState, estimated_tokens: int) -> Optional[float]:
+        """남은 한도 비율(0~1)을 반환합니다. 이번 요청을 감당할 수 없으면 None."""
+        requests_left = self.limits.requests_per_minute - len(state.request_times)
+        tokens_left = self.limits.tokens_per_minute - state.tokens_in_window()
+        if requests_left < 1:
+            return None
+        # 단일 요청이 TPM 전체보다 크면 윈도우가 비었을 때만 허용합니다.
+        if tokens_left < min(estimated_tokens, self.limits.tokens_per_minute):
+            return None
+        return min(requests_left / self.limits.requests_per_minute,
+                   tokens_left / self.limits.tokens_per_minute)
+
+    def _time_until_available(self, state: KeyState, estimated_tokens: int, now: float) -> float:
+        """키가 이번 요청을 감당할 수 있게 될 때까지의 시간(초)."""
+        wait = max(0.0, state.benched_until - now)
+        if len(state.request_times) >= self.limits.requests_per_minute:
+            wait = max(wait, WINDOW_SECONDS - (now - state.request_times[0]))
+        needed = min(estimated_tokens, self.limits.tokens_per_minute)
+        tokens_used = state.tokens_in_window()
+        if self.limits.tokens_per_minute - tokens_used < needed:
+            for timestamp, tokens in state.token_usage:
+                tokens_used -= tokens
+                if self.limits.tokens_per_minute - tokens_used >= needed:
+                    wait = max(wait, WINDOW_SECONDS - (now - timestamp))
+                    break
+        return wait
+
+    def select_key(self) -> Optional[str]:
+        """예약 없이 현재 여유가 가장 큰 키를 반환합니다 (제외된 키뿐이면 가장 먼저 풀리는 키)."""
+        if not self._states:
+            return None
+        with self._lock:
+            now = time.time()
+            best_id, best_score = None, None
+            for state in self._states.values():
+                state.prune(now)
+                headroom = self._headroom(state, 0) if state.benched_until <= now else None
+                score = (headroom if headroom is not None else -1.0, -state.benched_until, -state.last_used)
+                if best_score is None or score > best_score:
+                    best_id, best_score = state.key_id, score
+            return best_id
+
+    def acquire(self, estimated_tokens: int) -> Tuple[Optional[str], float]:
+        """
+        여유 한도가 가장 큰 키를 골라 이번 요청만큼 예약합니다.
+
+        Returns:
+            tuple: (key_id, 0.0) 또는 사용 가능한 키가 없으면 (None, 대기 시간)
+        """
+        with self._lock:
+            now = time.time()
+            best_state, best_score = None, None
+            for state in self._states.values():
+                state.prune(now)
+                if state.benched_until > now:
+                    continue
+                headroom = self._headroom(state, estimated_tokens)
+                if headroom is None:
+                    continue
+                score = (headroom, -state.last_used)
+                if best_score is None or score > best_score:
+                    best_state, best_score = state, score
+
+            if best_state is None:
+                if not self._states:
+                    return None, 0.0
+                wait = min(self._time_until_available(s, estimated_tokens, now) for s in self._states.values())
+                return None, max(wait, 0.05)
+
+            best_state.request_times.append(now)
+            best_state.token_usage.append((now, estimated_tokens))
+            best_state.total_requests += 1
+            best_state.last_used = now
+            return best_state.key_id, 0.0
+
+    def _wait_timeout_error(self, max_wait: float) -> KeyWaitTimeoutError:
+        return KeyWaitTimeoutError(
+            f"{self.provider} API 키의 요청/토큰 한도가 모두 소진되어 {max_wait:.0f}초 안에 호출할 수 없습니다."
+        )
+
+    def wait_for_key(self, estimated_tokens: int, max_wait: float = MAX_BENCH_SECONDS) -> Optional[str]:
+        """
+        사용 가능한 키가 생길 때까지 (time.sleep으로) 기다린 뒤 예약합니다.
+
+        Returns:
+            str: 예약한 키 ID. 등록된 키가 없으면 None
+
+        Raises:
+            KeyWaitTimeoutError: max_wait 안에 한도 여유가 있는 키가 생기지 않을 때
+        """
+        deadline = time.time() + max_wait
+        while True:
+            key_id, wait = self.acquire(estimated_tokens)
+            if key_id is not None or not self._states:
+                return key_id
+            if time.time() + wait > deadline:
+                raise self._wait_timeout_error(max_wait)
+            time.sleep(wait)
+
+    async def await_key(self, estimated_tokens: int, max_wait: float = MAX_BENCH_SECONDS) -> Optional[str]:
+        """wait_for_key의 비동기 버전 (asyncio.sleep으로 대기)."""
+        deadline = time.time() + max_wait
+        while True:
+            key_id, wait = self.acquire(estimated_tokens)
+            if key_id is not None or not self._states:
+                return key_id
+            if time.time() + wait > deadline:
+                raise self._wait_timeout_error(max_wait)
+            await asyncio.sleep(wait)
+
+    def report_success(self, key_id: str, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        """성공한 호출을 기록하고, 실제 토큰 사용량으로 예약분을 보정합니다."""
+        with self._lock:
+            state = self._states.get(key_id)
+            if state is None:
+                return
+            state.consecutive_failures = 0
+            state.quota_exhausted = False
+            if actual_tokens is not None and actual_tokens != estimated_tokens:
+                # 예약분과의 차이를 보정 항목으로 기록합니다 (음수 가능).
+                state.token_usage.append((time.time(), actual_tokens - estimated_tokens))
+
+    def report_failure(self, key_id: str, error: Exception) -> float:
+        """
+        실패한 호출을 기록하고 키를 일정 시간 제외합니다.
+        한도 초과 오류는 retry-after 힌트만큼, 그 외 오류는 연속 실패 횟수에 따라 지수적으로 제외합니다.
+        요금제 한도가 소진된 키는 사용 불가로 표시하고 QUOTA_EXHAUSTED_BENCH_SECONDS 동안 제외합니다.
+
+        Returns:
+            float: 키가 제외되는 시간(초)
+        """
+        with self._lock:
+            state = self._states.get(key_id)
+            if state is None:
+                return 0.0
+            now = time.time()
+            state.total_failures += 1
+            state.consecutive_failures += 1
+
+            if is_quota_exhausted_error(error):
+                state.quota_exhausted = True
+                state.benched_until = max(state.benched_until, now + QUOTA_EXHAUSTED_BENCH_SECONDS)
+                return QUOTA_EXHAUSTED_BENCH_SECONDS
+            if is_rate_limit_error(error):
+                state.rate_limited_count += 1
+                bench = parse_retry_after(error) or RATE_LIMIT_DEFAULT_BENCH_SECONDS
+            else:
+                bench = FAILURE_BENCH_BASE_SECONDS * (2 ** (state.consecutive_failures - 1))
+                if state.consecutive_failures >= self.failure_threshold:
+                    # 반복 실패하는 키는 다른 키가 처리하도록 더 길게 제외합니다.
+                    bench = max(bench, 30.0)
+            bench = min(bench, MAX_BENCH_SECONDS)
+            state.benched_until = max(state.benched_until, now + bench)
+            return bench
+
+    def has_usable_key(self) -> bool:
+        """요금제 한도가 소진되지 않은 키가 하나라도 있는지 확인합니다."""
+        with self._lock:
+            return any(not state.quota_exhausted for state in self._states.values())
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """모니터링용 키별 상태를 반환합니다 (API 키 값은 포함하지 않음)."""
+        with self._lock:
+            now = time.time()
+            status = []
+            for state in self._states.values():
+                state.prune(now)
+                status.append({
+                    "key_id": state.key_id,
+                    "requests_in_window": len(state.request_times),
+                    "tokens_in_window": state.tokens_in_window(),
+                    "benched_for": max(0.0, state.benched_until - now),
+                    "consecutive_failures": state.consecutive_failures,
+                    "total_requests": state.total_requests,
+                    "total_failures": state.total_failures,
+                    "rate_limited_count": state.rate_limited_count,
+                    "quota_exhausted": state.quota_exhausted,
+                })
+            return status
@@ -4,22 +4,59 @@ from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 import streamlit as st
-import itertools
+import asyncio
+import threading
 import time
+import httpx
 from langchain_core.messages import HumanMessage
+from models.key_scheduler import (
+    KeyScheduler, KeyWaitTimeoutError, estimate_tokens, is_quota_exhausted_error, is_rate_limit_error,
+    is_transient_error
+)
 
 load_dotenv()
 print(f"DEBUG: GEMINI_API_KEY after load_dotenv(): {os.getenv('GEMINI_API_KEY')[:5] + '...' if os.getenv('GEMINI_API_KEY') else 'None'}") # Debug print
 
+# 제공사별 네이티브 구조화 출력 방식 (with_structured_output 인자)
+# - OpenAI: JSON 스키마 response_format. 점수_판단_근거가 자유 형식 객체라 strict 모드는 쓰지 않습니다.
+# - Google: response_mime_type="application/json"과 response_schema
+# - GROQ: JSON 모드(json_object). 스키마 검증은 응답을 받은 뒤 Pydantic 모델로 합니다.
+STRUCTURED_OUTPUT_OPTIONS = {
+    "OpenAI": {"method": "json_schema", "strict": False},
+    "Google": {"method": "json_mode"},
+    "GROQ": {"method": "json_mode"},
+}
+# 한도 초과가 아닌 오류로 연속해서 거절되면 해당 모델에는 구조화 출력을 더 요청하지 않습니다.
+STRUCTURED_OUTPUT_MAX_REJECTIONS = 3
+
 class LLMManager:
     def __init__(self):
         self.openai_api_keys = self._get_api_keys("OPENAI_API_KEY")
         self.google_api_keys = self._get_api_keys("GEMINI_API_KEY")
         self.groq_api_keys = self._get_api_keys("GROQ_API_KEY")
 
-        self.openai_key_iterator = itertools.cycle(self.openai_api_keys) if self.openai_api_keys else None
-        self.google_key_iterator = itertools.cycle(self.google_api_keys) if self.google_api_keys else None
-        self.groq_key_iterator = itertools.cycle(self.groq_api_keys) if self.groq_api_keys else None
+        # 키별 RPM/TPM 한도와 상태를 추적하여 여유가 가장 큰 키로 호출을 보냅니다.
+        self.key_schedulers = {
+            "OpenAI": KeyScheduler("OpenAI", self.openai_api_keys),
+            "Google": KeyScheduler("Google", self.google_api_keys),
+            "GROQ": KeyScheduler("GROQ", self.groq_api_keys),
+        }
+
+        # 비동기 호출용 이벤트 루프(백그라운드 스레드)와 제공사/키별 공유 HTTP 연결 풀
+        self._event_loop = None
+        self._event_loop_lock = threading.Lock()
+        self._async_http_clients = {}
+
+        # (provider, model, key_id)별로 생성된 LLM 클라이언트를 재사용하여
+        # 학생마다/Streamlit 재실행마다 클라이언트와 HTTP 연결을 새로 만들지 않도록 합니다.
+        self._llm_clients = {}
+        self._llm_clients_lock = threading.Lock()
+
+        # 구조화 출력을 바인딩한 클라이언트 (provider, model, key_id, schema)와 제공사별 결과 통계
+        self._structured_llms = {}
+        self._structured_stats = {}
+        self._structured_rejections = {}
+        self._structured_lock = threading.Lock()
 
     def _get_api_keys(self, env_var_prefix):
         keys = []
@@ -36,53 +73,401 @@ class LLMManager:
                 keys.append(key)
         return keys
 
+    def _select_api_key(self, provider: str):
+        """
+        제공사의 키 중 현재 여유 한도가 가장 큰 키를 반환합니다.
+
+        Returns:
+            tuple: (key_id, api_key). 키가 없으면 (None, None)
+        """
+        scheduler = self.key_schedulers.get(provider)
+        if scheduler is None:
+            print(f"지원하지 않는 LLM 제공사: {provider}")
+            return None, None
+        key_id = scheduler.select_key()
+        if key_id is None:
+            print(f"{provider} API 키가 설정되지 않았습니다.")
+            return None, None
+        return key_id, scheduler.get_api_key(key_id)
+
+    def _create_llm(self, provider: str, model_name: str, api_key: str, key_id: str = None,
+                    http_async_client=None):
+        """주어진 API 키로 LLM 클라이언트를 생성합니다."""
+        # 재시도 시 키 스케줄러가 키를 교체할 수 있도록 제공사/모델/키 ID를 메타데이터로 남깁니다 (키 값 제외).
+        metadata = {"llm_provider": provider, "llm_model": model_name, "llm_key_id": key_id}
+        if provider == "OpenAI":
+            return ChatOpenAI(model_name=model_name, api_key=api_key, temperature=0,
+                              http_async_client=http_async_client, metadata=metadata)
+        elif provider == "Google":
+            # ChatGoogleGenerativeAI는 자체 gRPC 전송 계층을 사용하므로 HTTP 클라이언트를 주입할 수 없습니다.
+            return ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key, temperature=0,
+                                          metadata=metadata)
+        elif provider == "GROQ":
+            return ChatGroq(model_name=model_name, groq_api_key=api_key, temperature=0,
+                            http_async_client=http_async_client, metadata=metadata)
+        return None
+
+    def _get_cached_llm(self, provider: str, model_name: str, key_id: str):
+        """
+        (provider, model, key_id)에 해당하는 LLM 클라이언트를 캐시에서 반환하고, 없으면 생성합니다.
+        OpenAI/GROQ 클라이언트에는 키별 공유 비동기 연결 풀을 주입하므로 같은 객체를
+        동기(invoke)와 비동기(ainvoke) 호출 모두에 사용할 수 있습니다.
+        """
+        cache_key = (provider, model_name, key_id)
+        with self._llm_clients_lock:
+            llm = self._llm_clients.get(cache_key)
+            if llm is None:
+                api_key = self.key_schedulers[provider].get_api_key(key_id)
+                http_async_client = None
+                if provider in ("OpenAI", "GROQ"):
+                    http_async_client = self._get_async_http_client(provider, api_key)
+                llm = self._create_llm(provider, model_name, api_key, key_id, http_async_client=http_async_client)
+                if llm is not None:
+                    self._llm_clients[cache_key] = llm
+            return llm
+
     def get_llm(self, provider: str, model_name: str):
-        llm = None
         api_key = None
         try:
-            if provider == "OpenAI":
-                if not self.openai_api_keys:
-                    print("OpenAI API 키가 설정되지 않았습니다.")
-                    return None
-                api_key = next(self.openai_key_iterator)
-                llm = ChatOpenAI(model_name=model_name, api_key=api_key, temperature=0)
-            elif provider == "Google":
-                if not self.google_api_keys:
-                    print("Google API 키가 설정되지 않았습니다.")
-                    return None
-                api_key = next(self.google_key_iterator)
-                llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key, temperature=0)
-            elif provider == "GROQ":
-                if not self.groq_api_keys:
-                    print("GROQ API 키가 설정되지 않았습니다.")
-                    return None
-                api_key = next(self.groq_key_iterator)
-                llm = ChatGroq(model_name=model_name, groq_api_key=api_key, temperature=0)
-            else:
-                print(f"지원하지 않는 LLM 제공사: {provider}")
+            key_id, api_key = self._select_api_key(provider)
+            if api_key is None:
                 return None
-            return llm
+            return self._get_cached_llm(provider, model_name, key_id)
         except Exception as e:
-            print(f"{provider} LLM 초기화 중 오류 발생 (API 키: {api_key[:5]}...): {e}")
+            print(f"{provider} LLM 초기화 중 오류 발생 (API 키: {api_key[:5] if api_key else None}...): {e}")
             return None
 
+    def get_key_status(self):
+        """모니터링용 제공사별 키 상태(윈도우 내 사용량, 제외 시간, 실패 횟수)를 반환합니다."""
+        return {provider: scheduler.get_status() for provider, scheduler in self.key_schedulers.items()}
+
+    def _get_llm_info(self, llm):
+        """LLM 클라이언트의 (제공사, 모델, 키 ID)를 반환합니다. 이 매니저가 만들지 않은 객체면 None."""
+        metadata = getattr(llm, "metadata", None)
+        if isinstance(metadata, dict) and metadata.get("llm_key_id"):
+            return metadata["llm_provider"], metadata["llm_model"], metadata["llm_key_id"]
+        return None
+
+    def _get_total_tokens(self, response):
+        """응답의 실제 토큰 사용량을 반환합니다 (제공사가 알려주지 않으면 None)."""
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+            return usage["total_tokens"]
+        return None
+
+    def _lease_llm(self, llm, estimated_tokens: int):
+        """
+        여유 한도가 가장 큰 키를 예약하고(필요하면 대기), 그 키로 된 LLM 클라이언트를 반환합니다.
+
+        Returns:
+            tuple: (scheduler, key_id, llm). 스케줄러를 쓸 수 없으면 (None, None, 원래 llm)
+
+        Raises:
+            KeyWaitTimeoutError: 모든 키의 한도가 소진되어 대기 시간 안에 예약하지 못했을 때.
+                예약 없이 원래 클라이언트로 보내면 RPM/TPM 한도를 넘기므로 호출하지 않습니다.
+        """
+        info = self._get_llm_info(llm)
+        if info is None:
+            return None, None, llm
+        provider, model_name, current_key_id = info
+        scheduler = self.key_schedulers.get(provider)
+        key_id = scheduler.wait_for_key(estimated_tokens) if scheduler else None
+        if key_id is None:
+            return None, None, llm
+        if key_id != current_key_id:
+            llm = self._get_cached_llm(provider, model_name, key_id)
+        return scheduler, key_id, llm
+
+    def _quota_exhausted_everywhere(self, scheduler, error) -> bool:
+        """요금제 한도 소진 오류이고 한도가 남은 다른 키도 없어 재시도해도 소용없는지 확인합니다."""
+        return is_quota_exhausted_error(error) and not (scheduler and scheduler.has_usable_key())
+
+    def _to_messages(self, prompt):
+        # 'prompt'는 문자열(텍스트 모델용)이거나 딕셔너리 목록(멀티모달용)일 수 있습니다.
+        # llm.invoke는 메시지 목록을 예상합니다.
+        # 따라서 문자열이면 래핑하고, 딕셔너리 목록이면 HumanMessage로 래핑합니다.
+        if isinstance(prompt, list) and all(isinstance(p, dict) for p in prompt): # 멀티모달 콘텐츠 목록
+            return [HumanMessage(content=prompt)]
+        elif isinstance(prompt, str): # 텍스트 콘텐츠 문자열
+            return [HumanMessage(content=prompt)]
+        # 이미 메시지 목록이라고 가정 (예: 채팅 기록에서)
+        return prompt
+
     def call_llm_with_retry(self, llm, prompt, max_retries=5, delay=1):
+        messages = self._to_messages(prompt)
+        estimated_tokens = estimate_tokens(prompt)
         for i in range(max_retries):
+            scheduler, key_id = None, None
             try:
-                # 'prompt'는 문자열(텍스트 모델용)이거나 딕셔너리 목록(멀티모달용)일 수 있습니다.
-                # llm.invoke는 메시지 목록을 예상합니다.
-                # 따라서 문자열이면 래핑하고, 딕셔너리 목록이면 HumanMessage로 래핑합니다.
-                if isinstance(prompt, list) and all(isinstance(p, dict) for p in prompt): # 멀티모달 콘텐츠 목록
-                    messages = [HumanMessage(content=prompt)]
-                elif isinstance(prompt, str): # 텍스트 콘텐츠 문자열
-                    messages = [HumanMessage(content=prompt)]
-                else: # 이미 메시지 목록이라고 가정 (예: 채팅 기록에서)
-                    messages = prompt
-
+                scheduler, key_id, llm = self._lease_llm(llm, estimated_tokens)
                 response = llm.invoke(input=messages)
+                if scheduler:
+                    scheduler.report_success(key_id, estimated_tokens, self._get_total_tokens(response))
                 return response.content
+            except KeyWaitTimeoutError:
+                # 이미 대기 시간만큼 기다렸으므로 재시도하지 않고 호출자에게 알립니다.
+                raise
             except Exception as e:
                 print(f"LLM 호출 실패 (재시도 {i+1}/{max_retries}): {e}")
-                time.sleep(delay * (2 ** i)) # Exponential backoff
+                if scheduler:
+                    # 실패한 키는 retry-after 힌트 또는 연속 실패 횟수만큼 제외되고,
+                    # 다음 시도에서는 여유 있는 다른 키가 선택됩니다 (없으면 풀릴 때까지 대기).
+                    scheduler.report_failure(key_id, e)
+                if self._quota_exhausted_everywhere(scheduler, e):
+                    print("사용할 수 있는 API 키의 요금제 한도가 모두 소진되어 재시도하지 않습니다.")
+                    return None
+                if not scheduler:
+                    time.sleep(delay * (2 ** i)) # Exponential backoff
         print(f"LLM 호출 {max_retries}회 실패. 작업을 중단합니다.")
         return None
+
+    # ------------------------------------------------------------------
+    # 구조화 출력
+    # ------------------------------------------------------------------
+
+    def supports_structured_output(self, llm) -> bool:
+        """이 매니저가 만든 클라이언트이고, 제공사/모델이 구조화 출력을 거절한 적이 없는지 확인합니다."""
+        info = self._get_llm_info(llm)
+        if info is None or info[0] not in STRUCTURED_OUTPUT_OPTIONS:
+            return False
+        with self._structured_lock:
+            return self._structured_rejections.get(info[:2], 0) < STRUCTURED_OUTPUT_MAX_REJECTIONS
+
+    def _get_structured_llm(self, llm, schema):
+        """LLM 클라이언트에 제공사의 구조화 출력을 바인딩한 Runnable을 반환합니다 (키/스키마별로 재사용)."""
+        provider, model_name, key_id = self._get_llm_info(llm)
+        cache_key = (provider, model_name, key_id, schema)
+        with self._structured_lock:
+            structured_llm = self._structured_llms.get(cache_key)
+            if structured_llm is None:
+                structured_llm = llm.with_structured_output(
+                    schema, include_raw=True, **STRUCTURED_OUTPUT_OPTIONS[provider]
+                )
+                self._structured_llms[cache_key] = structured_llm
+            return structured_llm
+
+    def _record_structured_result(self, llm, outcome: str):
+        """구조화 출력 결과를 제공사별로 기록합니다 (native: 스키마 통과, invalid: 형식 오류, rejected: 요청 거절)."""
+        provider, model_name, _ = self._get_llm_info(llm)
+        with self._structured_lock:
+            counts = self._structured_stats.setdefault(provider, {"native": 0, "invalid": 0, "rejected": 0})
+            counts[outcome] += 1
+            if outcome == "rejected":
+                self._structured_rejections[(provider, model_name)] = \
+                    self._structured_rejections.get((provider, model_name), 0) + 1
+            else:
+                self._structured_rejections[(provider, model_name)] = 0
+
+    def _finish_structured_call(self, llm, output):
+        """
+        with_structured_output(include_raw=True)의 결과를 (검증된 객체, 원본 텍스트)로 정리합니다.
+        스키마 검증에 실패하면 원본 텍스트만 돌려주어 호출자가 기존 파서로 복구할 수 있게 합니다.
+        """
+        raw = output.get("raw")
+        raw_text = getattr(raw, "content", None)
+        if not isinstance(raw_text, str):
+            raw_text = None
+        parsed = output.get("parsed")
+        if parsed is not None and output.get("parsing_error") is None:
+            self._record_structured_result(llm, "native")
+            return parsed, raw_text
+        self._record_structured_result(llm, "invalid")
+        return None, raw_text
+
+    def _handle_structured_failure(self, llm, scheduler, key_id, error) -> bool:
+        """
+        구조화 출력 호출 실패를 처리합니다.
+
+        Returns:
+            bool: 다른 키로 재시도할지 여부 (한도 초과, 일시적 오류, 다른 키가 남은 요금제 한도 소진).
+                False면 구조화 출력을 거절한 것이므로 일반 호출로 넘어갑니다.
+
+        Raises:
+            Exception: 모든 키의 요금제 한도가 소진된 경우 원래 오류 (일반 호출로도 해결되지 않음)
+        """
+        if is_quota_exhausted_error(error):
+            # 요금제 한도 소진은 구조화 출력 지원 여부와 무관하므로 거절로 세지 않고, 사용 가능한 다른 키로만 재시도합니다.
+            if scheduler:
+                scheduler.report_failure(key_id, error)
+            if self._quota_exhausted_everywhere(scheduler, error):
+                raise error
+            return True
+        if not (is_rate_limit_error(error) or is_transient_error(error)):
+            # 스키마를 지원하지 않는 모델 등: 일반 호출로 넘어가고, 반복되면 이 모델에서는 더 시도하지 않습니다.
+            self._record_structured_result(llm, "rejected")
+            return False
+        if scheduler:
+            scheduler.report_failure(key_id, error)
+        return True
+
+    def call_llm_structured_with_retry(self, llm, prompt, schema, max_retries=5, delay=1):
+        """
+        제공사의 네이티브 구조화 출력(JSON 스키마, JSON 모드, Gemini response_schema)으로 호출합니다.
+
+        Args:
+            llm: get_llm으로 얻은 LLM 클라이언트
+            prompt: 프롬프트 문자열 또는 메시지 목록
+            schema: 응답을 검증할 Pydantic 모델 (예: DynamicModelFactory의 채점 출력 모델)
+
+        Returns:
+            tuple: (스키마로 검증된 객체 또는 None, 원본 응답 텍스트 또는 None).
+                둘 다 None이면 구조화 출력을 쓸 수 없으므로 call_llm_with_retry로 다시 호출해야 합니다.
+
+        Raises:
+            Exception: 한도 초과나 연결 오류로 max_retries회 모두 실패했거나 모든 키의 요금제 한도가 소진된 경우
+                마지막 오류. 일반 호출로 넘어가도 같은 오류로 재시도 횟수만 두 배가 되므로 호출자에게 알립니다.
+        """
+        if not self.supports_structured_output(llm):
+            return None, None
+        messages = self._to_messages(prompt)
+        estimated_tokens = estimate_tokens(prompt)
+        last_error = None
+        for i in range(max_retries):
+            scheduler, key_id = None, None
+            try:
+                scheduler, key_id, llm = self._lease_llm(llm, estimated_tokens)
+                output = self._get_structured_llm(llm, schema).invoke(input=messages)
+                if scheduler:
+                    scheduler.report_success(key_id, estimated_tokens, self._get_total_tokens(output.get("raw")))
+                return self._finish_structured_call(llm, output)
+            except KeyWaitTimeoutError:
+                raise
+            except Exception as e:
+                print(f"구조화 출력 호출 실패 (재시도 {i+1}/{max_retries}): {e}")
+                if not self._handle_structured_failure(llm, scheduler, key_id, e):
+                    return None, None
+                last_error = e
+                if not scheduler:
+                    time.sleep(delay * (2 ** i)) # Exponential backoff
+        print(f"구조화 출력 호출 {max_retries}회 실패. 작업을 중단합니다.")
+        if last_error is not None:
+            raise last_error
+        return None, None
+
+    def get_structured_output_stats(self):
+        """모니터링용 제공사별 구조화 출력 결과 횟수와 성공률(스키마 통과 비율)을 반환합니다."""
+        with self._structured_lock:
+            stats = {}
+            for provider, counts in self._structured_stats.items():
+                total = sum(counts.values())
+                stats[provider] = {**counts, "total": total,
+                                   "success_rate": counts["native"] / total if total else 0.0}
+            return stats
+
+    # ------------------------------------------------------------------
+    # 비동기 API
+    # ------------------------------------------------------------------
+
+    def _get_event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        비동기 LLM 호출을 위한 백그라운드 이벤트 루프를 반환합니다 (최초 호출 시 시작).
+        연결 풀은 이벤트 루프에 묶이므로, 모든 비동기 호출을 하나의 장수 루프에서 실행해
+        Streamlit 재실행 사이에도 연결을 재사용합니다.
+        """
+        with self._event_loop_lock:
+            if self._event_loop is None or self._event_loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True)
+                thread.start()
+                self._event_loop = loop
+            return self._event_loop
+
+    def run_async(self, coro):
+        """
+        코루틴을 백그라운드 이벤트 루프에서 실행하고 concurrent.futures.Future를 반환합니다.
+        동기 코드(예: Streamlit 스크립트 스레드)에서 결과를 기다리거나 완료 순서대로 처리할 수 있습니다.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._get_event_loop())
+
+    def _get_async_http_client(self, provider: str, api_key: str) -> httpx.AsyncClient:
+        """제공사/API 키별로 공유되는 비동기 HTTP 클라이언트(연결 풀)를 반환합니다."""
+        cache_key = (provider, api_key)
+        client = self._async_http_clients.get(cache_key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+            self._async_http_clients[cache_key] = client
+        return client
+
+    async def aget_llm(self, provider: str, model_name: str):
+        """get_llm의 비동기 버전. 제공사/키별 공유 연결 풀을 사용하는 클라이언트를 반환합니다."""
+        api_key = None
+        try:
+            key_id, api_key = self._select_api_key(provider)
+            if api_key is None:
+                return None
+            return self._get_cached_llm(provider, model_name, key_id)
+        except Exception as e:
+            print(f"{provider} LLM 초기화 중 오류 발생 (API 키: {api_key[:5] if api_key else None}...): {e}")
+            return None
+
+    async def _alease_llm(self, llm, estimated_tokens: int):
+        """_lease_llm의 비동기 버전 (asyncio.sleep으로 대기)."""
+        info = self._get_llm_info(llm)
+        if info is None:
+            return None, None, llm
+        provider, model_name, current_key_id = info
+        scheduler = self.key_schedulers.get(provider)
+        key_id = await scheduler.await_key(estimated_tokens) if scheduler else None
+        if key_id is None:
+            return None, None, llm
+        if key_id != current_key_id:
+            llm = self._get_cached_llm(provider, model_name, key_id)
+        return scheduler, key_id, llm
+
+    async def acall_llm_with_retry(self, llm, prompt, max_retries=5, delay=1):
+        """call_llm_with_retry의 비동기 버전. ainvoke와 asyncio.sleep을 사용해 대기 중 스레드를 점유하지 않습니다."""
+        messages = self._to_messages(prompt)
+        estimated_tokens = estimate_tokens(prompt)
+        for i in range(max_retries):
+            scheduler, key_id = None, None
+            try:
+                scheduler, key_id, llm = await self._alease_llm(llm, estimated_tokens)
+                response = await llm.ainvoke(input=messages)
+                if scheduler:
+                    scheduler.report_success(key_id, estimated_tokens, self._get_total_tokens(response))
+                return response.content
+            except KeyWaitTimeoutError:
+                raise
+            except Exception as e:
+                print(f"LLM 비동기 호출 실패 (재시도 {i+1}/{max_retries}): {e}")
+                if scheduler:
+                    scheduler.report_failure(key_id, e)
+                if self._quota_exhausted_everywhere(scheduler, e):
+                    print("사용할 수 있는 API 키의 요금제 한도가 모두 소진되어 재시도하지 않습니다.")
+                    return None
+                if not scheduler:
+                    await asyncio.sleep(delay * (2 ** i)) # Exponential backoff
+        print(f"LLM 호출 {max_retries}회 실패. 작업을 중단합니다.")
+        return None
+
+    async def acall_llm_structured_with_retry(self, llm, prompt, schema, max_retries=5, delay=1):
+        """call_llm_structured_with_retry의 비동기 버전."""
+        if not self.supports_structured_output(llm):
+            return None, None
+        messages = self._to_messages(prompt)
+        estimated_tokens = estimate_tokens(prompt)
+        last_error = None
+        for i in range(max_retries):
+            scheduler, key_id = None, None
+            try:
+                scheduler, key_id, llm = await self._alease_llm(llm, estimated_tokens)
+                output = await self._get_structured_llm(llm, schema).ainvoke(input=messages)
+                if scheduler:
+                    scheduler.report_success(key_id, estimated_tokens, self._get_total_tokens(output.get("raw")))
+                return self._finish_structured_call(llm, output)
+            except KeyWaitTimeoutError:
+                raise
+            except Exception as e:
+                print(f"구조화 출력 비동기 호출 실패 (재시도 {i+1}/{max_retries}): {e}")
+                if not self._handle_structured_failure(llm, scheduler, key_id, e):
+                    return None, None
+                last_error = e
+                if not scheduler:
+                    await asyncio.sleep(delay * (2 ** i)) # Exponential backoff
+        print(f"구조화 출력 호출 {max_retries}회 실패. 작업을 중단합니다.")
+        if last_error is not None:
+            raise last_error
+        return None, None
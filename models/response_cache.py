@@ -0,0 +1,152 @@
+"""
+LLM 응답 영구 캐시.
+
+(제공사, 모델, 렌더링된 프롬프트)의 해시를 키로 LLM 응답을 SQLite에 저장합니다.
+같은 반을 다시 채점하거나 같은 답안(빈 답안, "모르겠습니다", 복사한 답안 등)이
+반복될 때 LLM 호출 없이 이전 응답을 재사용합니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import streamlit as st
+
+DEFAULT_CACHE_PATH = "./cache/llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30일
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class LLMResponseCache:
+    """TTL과 LRU 방식으로 만료/정리되는 SQLite 기반 LLM 응답 캐시."""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            db_path: SQLite 파일 경로 (":memory:"는 지원하지 않음)
+            ttl_seconds: 항목 유효 기간(초). None이면 만료되지 않습니다
+            max_entries: 최대 항목 수. 초과 시 가장 오래 사용되지 않은 항목부터 삭제합니다
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses (last_accessed)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """작업마다 연결을 열고 커밋 후 닫습니다 (여러 스레드에서 안전하게 사용)."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: Any) -> str:
+        """
+        캐시 키를 생성합니다.
+
+        Args:
+            provider: LLM 제공사
+            model: 모델 이름
+            prompt: 렌더링된 프롬프트 (문자열 또는 JSON 직렬화 가능한 멀티모달 콘텐츠)
+
+        Returns:
+            str: SHA-256 해시
+        """
+        prompt_text = prompt if isinstance(prompt, str) else json.dumps(prompt, ensure_ascii=False, sort_keys=True)
+        payload = json.dumps([provider, model, prompt_text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+            self.hits += 1
+            return response
+
+    def set(self, cache_key: str, response: str, provider: str = "", model: str = ""):
+        """응답을 저장하고, 만료된 항목과 최대 개수를 넘는 항목을 정리합니다."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(cache_key, provider, model, response, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, provider, model, response, now, now)
+            )
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key IN ("
+                "SELECT cache_key FROM llm_responses ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """모든 캐시 항목을 삭제합니다."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 항목 수와 적중/미스 횟수를 반환합니다."""
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+@st.cache_resource
+def get_response_cache() -> LLMResponseCache:
+    """
+    프로세스 전체에서 공유하는 LLM 응답 캐시를 반환합니다.
+    경로는 LLM_RESPONSE_CACHE_PATH 환경 변수로 바꿀 수 있습니다.
+    """
+    return LLMResponseCache(os.getenv("LLM_RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH))
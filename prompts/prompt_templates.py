@@ -1,10 +1,9 @@
-def get_grading_prompt(question_type, rubric, student_answer, retrieved_docs_content, format_instructions):
-    """
-    LLM에게 전달할 최종 프롬프트를 생성하는 함수.
-    역할 부여, 단계별 사고 유도, 강력한 형식 강제를 통해 일관된 JSON 출력을 유도합니다.
-    """
+import json
+from typing import Any, Dict, List, Sequence, Tuple
 
-    prompt = f"""
+# 프롬프트의 앞부분은 학생과 무관하게 항상 같도록 배치합니다.
+# (OpenAI/Gemini 등은 동일한 프롬프트 접두부를 캐시하므로, 학생별 내용은 맨 뒤에 둡니다.)
+_INSTRUCTIONS = """
 # 역할(Persona)
 당신은 대한민국 지리 교사를 돕는, 매우 정확하고 객관적인 AI 채점 조교입니다. 당신의 임무는 주어진 채점 기준(루브릭)과 참고 자료에 근거하여 학생의 서술형 답안을 엄격하게 채점하는 것입니다.
 
@@ -13,33 +12,12 @@ def get_grading_prompt(question_type, rubric, student_answer, retrieved_docs_con
 
 ---
 
-# 입력 정보
-### 1. 문항 유형
-{question_type}
-
-### 2. 평가 루브릭 (채점 기준)
-```json
-{rubric}
-```
-
-### 3. 참고 자료 (Source Document)
-```text
-{retrieved_docs_content}
-```
-
-### 4. 학생 답안
-```text
-{student_answer}
-```
-
----
-
 # 수행 절차 (매우 중요)
 당신은 다음 절차를 반드시 순서대로 따라야 합니다.
 
 1.  **분석**: 참고 자료를 바탕으로 학생 답안을 평가 루브릭의 각 항목과 면밀히 비교 분석합니다. 각 채점 요소가 학생 답안에 포함되어 있는지, 정확하게 서술되었는지 판단합니다.
 2.  **판단 근거 서술**: 각 채점 요소에 대해 왜 그런 점수를 부여했는지에 대한 명확한 '판단 근거'를 **한국어**로 구체적으로 작성합니다.
-3.  **점수 부여**: 분석과 판단 근거에 따라 각 채점 요소의 점수를 매깁니다. 이때, 점수는 반드시 루브릭에 명시된 점수로 부여하고, 부분 점수는 부여하지 않습니다. 
+3.  **점수 부여**: 분석과 판단 근거에 따라 각 채점 요소의 점수를 매깁니다. 이때, 점수는 반드시 루브릭에 명시된 점수로 부여하고, 부분 점수는 부여하지 않습니다.
 4.  **피드백 생성**: 학생의 답안 내용에 대한 전반적인 피드백을 **한국어**로 작성하고, 답안이 핵심 없이 그럴듯하게 꾸며 쓴 의사 응답(bluffing)인지 여부를 판단합니다.
 5.  **최종 JSON 조립**: 위에서 생성한 모든 내용을 아래 "JSON 출력 형식"에 맞춰 **단 하나의 JSON 객체로 조립**합니다.
 
@@ -51,46 +29,178 @@ def get_grading_prompt(question_type, rubric, student_answer, retrieved_docs_con
 2.  **완벽한 스키마 준수**: 아래 제공된 `format_instructions`의 JSON 스키마를 100% 정확하게 따라야 합니다. 필드명을 바꾸거나 누락해서는 안 됩니다.
 3.  **한국어 사용**: JSON 내부의 모든 문자열 값(예: '교과_내용_피드백', '의사_응답_설명', '점수_판단_근거'의 내용 등)은 **반드시 한국어로 작성**해야 합니다.
 
-### JSON 출력 형식 (format_instructions)
-{format_instructions}
-
 ### 좋은 출력 예시 (Good Case)
 ```json
-{{
-    "채점결과": {{
+{
+    "채점결과": {
         "주요_채점_요소_1_점수": 2,
         "세부_채점_요소_1_1_점수": 1,
         "세부_채점_요소_1_2_점수": 1,
         "합산_점수": 2,
-        "점수_판단_근거": {{
+        "점수_판단_근거": {
             "주요_채점_요소_1": "빙하의 침식 작용으로 형성된 U자곡에 대한 설명은 정확하지만, 형성 과정에 대한 언급이 없어 1점 감점."
-        }}
-    }},
-    "피드백": {{
+        }
+    },
+    "피드백": {
         "교과_내용_피드백": "U자곡의 개념은 잘 이해하고 있으나, 형성 원리를 함께 서술하면 더 좋은 답안이 될 것입니다.",
         "의사_응답_여부": false,
         "의사_응답_설명": ""
-    }}
-}}
+    }
+}
 ```
 
 ### 나쁜 출력 예시 (Bad Case) - 절대로 이렇게 출력하지 마시오.
 ```
 Here are the grading results in JSON format:
 ```json
-{{
-    "채점결과": {{
+{
+    "채점결과": {
         "Score for main element 1": 2, // 필드 이름이 다름 (영문)
         "Total_Score": 2, // 필드 이름이 다름
         "Reason": "The student correctly described the U-shaped valley." // 판단 근거가 영문
-    }},
-    "피드백": {{
+    },
+    "피드백": {
         "Feedback": "Good job.", // 필드 이름과 내용이 모두 영문
         "Is_Bluffing": false
-    }}
-}}
+    }
+}
+```
+"""
+
+_RUBRIC_SECTION = """
+### JSON 출력 형식 (format_instructions)
+{format_instructions}
+
+---
+
+# 입력 정보
+### 1. 문항 유형
+{question_type}
+
+### 2. 평가 루브릭 (채점 기준)
+```json
+{rubric_json}
+```
+"""
+
+_STUDENT_SECTION = """
+### 3. 참고 자료 (Source Document)
+```text
+{retrieved_docs_content}
 ```
 
+### 4. 학생 답안
+```text
+{student_answer}
+```
+
+---
+
 이제, 위의 모든 규칙을 준수하여 학생 답안을 채점하고 최종 JSON 객체를 출력하시오.
 """
-    return prompt
\ No newline at end of file
+
+# 여러 학생을 한 번에 채점할 때 응답 배열의 각 원소를 학생과 연결하는 필드
+BATCH_ID_FIELD = "학생_ID"
+
+_BATCH_SECTION = """
+---
+
+# 여러 학생 일괄 채점 (이 요청에만 적용)
+이 요청에는 학생 답안 {count}개가 있습니다. 각 답안을 다른 답안과 독립적으로, 위의 수행 절차와 평가 루브릭에 따라 채점하십시오.
+이 요청의 출력은 단일 JSON 객체가 아니라 **JSON 배열**입니다. 배열의 각 원소는 위 "JSON 출력 형식"의 객체에 "{id_field}" 필드를 추가한 것이며, 아래의 {id_field}마다 정확히 하나씩 있어야 합니다.
+예: [{{"{id_field}": "S1", "채점결과": {{...}}, "피드백": {{...}}}}, {{"{id_field}": "S2", "채점결과": {{...}}, "피드백": {{...}}}}]
+
+### 3. 참고 자료 (Source Document)
+```text
+{retrieved_docs_content}
+```
+
+### 4. 학생 답안
+{answers}
+---
+
+이제, 위의 모든 규칙을 준수하여 모든 학생 답안을 채점하고 JSON 배열을 출력하시오.
+"""
+
+_BATCH_ANSWER = """#### {id_field}: {student_id}
+```text
+{student_answer}
+```
+"""
+
+
+def serialize_rubric(rubric: List[Dict[str, Any]]) -> str:
+    """루브릭을 프롬프트에 넣을 JSON 문자열로 변환합니다 (한글은 이스케이프하지 않음)."""
+    return json.dumps(rubric, ensure_ascii=False, default=str)
+
+
+class CompiledGradingPrompt:
+    """
+    채점 배치마다 한 번 만드는 채점 프롬프트.
+    역할, 절차, 출력 형식, 문항 유형과 루브릭(JSON)으로 이루어진 고정 접두부를 미리 만들어 두고,
+    학생마다 참고 자료와 답안만 뒤에 붙입니다.
+    """
+
+    def __init__(self, question_type: str, rubric: List[Dict[str, Any]], format_instructions: str):
+        self.question_type = question_type
+        self.rubric_json = serialize_rubric(rubric)
+        self.format_instructions = format_instructions
+        self.static_prefix = _INSTRUCTIONS + _RUBRIC_SECTION.format(
+            format_instructions=format_instructions,
+            question_type=question_type,
+            rubric_json=self.rubric_json
+        )
+
+    def render(self, student_answer: str, retrieved_docs_content: str) -> str:
+        """
+        학생 답안과 참고 자료를 붙여 최종 프롬프트를 만듭니다.
+
+        Args:
+            student_answer: 학생 답안
+            retrieved_docs_content: 검색된 참고 자료 본문
+
+        Returns:
+            str: LLM에 전달할 프롬프트 (static_prefix로 시작)
+        """
+        return self.static_prefix + _STUDENT_SECTION.format(
+            retrieved_docs_content=retrieved_docs_content,
+            student_answer=student_answer
+        )
+
+    def render_batch(self, answers: Sequence[Tuple[str, str]], retrieved_docs_content: str) -> str:
+        """
+        여러 학생의 답안을 한 프롬프트에 담아, 학생 ID별 결과의 JSON 배열을 요청합니다.
+
+        Args:
+            answers: (학생 ID, 답안) 목록
+            retrieved_docs_content: 학생들이 함께 사용하는 참고 자료 본문
+
+        Returns:
+            str: LLM에 전달할 프롬프트 (static_prefix로 시작)
+        """
+        rendered_answers = "\n".join(
+            _BATCH_ANSWER.format(id_field=BATCH_ID_FIELD, student_id=student_id, student_answer=student_answer)
+            for student_id, student_answer in answers
+        )
+        return self.static_prefix + _BATCH_SECTION.format(
+            count=len(answers),
+            id_field=BATCH_ID_FIELD,
+            retrieved_docs_content=retrieved_docs_content,
+            answers=rendered_answers
+        )
+
+
+def compile_grading_prompt(question_type, rubric, format_instructions) -> CompiledGradingPrompt:
+    """학생 간에 공유되는 부분을 미리 만든 채점 프롬프트를 반환합니다."""
+    return CompiledGradingPrompt(question_type, rubric, format_instructions)
+
+
+def get_grading_prompt(question_type, rubric, student_answer, retrieved_docs_content, format_instructions):
+    """
+    LLM에게 전달할 최종 프롬프트를 생성하는 함수.
+    역할 부여, 단계별 사고 유도, 강력한 형식 강제를 통해 일관된 JSON 출력을 유도합니다.
+    여러 학생을 채점할 때는 compile_grading_prompt로 한 번 만든 뒤 render를 사용하십시오.
+    """
+    return compile_grading_prompt(question_type, rubric, format_instructions).render(
+        student_answer, retrieved_docs_content
+    )
@@ -2,14 +2,21 @@
 File service for handling document uploads and processing.
 Manages document loading, chunking, and vector database creation.
 """
+import os
 import streamlit as st
-from typing import Optional, List, Any
-from utils.data_loader import load_document
+from typing import Callable, Dict, Optional, List, Any, Tuple
+from utils.data_loader import load_documents_parallel
 from utils.text_splitter import split_documents
 from utils.embedding import get_embedding_model
-from utils.vector_db import create_vector_db, load_vector_db
+from utils.vector_db import (
+    compute_corpus_fingerprint, compute_file_hash, get_embedding_model_name, get_index_path, index_exists,
+    load_or_create_vector_db, load_vector_db
+)
+from utils.vector_index import VectorIndexConfig
 from ui.state_manager import StateManager
 
+DEFAULT_CHUNK_SETTINGS = {"chunk_size": 1000, "chunk_overlap": 200}
+
 
 class FileService:
     """Service for handling file operations and document processing."""
@@ -18,10 +25,14 @@ class FileService:
         """Initialize the file service with state manager."""
         self.state_manager = state_manager
         self.embedding_model = get_embedding_model()
+        self.index_config = VectorIndexConfig.from_env()
     
     def process_uploaded_file(self, uploaded_file) -> bool:
         """
-        Process an uploaded source document file.
+        Process an uploaded source document file and add it to the loaded sources.
+
+        Files uploaded earlier stay loaded, so the vector DB can be updated
+        incrementally; re-uploading a file with the same name replaces it.
         
         Args:
             uploaded_file: Streamlit uploaded file object
@@ -32,35 +43,158 @@ class FileService:
         if uploaded_file is None:
             return False
         
-        # Check if this is a new file
-        if not self.state_manager.is_file_changed(uploaded_file.name):
-            return True  # File already processed
-        
+        errors = self.process_uploaded_files([uploaded_file])
+        return uploaded_file.name not in errors
+
+    def process_uploaded_files(self, uploaded_files: List[Any],
+                               progress_callback: Optional[Callable[[int, int, str, Optional[str]], None]] = None
+                               ) -> Dict[str, str]:
+        """
+        Load several uploaded source files in parallel and add them to the loaded sources.
+
+        Files are parsed in a process pool and chunked with the current chunk
+        settings as each one finishes. A file that fails to load is reported and
+        skipped without affecting the others. Uploads that were already processed
+        (same Streamlit file id) are ignored. Different files sharing a name are
+        loaded under numbered names (see _label_payloads).
+
+        Args:
+            uploaded_files: Streamlit uploaded file objects
+            progress_callback: Called as (completed, total, file_name, error) after each file
+
+        Returns:
+            dict: Error message per loaded file name for files that failed to load
+        """
+        processed_ids = set(self.state_manager.get('processed_upload_ids') or [])
+        pending = [f for f in uploaded_files if f is not None and self._upload_id(f) not in processed_ids]
+        if not pending:
+            return {}
+
+        payloads, hashes = self._label_payloads(pending)
+        chunk_settings = self.state_manager.get('chunk_settings') or DEFAULT_CHUNK_SETTINGS
+        source_files = dict(self.state_manager.get('source_files') or {})
+        errors = {}
+
         try:
-            with st.spinner("파일 처리 중..."):
-                documents = load_document(uploaded_file)
-                
-                if documents:
-                    self.state_manager.update(
-                        source_documents=documents,
-                        uploaded_file_name=uploaded_file.name
-                    )
-                    # Clear dependent data when new file is uploaded
-                    self.state_manager.clear_document_data()
-                    
-                    st.success(f"'{uploaded_file.name}'에서 {len(documents)}개의 문서를 로드했습니다.")
-                    return True
+            results = load_documents_parallel(list(payloads.values()))
+            for completed, (file_name, documents, error) in enumerate(results, start=1):
+                if error or not documents:
+                    errors[file_name] = error or "문서를 찾을 수 없습니다."
                 else:
-                    st.error(f"'{uploaded_file.name}' 파일 처리 중 오류가 발생했습니다.")
-                    return False
-                    
+                    for document in documents:
+                        document.metadata['source_file'] = file_name
+                    source_files[file_name] = {
+                        'hash': hashes[file_name],
+                        'documents': documents,
+                        'chunks': split_documents(documents, chunk_settings['chunk_size'],
+                                                  chunk_settings['chunk_overlap']),
+                        'chunk_settings': dict(chunk_settings)
+                    }
+                if progress_callback:
+                    progress_callback(completed, len(payloads), file_name, errors.get(file_name))
         except Exception as e:
-            st.error(f"파일 처리 중 오류 발생: {str(e)}")
+            for file_name in payloads:
+                if file_name not in source_files and file_name not in errors:
+                    errors[file_name] = str(e)
+
+        # Failed uploads are marked as processed too, so they are not retried on every rerun
+        processed_ids.update(self._upload_id(f) for f in pending)
+        self.state_manager.update(processed_upload_ids=processed_ids, uploaded_file_name=pending[-1].name)
+        self._set_source_files(source_files, chunk_settings)
+        return errors
+
+    @staticmethod
+    def _label_payloads(uploaded_files: List[Any]) -> Tuple[Dict[str, tuple], Dict[str, str]]:
+        """
+        Build loader payloads keyed by the name each file is loaded under.
+
+        Files with the same name but different content (e.g. picked from
+        different folders) are named "notes (2).pdf", "notes (3).pdf", ... so
+        none of them is dropped; the same file selected twice is loaded once.
+
+        Returns:
+            tuple: (payload per name, content hash per name)
+        """
+        payloads, hashes = {}, {}
+        for uploaded_file in uploaded_files:
+            content = uploaded_file.getvalue()
+            content_hash = compute_file_hash(content)
+            stem, extension = os.path.splitext(uploaded_file.name)
+            name, number = uploaded_file.name, 1
+            while name in hashes and hashes[name] != content_hash:
+                number += 1
+                name = f"{stem} ({number}){extension}"
+            payloads[name] = (name, uploaded_file.type, content)
+            hashes[name] = content_hash
+        return payloads, hashes
+
+    @staticmethod
+    def _upload_id(uploaded_file: Any) -> str:
+        """Identify an upload; Streamlit assigns a new file_id each time a file is uploaded."""
+        return getattr(uploaded_file, 'file_id', None) or f"{uploaded_file.name}:{getattr(uploaded_file, 'size', '')}"
+
+    def remove_source_file(self, file_name: str) -> bool:
+        """
+        Remove a loaded source file; its chunks are dropped from the next vector DB build.
+
+        Args:
+            file_name: Name of the uploaded file to remove
+
+        Returns:
+            bool: True if the file was loaded and has been removed
+        """
+        source_files = dict(self.state_manager.get('source_files') or {})
+        if source_files.pop(file_name, None) is None:
             return False
+        self._set_source_files(source_files, self.state_manager.get('chunk_settings') or DEFAULT_CHUNK_SETTINGS)
+        return True
+
+    def _set_source_files(self, source_files: dict, chunk_settings: dict) -> None:
+        """
+        Store the loaded sources and the chunks for the given settings.
+
+        Sources already chunked with these settings keep their chunks; the rest
+        are split again. The vector DB is reset, but its last fingerprint is kept
+        as the base for incremental updates, and a stored index for the new
+        corpus is reused when one exists.
+        """
+        chunks = []
+        for info in source_files.values():
+            if info.get('chunk_settings') != chunk_settings or info.get('chunks') is None:
+                info['chunks'] = split_documents(info['documents'], chunk_settings['chunk_size'],
+                                                 chunk_settings['chunk_overlap'])
+                info['chunk_settings'] = dict(chunk_settings)
+            chunks.extend(info['chunks'])
+
+        documents = [document for info in source_files.values() for document in info['documents']]
+        self.state_manager.update(
+            source_files=source_files,
+            source_documents=documents or None,
+            chunks=chunks or None,
+            chunk_settings=dict(chunk_settings) if chunks else None,
+            vector_db=None
+        )
+        if chunks:
+            self._reuse_stored_vector_db()
+
+    def _reuse_stored_vector_db(self) -> bool:
+        """Load the stored index for the current corpus fingerprint if one exists."""
+        fingerprint = self.get_corpus_fingerprint()
+        db_path = get_index_path(fingerprint)
+        if not index_exists(db_path):
+            return False
+        vector_db = load_vector_db(self.embedding_model, db_path, self.index_config)
+        if not vector_db:
+            return False
+        self.state_manager.update(vector_db=vector_db, vector_db_fingerprint=fingerprint)
+        st.success("같은 문서와 청크 설정으로 저장된 벡터 DB를 재사용합니다.")
+        return True
     
     def create_chunks(self, chunk_size: int = 1000, chunk_overlap: int = 200) -> bool:
         """
         Create document chunks from loaded documents.
+
+        Files already chunked with the same settings are not split again.
         
         Args:
             chunk_size: Size of each chunk
@@ -75,12 +209,21 @@ class FileService:
             st.error("문서가 로드되지 않았습니다. 먼저 문서를 업로드해주세요.")
             return False
         
+        chunk_settings = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
         try:
             with st.spinner("문서를 청크로 분할 중..."):
-                chunks = split_documents(source_documents, chunk_size, chunk_overlap)
-                self.state_manager.set('chunks', chunks)
-                st.success(f"총 {len(chunks)}개의 청크가 생성되었습니다.")
-                return True
+                source_files = self.state_manager.get('source_files')
+                if source_files:
+                    self._set_source_files(dict(source_files), chunk_settings)
+                else:
+                    self.state_manager.update(
+                        chunks=split_documents(source_documents, chunk_size, chunk_overlap),
+                        chunk_settings=chunk_settings,
+                        vector_db=None
+                    )
+                    self._reuse_stored_vector_db()
+                st.success(f"총 {self.get_chunks_count()}개의 청크가 생성되었습니다.")
+            return True
                 
         except Exception as e:
             st.error(f"청크 생성 중 오류 발생: {str(e)}")
@@ -88,7 +231,10 @@ class FileService:
     
     def build_vector_database(self) -> bool:
         """
-        Build or load vector database from chunks.
+        Build or load the vector database for the current corpus fingerprint.
+
+        New chunks are embedded in fixed-size batches and added to the index as
+        they go, with a progress bar showing the embedded chunk count.
         
         Returns:
             bool: True if vector DB creation/loading was successful, False otherwise
@@ -101,15 +247,32 @@ class FileService:
         
         try:
             with st.spinner("벡터 DB 처리 중..."):
-                # Try to load existing vector DB first
-                vector_db = load_vector_db(self.embedding_model)
-                
-                if vector_db is None:
-                    # Create new vector DB if none exists
-                    vector_db = create_vector_db(chunks, self.embedding_model)
+                progress_bar = st.progress(0.0)
+
+                def update_progress(completed: int, total: int):
+                    progress_bar.progress(completed / total if total else 1.0,
+                                          text=f"청크 임베딩 중... ({completed}/{total})")
+
+                chunk_settings = self.state_manager.get('chunk_settings') or {}
+                fingerprint = self.get_corpus_fingerprint()
+                vector_db = load_or_create_vector_db(
+                    chunks,
+                    self.embedding_model,
+                    fingerprint,
+                    metadata={
+                        "file_names": self.get_source_file_names(),
+                        "embedding_model": get_embedding_model_name(self.embedding_model),
+                        "index_signature": self.index_config.signature(),
+                        **chunk_settings
+                    },
+                    base_fingerprint=self.state_manager.get('vector_db_fingerprint'),
+                    progress_callback=update_progress,
+                    index_config=self.index_config
+                )
+                progress_bar.empty()
                 
                 if vector_db:
-                    self.state_manager.set('vector_db', vector_db)
+                    self.state_manager.update(vector_db=vector_db, vector_db_fingerprint=fingerprint)
                     st.success("벡터 DB가 준비되었습니다.")
                     return True
                 else:
@@ -120,6 +283,36 @@ class FileService:
             st.error(f"벡터 DB 구축 중 오류 발생: {str(e)}")
             return False
     
+    def get_corpus_fingerprint(self) -> str:
+        """
+        Get the fingerprint that identifies the stored index for the current corpus.
+
+        Covers the name and bytes of every loaded file, the chunk settings, the
+        embedding model name and the configured FAISS index type. Falls back to hashing the loaded document text when
+        no file hashes are available.
+
+        Returns:
+            str: Corpus fingerprint
+        """
+        source_files = self.state_manager.get('source_files') or {}
+        source_hashes = [f"{name}:{info['hash']}" for name, info in source_files.items()]
+        if not source_hashes:
+            documents = self.state_manager.get('source_documents') or []
+            text = "\n".join(document.page_content for document in documents)
+            source_hashes = [compute_file_hash(text.encode("utf-8"))]
+        chunk_settings = self.state_manager.get('chunk_settings') or {}
+        return compute_corpus_fingerprint(
+            source_hashes,
+            chunk_settings.get('chunk_size'),
+            chunk_settings.get('chunk_overlap'),
+            get_embedding_model_name(self.embedding_model),
+            self.index_config.signature()
+        )
+
+    def get_source_file_names(self) -> List[str]:
+        """Get names of the loaded source files in upload order."""
+        return list((self.state_manager.get('source_files') or {}).keys())
+
     def has_source_documents(self) -> bool:
         """Check if source documents are loaded."""
         return bool(self.state_manager.get('source_documents'))
@@ -4,12 +4,16 @@ Coordinates the grading process and manages validation logic.
 """
 import streamlit as st
 import time
+from functools import partial
 from typing import List, Dict, Any, Optional
 from ui.state_manager import StateManager
 from core.dynamic_models import DynamicModelFactory
-from utils.retrieval import get_retriever
+from core.grading_config import GradingConfig
+from core.concurrency import run_ordered, run_ordered_coroutines
+from utils.retrieval import RetrievalConfig, get_retriever
 from utils.student_answer_loader import load_student_answers
-from utils.map_item import grade_map_question
+from utils.map_item import grade_map_question, agrade_map_question
+from models.response_cache import get_response_cache
 
 
 class GradingService:
@@ -117,7 +121,6 @@ class GradingService:
             # Get required data from state
             student_answers_df = self.state_manager.get('student_answers_df')
             rubric = self.state_manager.get('final_rubric')
-            llm = self.state_manager.get('selected_llm')
             vector_db = self.state_manager.get('vector_db')
             
             # Create dynamic parser based on rubric
@@ -126,32 +129,38 @@ class GradingService:
             # Set up progress tracking
             total_students = len(student_answers_df)
             progress_bar = st.progress(0)
-            graded_results = []
             
             st.info(f"총 {total_students}명의 학생 답안을 채점합니다...")
             start_time = time.time()
             
-            # Import grading pipeline here to avoid circular imports
-            from core.grading_pipeline import GradingPipeline
-            grading_pipeline = GradingPipeline(self.llm_manager, get_retriever(vector_db, k=10))
-            
-            # Process each student sequentially
-            for i, (index, row) in enumerate(student_answers_df.iterrows()):
-                student_name = row["이름"]
-                
-                if question_type == "백지도":
-                    result = self._grade_map_question(student_name, rubric, dynamic_parser)
-                else:
-                    if "답안" not in row:
-                        result = {"이름": student_name, "오류": f"{student_name} 학생의 답안 컬럼이 누락되었습니다."}
-                    else:
-                        student_answer = row["답안"]
-                        result = grading_pipeline.process_student_answer(
-                            student_name, student_answer, rubric, question_type, dynamic_parser
-                        )
-                
-                graded_results.append(result)
-                progress_bar.progress((i + 1) / total_students)
+            # Concurrency settings chosen in the grading section
+            grading_config = self.state_manager.get('grading_config') or GradingConfig()
+            response_cache = get_response_cache() if grading_config.use_response_cache else None
+            
+            def update_progress(completed: int, total: int):
+                # Invoked from the script thread as each student finishes
+                progress_bar.progress(completed / total)
+            
+            if question_type == "백지도":
+                graded_results = self._grade_map_questions(
+                    student_answers_df, rubric, dynamic_parser, grading_config, update_progress,
+                    response_cache=response_cache
+                )
+            else:
+                # Import grading pipeline here to avoid circular imports
+                from core.grading_pipeline import GradingPipeline
+                retrieval_config = RetrievalConfig.from_env()
+                grading_pipeline = GradingPipeline(
+                    self.llm_manager, get_retriever(vector_db, k=retrieval_config.k, config=retrieval_config),
+                    grading_config=grading_config,
+                    llm_provider=self.state_manager.get('selected_llm_provider'),
+                    llm_model=self.state_manager.get('selected_llm_model'),
+                    response_cache=response_cache
+                )
+                graded_results = grading_pipeline.process_batch(
+                    student_answers_df, rubric, question_type, dynamic_parser,
+                    progress_callback=update_progress
+                )
             
             # Save results to state
             self.state_manager.set('graded_results', graded_results)
@@ -166,7 +175,66 @@ class GradingService:
             st.error(f"채점 중 오류 발생: {str(e)}")
             return False
     
-    def _grade_map_question(self, student_name: str, rubric: List[Dict], dynamic_parser) -> Dict[str, Any]:
+    def _grade_map_questions(self, student_answers_df, rubric: List[Dict], dynamic_parser,
+                             grading_config: GradingConfig, progress_callback,
+                             response_cache=None) -> List[Dict[str, Any]]:
+        """
+        Grade map questions for all students using the configured worker pool.
+        
+        Args:
+            student_answers_df: DataFrame containing student names
+            rubric: Grading rubric
+            dynamic_parser: Parser for grading results
+            grading_config: Concurrency configuration
+            progress_callback: Called as ``progress_callback(completed, total)``
+            response_cache: LLMResponseCache shared by all students (None disables caching)
+            
+        Returns:
+            list: Grading results in DataFrame row order
+        """
+        student_names = [row["이름"] for _, row in student_answers_df.iterrows()]
+        # Session state is only reachable from the script thread, so read it up front
+        uploaded_map_images = self.state_manager.get('uploaded_map_images', [])
+        
+        def _on_error(index: int, error: Exception) -> Dict[str, Any]:
+            return {"이름": student_names[index], "오류": f"백지도 채점 중 오류 발생: {error}"}
+        
+        if grading_config.is_async():
+            factories = [
+                partial(self._agrade_map_question, student_name, rubric, dynamic_parser, uploaded_map_images,
+                        response_cache)
+                for student_name in student_names
+            ]
+            return run_ordered_coroutines(
+                factories,
+                submit=self.llm_manager.run_async,
+                max_concurrency=grading_config.get_concurrency_limit(),
+                progress_callback=progress_callback,
+                error_handler=_on_error
+            )
+        
+        tasks = [
+            partial(self._grade_map_question, student_name, rubric, dynamic_parser, uploaded_map_images,
+                    response_cache)
+            for student_name in student_names
+        ]
+        return run_ordered(
+            tasks,
+            max_workers=grading_config.get_concurrency_limit(),
+            progress_callback=progress_callback,
+            error_handler=_on_error
+        )
+    
+    def _find_map_image(self, student_name: str, uploaded_map_images: Optional[List[Any]]) -> Optional[Any]:
+        """Find the uploaded map image whose filename (without extension) matches the student name."""
+        for img in uploaded_map_images or []:
+            if img.name.split('.')[0] == student_name:
+                return img
+        return None
+    
+    def _grade_map_question(self, student_name: str, rubric: List[Dict], dynamic_parser,
+                            uploaded_map_images: Optional[List[Any]] = None,
+                            response_cache=None) -> Dict[str, Any]:
         """
         Grade a map question for a specific student.
         
@@ -174,19 +242,17 @@ class GradingService:
             student_name: Name of the student
             rubric: Grading rubric
             dynamic_parser: Parser for grading results
+            uploaded_map_images: Uploaded images; read from session state if omitted
+            response_cache: LLMResponseCache for reusing previous responses
             
         Returns:
             dict: Grading result for the student
         """
-        uploaded_map_images = self.state_manager.get('uploaded_map_images', [])
+        if uploaded_map_images is None:
+            uploaded_map_images = self.state_manager.get('uploaded_map_images', [])
         
         # Find the corresponding image for the student
-        uploaded_image = None
-        for img in uploaded_map_images:
-            # Assuming image filename (without extension) matches student name
-            if img.name.split('.')[0] == student_name:
-                uploaded_image = img
-                break
+        uploaded_image = self._find_map_image(student_name, uploaded_map_images)
         
         if uploaded_image is None:
             return {"이름": student_name, "오류": f"{student_name} 학생의 백지도 이미지를 찾을 수 없습니다."}
@@ -197,7 +263,8 @@ class GradingService:
                 student_name=student_name,
                 uploaded_image=uploaded_image,
                 rubric=rubric,
-                parser=dynamic_parser
+                parser=dynamic_parser,
+                response_cache=response_cache
             )
             end_time_student = time.time()
             
@@ -210,6 +277,42 @@ class GradingService:
         except Exception as e:
             return {"이름": student_name, "오류": f"백지도 채점 중 오류 발생: {str(e)}"}
     
+    async def _agrade_map_question(self, student_name: str, rubric: List[Dict], dynamic_parser,
+                                   uploaded_map_images: Optional[List[Any]],
+                                   response_cache=None) -> Dict[str, Any]:
+        """
+        Async counterpart of _grade_map_question using the LLM manager's async API.
+        
+        Args:
+            student_name: Name of the student
+            rubric: Grading rubric
+            dynamic_parser: Parser for grading results
+            uploaded_map_images: Uploaded images
+            response_cache: LLMResponseCache for reusing previous responses
+            
+        Returns:
+            dict: Grading result for the student
+        """
+        uploaded_image = self._find_map_image(student_name, uploaded_map_images)
+        
+        if uploaded_image is None:
+            return {"이름": student_name, "오류": f"{student_name} 학생의 백지도 이미지를 찾을 수 없습니다."}
+        
+        start_time_student = time.time()
+        result = await agrade_map_question(
+            student_name=student_name,
+            uploaded_image=uploaded_image,
+            rubric=rubric,
+            parser=dynamic_parser,
+            llm_manager=self.llm_manager,
+            response_cache=response_cache
+        )
+        
+        if "오류" not in result:
+            result['채점_소요_시간'] = time.time() - start_time_student
+        
+        return result
+    
     def get_grading_results(self) -> Optional[List[Dict[str, Any]]]:
         """Get the current grading results."""
         return self.state_manager.get('graded_results')
@@ -0,0 +1,129 @@
+"""
+Tests for in-batch answer deduplication.
+
+Validates answer normalization, exact and near-duplicate grouping, and that
+GradingPipeline grades each duplicate group once and fans the result out.
+"""
+
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+from core.answer_dedup import (
+    find_near_duplicate_groups, group_identical_answers, normalize_answer
+)
+from core.grading_config import GradingConfig, ConcurrencyMode
+from core.grading_pipeline import GradingPipeline
+
+
+class TestAnswerNormalization:
+    """Test normalize_answer and exact grouping."""
+
+    def test_whitespace_punctuation_and_case_are_ignored(self):
+        assert normalize_answer("  서울은 수도이다. ") == normalize_answer("서울은수도이다")
+        assert normalize_answer("GDP 증가!") == normalize_answer("gdp 증가")
+
+    def test_numbers_keep_their_punctuation(self):
+        assert normalize_answer("3.5") != normalize_answer("35")
+        assert normalize_answer("-5도") != normalize_answer("5도")
+
+    def test_symbols_are_kept(self):
+        pairs = [
+            ("기온↑ 강수량↓", "기온↓ 강수량↑"),
+            ("A > B", "A < B"),
+            ("서울 → 부산", "서울 ← 부산"),
+            ("인구 증가(+)", "인구 증가(-)"),
+        ]
+        for first, second in pairs:
+            assert normalize_answer(first) != normalize_answer(second)
+
+    def test_missing_answers_are_empty(self):
+        assert normalize_answer(None) == ""
+        assert normalize_answer(float("nan")) == ""
+
+    def test_group_identical_answers(self):
+        answers = ["모르겠습니다", "", "모르겠습니다.", "다른 답", None]
+
+        assert group_identical_answers(answers) == [[0, 2], [1, 4], [3]]
+
+
+class TestNearDuplicates:
+    """Test MinHash based near-duplicate flagging."""
+
+    def test_similar_long_answers_are_grouped(self):
+        base = "인구가 수도권으로 집중되면서 주택 부족과 교통 혼잡 문제가 발생하였다"
+        answers = [base, base.replace("발생하였다", "발생했다"), "지방 소멸 문제는 출산율 감소와 관련이 깊다"]
+
+        assert find_near_duplicate_groups(answers, threshold=0.6) == [[0, 1]]
+
+    def test_exact_duplicates_and_empty_answers_are_not_flagged(self):
+        assert find_near_duplicate_groups(["같은 답", "같은 답", "", ""]) == []
+
+
+class TestPipelineDeduplication:
+    """Test GradingPipeline.process_batch fan-out."""
+
+    def setup_method(self):
+        self.rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        self.df = pd.DataFrame({
+            "이름": ["가", "나", "다", "라"],
+            "답안": ["모르겠습니다", "모르겠습니다.", "정답입니다", " 모르겠습니다"]
+        })
+        self.patchers = [
+            patch('core.grading_pipeline.batch_retrieve_documents',
+                  side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries]),
+            patch('core.grading_pipeline.batch_rerank_documents',
+                  side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries]),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def teardown_method(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _fake_process(self, student_name, student_answer, *args, show_status=True, **kwargs):
+        return {"이름": student_name, "답안": student_answer, "채점결과": {"합산_점수": 0},
+                "채점_소요_시간": 1.5}
+
+    def test_duplicates_graded_once_and_fanned_out(self):
+        pipeline = GradingPipeline(Mock(), Mock(), grading_config=GradingConfig(ConcurrencyMode.THREAD))
+
+        with patch.object(pipeline, "process_student_answer", side_effect=self._fake_process) as mock_process:
+            results = pipeline.process_batch(self.df, self.rubric, "서술형", Mock())
+
+        assert mock_process.call_count == 2
+        assert [r["이름"] for r in results] == ["가", "나", "다", "라"]
+        assert [r["답안"] for r in results] == list(self.df["답안"])
+        assert results[0]["채점_소요_시간"] == 1.5
+        assert results[1]["채점_소요_시간"] == 0.0
+        assert results[3]["중복_답안_대표"] == "가"
+        assert results[3]["중복_답안_수"] == 3
+        assert "중복_답안_대표" not in results[2]
+        # Fanned-out results are independent copies
+        results[1]["채점결과"]["합산_점수"] = 1
+        assert results[0]["채점결과"]["합산_점수"] == 0
+
+    def test_deduplication_can_be_disabled(self):
+        config = GradingConfig(ConcurrencyMode.SEQUENTIAL, deduplicate_answers=False)
+        pipeline = GradingPipeline(Mock(), Mock(), grading_config=config)
+
+        with patch.object(pipeline, "process_student_answer", side_effect=self._fake_process) as mock_process:
+            pipeline.process_batch(self.df, self.rubric, "서술형", Mock())
+
+        assert mock_process.call_count == 4
+
+    def test_near_duplicates_are_flagged(self):
+        base = "인구가 수도권으로 집중되면서 주택 부족과 교통 혼잡 문제가 발생하였다"
+        df = pd.DataFrame({"이름": ["가", "나", "다"],
+                           "답안": [base, base.replace("발생하였다", "발생했다"), "전혀 다른 답안"]})
+        config = GradingConfig(ConcurrencyMode.SEQUENTIAL, flag_near_duplicates=True,
+                               near_duplicate_threshold=0.6)
+        pipeline = GradingPipeline(Mock(), Mock(), grading_config=config)
+
+        with patch.object(pipeline, "process_student_answer", side_effect=self._fake_process):
+            results = pipeline.process_batch(df, self.rubric, "서술형", Mock())
+
+        assert results[0]["유사_답안_후보"] == "나"
+        assert results[1]["유사_답안_후보"] == "가"
+        assert "유사_답안_후보" not in results[2]
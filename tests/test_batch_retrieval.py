@@ -0,0 +1,327 @@
+"""
+Tests for batch retrieval.
+
+Validates that batch_retrieve_documents embeds all queries in one call, searches
+the FAISS index once and matches per-query retrieval results.
+"""
+
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+import pandas as pd
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.grading_config import GradingConfig, ConcurrencyMode
+from core.grading_pipeline import GradingPipeline
+from utils.embedding import is_symmetric_embedding
+from utils.index_registry import VectorIndexRegistry
+from utils.retrieval import (
+    RetrievalCache, RetrievalConfig, batch_rerank_documents, batch_retrieve_documents, clear_rerank_score_cache,
+    get_retriever, normalizes_embeddings, rerank_documents, retrieve_documents
+)
+from utils.vector_db import create_vector_db
+from utils.vector_index import VectorIndexConfig
+
+
+class SymmetricFakeEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings declared symmetric, so batch retrieval embeds all queries at once."""
+    symmetric_query_embeddings: bool = True
+
+
+class TestBatchRetrieveDocuments:
+    """Test batch_retrieve_documents against a small FAISS index."""
+
+    def setup_method(self):
+        self.embeddings = SymmetricFakeEmbedding(size=16)
+        self.documents = [
+            Document(page_content=f"문서 {i}", metadata={"source": "교과서", "page": i}) for i in range(8)
+        ]
+        self.vector_db = FAISS.from_documents(self.documents, self.embeddings)
+        self.retriever = get_retriever(self.vector_db, k=3)
+
+    def test_matches_per_query_retrieval(self):
+        queries = ["문서 1", "문서 5", "관련 없는 답안"]
+
+        batch_results = batch_retrieve_documents(self.retriever, queries, show_status=False)
+
+        assert len(batch_results) == 3
+        for query, docs in zip(queries, batch_results):
+            expected = self.retriever.invoke(query)
+            assert [d.page_content for d in docs] == [d.page_content for d in expected]
+
+    def test_single_embedding_call_and_index_search(self):
+        embed_calls = []
+        original_embed = DeterministicFakeEmbedding.embed_documents
+
+        def counting_embed(embeddings, texts):
+            embed_calls.append(len(texts))
+            return original_embed(embeddings, texts)
+
+        with patch.object(DeterministicFakeEmbedding, "embed_documents", counting_embed), \
+             patch.object(self.vector_db, "index", wraps=self.vector_db.index) as mock_index:
+            batch_retrieve_documents(self.retriever, ["가", "나", "다", "라"], show_status=False)
+
+        assert embed_calls == [4]
+        assert mock_index.search.call_count == 1
+
+    def test_asymmetric_embeddings_embed_each_query_as_a_query(self):
+        embeddings = DeterministicFakeEmbedding(size=16)
+        vector_db = FAISS.from_documents(self.documents, embeddings, normalize_L2=True)
+        retriever = get_retriever(vector_db, k=3)
+        queries = ["문서 1", "문서 5"]
+
+        with patch.object(DeterministicFakeEmbedding, "embed_query", autospec=True,
+                          side_effect=DeterministicFakeEmbedding.embed_query) as mock_query, \
+             patch.object(DeterministicFakeEmbedding, "embed_documents") as mock_documents:
+            batch_results = batch_retrieve_documents(retriever, queries, show_status=False)
+
+        mock_documents.assert_not_called()
+        assert mock_query.call_count == 2
+        for query, docs in zip(queries, batch_results):
+            expected = vector_db.similarity_search(query, k=3)
+            assert [d.page_content for d in docs] == [d.page_content for d in expected]
+
+    def test_normalization_setting_is_read_from_the_store(self):
+        assert not normalizes_embeddings(self.vector_db)
+        assert normalizes_embeddings(FAISS.from_documents(self.documents, self.embeddings, normalize_L2=True))
+
+    def test_huggingface_embeddings_with_query_prompts_are_asymmetric(self):
+        symmetric = HuggingFaceEmbeddings.model_construct(encode_kwargs={'normalize_embeddings': True},
+                                                          query_encode_kwargs={})
+        asymmetric = HuggingFaceEmbeddings.model_construct(encode_kwargs={},
+                                                           query_encode_kwargs={'prompt': 'query: '})
+
+        assert is_symmetric_embedding(symmetric)
+        assert not is_symmetric_embedding(asymmetric)
+        assert not is_symmetric_embedding(DeterministicFakeEmbedding(size=4))
+
+    def test_k_larger_than_index(self):
+        retriever = get_retriever(self.vector_db, k=20)
+
+        results = batch_retrieve_documents(retriever, ["문서 1"], show_status=False)
+
+        assert len(results[0]) == len(self.documents)
+
+    def test_unsupported_retriever_falls_back_to_per_query(self):
+        retriever = Mock()
+        retriever.invoke.side_effect = lambda query: [Document(page_content=query)]
+
+        results = batch_retrieve_documents(retriever, ["a", "b"], show_status=False)
+
+        assert [[d.page_content for d in docs] for docs in results] == [["a"], ["b"]]
+
+    def test_empty_inputs(self):
+        assert batch_retrieve_documents(self.retriever, [], show_status=False) == []
+        assert batch_retrieve_documents(None, ["a"], show_status=False) == [[]]
+
+
+class TestRetrievalCache:
+    """Test the (index fingerprint, normalized answer, k) retrieval result cache."""
+
+    def setup_method(self):
+        self.db_path = tempfile.mkdtemp()
+        self.embeddings = SymmetricFakeEmbedding(size=16)
+        documents = [Document(page_content=f"지형 문서 {i}", metadata={"source_file": "a.pdf"}) for i in range(8)]
+        create_vector_db(documents, self.embeddings, self.db_path, index_config=VectorIndexConfig())
+        self.vector_db = VectorIndexRegistry().get(self.db_path, self.embeddings)
+        self.cache = RetrievalCache()
+        self.cache_patcher = patch('utils.retrieval.get_retrieval_cache', return_value=self.cache)
+        self.cache_patcher.start()
+
+    def teardown_method(self):
+        self.cache_patcher.stop()
+        shutil.rmtree(self.db_path, ignore_errors=True)
+
+    def _count_embeddings(self, retriever, queries):
+        with patch.object(DeterministicFakeEmbedding, "embed_documents", autospec=True,
+                          side_effect=DeterministicFakeEmbedding.embed_documents) as mock_embed:
+            results = batch_retrieve_documents(retriever, queries, show_status=False)
+        return results, [len(call.args[1]) for call in mock_embed.call_args_list]
+
+    def test_repeated_answers_skip_embedding_and_search(self):
+        for mode in ("dense", "hybrid"):
+            retriever = get_retriever(self.vector_db, k=3, config=RetrievalConfig(mode=mode))
+            first, first_calls = self._count_embeddings(retriever, ["지형 문서 1", "지형 문서 2"])
+            # Whitespace differences normalize to the same key
+            second, second_calls = self._count_embeddings(retriever, [" 지형  문서 1", "지형 문서 3"])
+
+            assert first_calls == [2] and second_calls == [1]
+            assert [d.id for d in second[0]] == [d.id for d in first[0]]
+
+    def test_answers_differing_in_symbols_do_not_share_entries(self):
+        retriever = get_retriever(self.vector_db, k=3, config=RetrievalConfig(mode="dense"))
+        for first, second in [("기온↑ 강수량↓", "기온↓ 강수량↑"), ("A > B", "A < B")]:
+            _, first_calls = self._count_embeddings(retriever, [first])
+            _, second_calls = self._count_embeddings(retriever, [second])
+
+            assert first_calls == [1] and second_calls == [1]
+
+        assert self.cache.get_stats()["hits"] == 0
+        assert self.cache.get_stats()["entries"] == 4
+
+    def test_cache_stores_ids_and_scores_per_k(self):
+        retriever = get_retriever(self.vector_db, k=2, config=RetrievalConfig(mode="dense"))
+        retrieve_documents(retriever, "지형 문서 4", "학생", show_status=False)
+        retrieve_documents(retriever, "지형 문서 4", "학생", show_status=False)
+        retrieve_documents(get_retriever(self.vector_db, k=3, config=RetrievalConfig(mode="dense")), "지형 문서 4",
+                           "학생", show_status=False)
+
+        assert self.cache.get_stats()["hits"] == 1
+        assert self.cache.get_stats()["entries"] == 2
+        [row] = [row for key, row in self.cache._entries.items() if key[-1] == 2]
+        assert all(isinstance(doc_id, str) and isinstance(score, float) for doc_id, score in row)
+
+    def test_mutable_index_is_not_cached(self):
+        vector_db = FAISS.from_texts(["a", "b"], self.embeddings)
+        batch_retrieve_documents(get_retriever(vector_db, k=1), ["a"], show_status=False)
+
+        assert self.cache.get_stats() == {"entries": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+
+
+class TestBatchRerankDocuments:
+    """Test cross-student batch reranking with the score cache."""
+
+    def setup_method(self):
+        clear_rerank_score_cache()
+        self.reranker = Mock()
+        # Score = number of characters shared between answer and chunk
+        self.reranker.predict.side_effect = lambda pairs, batch_size=32: [
+            float(len(set(query) & set(text))) for query, text in pairs
+        ]
+        self.patcher = patch('utils.retrieval.get_reranker_model', return_value=self.reranker)
+        self.patcher.start()
+        self.docs = [Document(page_content=text, metadata={"source": "교과서", "page": i})
+                     for i, text in enumerate(["가나다", "라마바", "가라사", "아자차", "카타파", "하가나"])]
+
+    def teardown_method(self):
+        self.patcher.stop()
+        clear_rerank_score_cache()
+
+    def test_single_predict_call_for_all_students(self):
+        results = batch_rerank_documents([self.docs, self.docs[:3]], ["가나", "라마"], top_n=2, show_status=False)
+
+        assert self.reranker.predict.call_count == 1
+        assert len(self.reranker.predict.call_args[0][0]) == 9
+        assert [d.page_content for d in results[0]] == ["가나다", "하가나"]
+        assert [d.page_content for d in results[1]] == ["라마바", "가라사"]
+
+    def test_matches_single_student_rerank(self):
+        batch = batch_rerank_documents([self.docs], ["가나"], show_status=False)[0]
+        clear_rerank_score_cache()
+        single = rerank_documents(self.docs, "가나", show_status=False)
+
+        assert batch == single
+
+    def test_scores_are_cached_by_answer_and_chunk(self):
+        batch_rerank_documents([self.docs], ["가나"], show_status=False)
+        batch_rerank_documents([self.docs, self.docs[:2]], ["가나", "새 답안"], show_status=False)
+
+        assert self.reranker.predict.call_count == 2
+        # Only the new answer's pairs were scored the second time
+        assert [pair[0] for pair in self.reranker.predict.call_args[0][0]] == ["새 답안", "새 답안"]
+
+    def test_scores_are_shared_by_normalized_answers(self):
+        first = batch_rerank_documents([self.docs], ["가나 다라"], show_status=False)[0]
+        second = batch_rerank_documents([self.docs], ["  가나다라.  "], show_status=False)[0]
+
+        assert self.reranker.predict.call_count == 1
+        assert second == first
+
+    def test_empty_document_lists(self):
+        results = batch_rerank_documents([[], []], ["a", "b"], show_status=False)
+
+        assert results == [[], []]
+        self.reranker.predict.assert_not_called()
+
+
+class TestPipelineBatchRetrieval:
+    """Test that process_batch hands prefetched documents to each student."""
+
+    def setup_method(self):
+        self.docs = {"a": [Document(page_content="A")], "b": [Document(page_content="B")]}
+        self.df = pd.DataFrame({"이름": ["가", "나"], "답안": ["a", "b"]})
+
+    def _run(self, config):
+        pipeline = GradingPipeline(Mock(), Mock(), grading_config=config)
+        received = {}
+
+        def fake_process(student_name, student_answer, *args, retrieved_docs=None, reranked_docs=None, **kwargs):
+            received[student_name] = (retrieved_docs, reranked_docs)
+            return {"이름": student_name}
+
+        with patch('core.grading_pipeline.batch_retrieve_documents',
+                   side_effect=lambda retriever, queries, show_status=True: [self.docs[q] for q in queries]) as mock_retrieve, \
+             patch('core.grading_pipeline.batch_rerank_documents',
+                   side_effect=lambda docs_list, queries, **kwargs: [docs[::-1] for docs in docs_list]) as mock_rerank, \
+             patch.object(pipeline, "process_student_answer", side_effect=fake_process):
+            pipeline.process_batch(self.df, [], "서술형", Mock())
+        return received, mock_retrieve, mock_rerank
+
+    def test_documents_passed_per_student(self):
+        received, mock_retrieve, mock_rerank = self._run(GradingConfig(ConcurrencyMode.THREAD))
+
+        assert mock_retrieve.call_count == 1
+        assert mock_rerank.call_count == 1
+        assert received == {"가": (self.docs["a"], self.docs["a"]), "나": (self.docs["b"], self.docs["b"])}
+
+    def test_batch_rerank_can_be_disabled(self):
+        received, _, mock_rerank = self._run(GradingConfig(ConcurrencyMode.THREAD, batch_rerank=False))
+
+        mock_rerank.assert_not_called()
+        assert received["가"] == (self.docs["a"], None)
+
+
+class TestPipelineRubricRetrieval:
+    """Test that rubric retrieval shares one per-criterion context across students."""
+
+    def setup_method(self):
+        self.rubric = [
+            {"main_criterion": "위치", "sub_criteria": [{"score": 2, "content": "제주도 위치"}]},
+            {"main_criterion": "지형", "sub_criteria": [{"score": 3, "content": "화산 지형"}]},
+        ]
+        self.df = pd.DataFrame({"이름": ["가", "나", "다"], "답안": ["a", "b", "c"]})
+
+    def _run(self, config, rubric=None):
+        pipeline = GradingPipeline(Mock(), Mock(), grading_config=config)
+        received = {}
+
+        def fake_process(student_name, student_answer, *args, retrieved_docs=None, reranked_docs=None, **kwargs):
+            received[student_name] = [doc.page_content for doc in reranked_docs or []]
+            return {"이름": student_name}
+
+        with patch('core.grading_pipeline.batch_retrieve_documents',
+                   side_effect=lambda retriever, queries, show_status=True:
+                   [[Document(page_content=f"{q} 문서 {i}") for i in range(3)] for q in queries]) as mock_retrieve, \
+             patch('core.grading_pipeline.batch_rerank_documents',
+                   side_effect=lambda docs_list, queries, top_n=5, **kwargs:
+                   [docs[:top_n] for docs in docs_list]) as mock_rerank, \
+             patch.object(pipeline, "process_student_answer", side_effect=fake_process):
+            pipeline.process_batch(self.df, self.rubric if rubric is None else rubric, "서술형", Mock())
+        return received, mock_retrieve, mock_rerank
+
+    def test_one_retrieval_per_criterion_shared_by_all_students(self):
+        received, mock_retrieve, mock_rerank = self._run(GradingConfig(ConcurrencyMode.SEQUENTIAL,
+                                                                       rubric_retrieval=True))
+
+        assert mock_retrieve.call_count == 1 and mock_rerank.call_count == 1
+        assert mock_retrieve.call_args[0][1] == ["위치 제주도 위치", "지형 화산 지형"]
+        expected = ["위치 제주도 위치 문서 0", "위치 제주도 위치 문서 1", "지형 화산 지형 문서 0", "지형 화산 지형 문서 1"]
+        assert received == {"가": expected, "나": expected, "다": expected}
+
+    def test_answer_top_k_is_merged_after_shared_context(self):
+        received, mock_retrieve, _ = self._run(GradingConfig(ConcurrencyMode.SEQUENTIAL, rubric_retrieval=True,
+                                                             rubric_context_top_n=1, answer_top_k=1))
+
+        assert mock_retrieve.call_count == 2
+        assert received["나"] == ["위치 제주도 위치 문서 0", "지형 화산 지형 문서 0", "b 문서 0"]
+
+    def test_rubric_without_criteria_falls_back_to_answers(self):
+        received, mock_retrieve, _ = self._run(GradingConfig(ConcurrencyMode.SEQUENTIAL, rubric_retrieval=True),
+                                               rubric=[])
+
+        assert mock_retrieve.call_args[0][1] == ["a", "b", "c"]
+        assert received["가"][0] == "a 문서 0"
@@ -0,0 +1,166 @@
+"""
+Tests for multi-student batched grading prompts.
+"""
+
+import json
+import os
+import re
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.dynamic_models import DynamicModelFactory
+from core.enhanced_response_parser import EnhancedResponseParser
+from core.grading_config import ConcurrencyMode, GradingConfig
+from core.grading_pipeline import GradingPipeline
+from core.parsing_models import ParsingConfig, SuccessLevel
+from models.llm_manager import LLMManager
+from utils.context_builder import build_context
+
+RUBRIC = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+
+
+def grading_object(total=1):
+    return {
+        "채점결과": {"주요_채점_요소_1_점수": total, "세부_채점_요소_1_1_점수": total, "합산_점수": total,
+                 "점수_판단_근거": {"주요_채점_요소_1": "정확함"}},
+        "피드백": {"교과_내용_피드백": "좋습니다.", "의사_응답_여부": False, "의사_응답_설명": ""}
+    }
+
+
+def fake_llm_response(prompt, skip_ids=()):
+    """Answer batched prompts with a JSON array and single prompts with one object."""
+    student_ids = re.findall(r"#### 학생_ID: (S\d+)", prompt)
+    if not student_ids:
+        return json.dumps(grading_object(), ensure_ascii=False)
+    elements = [{"학생_ID": student_id, **grading_object()} for student_id in student_ids
+                if student_id not in skip_ids]
+    return "```json\n" + json.dumps(elements, ensure_ascii=False) + "\n```"
+
+
+class TestBatchResponseParsing:
+    """EnhancedResponseParser splits batched responses per student."""
+
+    def setup_method(self):
+        self.parser = DynamicModelFactory.create_parser(RUBRIC)
+        self.enhanced_parser = EnhancedResponseParser(ParsingConfig(log_all_attempts=False))
+
+    def test_array_elements_are_parsed_per_student(self):
+        response = json.dumps([{"학생_ID": "S2", **grading_object(0)}, {"학생_ID": "S1", **grading_object(1)}],
+                              ensure_ascii=False)
+
+        results = self.enhanced_parser.parse_batch_response(response, self.parser, RUBRIC, ["S1", "S2"])
+
+        assert results["S1"].success_level == SuccessLevel.FULL
+        assert results["S1"].data["채점결과"]["합산_점수"] == 1
+        assert results["S2"].data["채점결과"]["합산_점수"] == 0
+        assert "학생_ID" not in results["S1"].data
+
+    def test_wrapped_and_keyed_responses_are_accepted(self):
+        wrapped = json.dumps({"결과": [{"학생_ID": "S1", **grading_object()}]}, ensure_ascii=False)
+        keyed = json.dumps({"S1": grading_object()}, ensure_ascii=False)
+
+        for response in (wrapped, keyed):
+            results = self.enhanced_parser.parse_batch_response(response, self.parser, RUBRIC, ["S1"])
+            assert results["S1"].success_level == SuccessLevel.FULL
+
+    def test_missing_student_is_reported_as_failed(self):
+        response = json.dumps([{"학생_ID": "S1", **grading_object()}], ensure_ascii=False)
+
+        results = self.enhanced_parser.parse_batch_response(response, self.parser, RUBRIC, ["S1", "S2"])
+
+        assert results["S2"].success_level == SuccessLevel.FAILED
+        assert results["S2"].errors
+
+
+class TestBatchedGradingPipeline:
+    """One LLM call per chunk of answers, with single-answer fallback."""
+
+    def setup_method(self):
+        self.parser = DynamicModelFactory.create_parser(RUBRIC)
+        self.df = pd.DataFrame({"이름": [f"학생{i}" for i in range(5)], "답안": [f"답안 {i}" for i in range(5)]})
+        self.patches = [
+            patch('core.grading_pipeline.batch_retrieve_documents',
+                  side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries]),
+            patch('core.grading_pipeline.batch_rerank_documents',
+                  side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries]),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def teardown_method(self):
+        for p in self.patches:
+            p.stop()
+
+    def _pipeline(self, manager, mode=ConcurrencyMode.SEQUENTIAL, batch_size=2):
+        return GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(mode, batch_grading_size=batch_size)
+        )
+
+    def test_answers_are_graded_in_chunks(self):
+        manager = Mock()
+        manager.call_llm_with_retry.side_effect = lambda llm, prompt: fake_llm_response(prompt)
+
+        results = self._pipeline(manager).process_batch(self.df, RUBRIC, "서술형", self.parser)
+
+        # Chunks of 2, 2 and 1 answers; the last one uses the single-answer prompt
+        assert manager.call_llm_with_retry.call_count == 3
+        assert [r["이름"] for r in results] == list(self.df["이름"])
+        assert all(r["채점결과"]["합산_점수"] == 1 for r in results)
+        assert [r.get("일괄_채점_인원") for r in results] == [2, 2, 2, 2, None]
+
+    def test_missing_element_falls_back_to_single_call(self):
+        manager = Mock()
+        manager.call_llm_with_retry.side_effect = lambda llm, prompt: fake_llm_response(prompt, skip_ids={"S2"})
+        df = self.df.head(3)
+
+        results = self._pipeline(manager, batch_size=3).process_batch(df, RUBRIC, "서술형", self.parser)
+
+        prompts = [call.args[1] for call in manager.call_llm_with_retry.call_args_list]
+        assert len(prompts) == 2
+        assert "답안 1" in prompts[1] and "학생_ID" not in prompts[1]
+        assert all("오류" not in r for r in results)
+        assert "일괄_채점_인원" not in results[1]
+
+    def test_each_result_is_built_from_its_own_element(self):
+        manager = Mock()
+        manager.call_llm_with_retry.side_effect = lambda llm, prompt: fake_llm_response(prompt)
+        pipeline = self._pipeline(manager, batch_size=2)
+
+        with patch.object(pipeline, '_build_result', wraps=pipeline._build_result) as build_result:
+            pipeline.process_batch(self.df.head(2), RUBRIC, "서술형", self.parser)
+
+        responses = [call.args[2] for call in build_result.call_args_list]
+        assert len(responses) == 2
+        assert all(isinstance(json.loads(response), dict) for response in responses)
+
+    def test_context_budget_scales_with_answers_per_call(self):
+        manager = Mock()
+        manager.call_llm_with_retry.side_effect = lambda llm, prompt: fake_llm_response(prompt)
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL, batch_grading_size=3, context_token_budget=100)
+        )
+
+        with patch('core.grading_pipeline.build_context', wraps=build_context) as mock_build:
+            pipeline.process_batch(self.df.head(3), RUBRIC, "서술형", self.parser)
+
+        assert mock_build.call_args.kwargs["token_budget"] == 300
+
+    def test_async_mode_sends_one_request_per_chunk(self):
+        llm_manager = LLMManager()
+        manager = Mock(spec=LLMManager)
+        manager.run_async.side_effect = llm_manager.run_async
+        manager.aget_llm = AsyncMock(return_value=Mock())
+        manager.acall_llm_with_retry = AsyncMock(side_effect=lambda llm, prompt: fake_llm_response(prompt))
+
+        results = self._pipeline(manager, mode=ConcurrencyMode.ASYNC, batch_size=5).process_batch(
+            self.df, RUBRIC, "서술형", self.parser
+        )
+
+        assert manager.acall_llm_with_retry.await_count == 1
+        assert all(r["일괄_채점_인원"] == 5 for r in results)
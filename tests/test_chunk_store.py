@@ -0,0 +1,131 @@
+"""
+Tests for the SQLite chunk store that replaces the pickled docstore.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.chunk_store import SQLiteDocstore, get_chunk_store_path, load_chunk_store, save_chunk_store
+from utils.index_registry import VectorIndexRegistry
+from utils.retrieval import batch_retrieve_documents, get_retriever
+from utils.vector_db import create_vector_db, get_index_path, index_exists
+from utils.vector_index import VectorIndexConfig
+
+
+class TestSQLiteDocstore:
+    """Chunks are stored in SQLite and read back by id."""
+
+    def setup_method(self):
+        self.db_path = tempfile.mkdtemp()
+        self.docs = {
+            "a": Document(page_content="세종대왕은 훈민정음을 창제했다.", metadata={"source": "a.pdf", "page": 3}, id="a"),
+            "b": Document(page_content="임진왜란은 1592년에 일어났다.", metadata={"source": "b.pdf"}, id="b"),
+        }
+
+    def teardown_method(self):
+        shutil.rmtree(self.db_path, ignore_errors=True)
+
+    def test_round_trip_preserves_content_metadata_and_mapping(self):
+        save_chunk_store(self.db_path, InMemoryDocstore(dict(self.docs)), {0: "a", 1: "b"})
+        docstore, index_to_docstore_id = load_chunk_store(self.db_path)
+
+        assert index_to_docstore_id == {0: "a", 1: "b"}
+        assert docstore.search("a") == self.docs["a"]
+        assert docstore.search("missing") == "ID missing not found."
+        assert docstore.mget(["b", "missing", "a"]) == [self.docs["b"], None, self.docs["a"]]
+
+    def test_chunks_missing_from_the_index_are_not_saved(self):
+        save_chunk_store(self.db_path, InMemoryDocstore(dict(self.docs)), {0: "b"})
+        docstore, _ = load_chunk_store(self.db_path)
+
+        assert len(docstore) == 1
+
+    def test_read_only_store_rejects_writes(self):
+        save_chunk_store(self.db_path, InMemoryDocstore(dict(self.docs)), {0: "a", 1: "b"})
+        docstore, _ = load_chunk_store(self.db_path)
+
+        with pytest.raises(sqlite3.OperationalError):
+            docstore.delete(["a"])
+
+    def test_writable_copy_leaves_saved_file_unchanged(self):
+        save_chunk_store(self.db_path, InMemoryDocstore(dict(self.docs)), {0: "a", 1: "b"})
+        copy, _ = load_chunk_store(self.db_path, read_only=False)
+        copy.delete(["a"])
+        copy.add({"c": Document(page_content="새 청크", metadata={}, id="c")})
+
+        with pytest.raises(ValueError):
+            copy.add({"b": self.docs["b"]})
+        assert len(copy) == 2
+        assert len(load_chunk_store(self.db_path)[0]) == 2
+        assert load_chunk_store(self.db_path)[0].search("c") == "ID c not found."
+
+    def test_sparse_stats_are_read_under_the_write_lock(self):
+        save_chunk_store(self.db_path, InMemoryDocstore(dict(self.docs)), {0: "a", 1: "b"})
+        copy, _ = load_chunk_store(self.db_path, read_only=False)
+        copy.sparse_search("훈민정음", k=1)
+        copy.add({"c": Document(page_content="훈민정음 해례본", metadata={}, id="c")})
+
+        with copy._lock:
+            reader = threading.Thread(target=copy.sparse_search, args=("훈민정음", 1))
+            reader.start()
+            reader.join(timeout=0.2)
+            # The reader cannot cache statistics while a writer holds the lock
+            assert reader.is_alive() and copy._sparse_stats is None
+        reader.join()
+        assert copy._sparse_stats[0] == 3
+
+
+class TestVectorStoreWithChunkStore:
+    """Saved indexes use the chunk store and retrieval reads only the hits."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.chunks = [Document(page_content=f"과학 청크 {i}", metadata={"source_file": "a.pdf"}) for i in range(30)]
+        self.registry = VectorIndexRegistry()
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_saved_index_has_no_pickle(self):
+        db_path = get_index_path("fp", self.base_dir)
+        create_vector_db(self.chunks, self.embeddings, db_path, index_config=VectorIndexConfig())
+
+        assert index_exists(db_path)
+        assert os.path.exists(get_chunk_store_path(db_path))
+        assert not os.path.exists(os.path.join(db_path, "index.pkl"))
+
+    def test_batch_retrieval_fetches_only_retrieved_chunks(self):
+        db_path = get_index_path("fp", self.base_dir)
+        create_vector_db(self.chunks, self.embeddings, db_path, index_config=VectorIndexConfig())
+        vector_db = self.registry.get(db_path, self.embeddings)
+
+        with patch.object(SQLiteDocstore, "mget", autospec=True, side_effect=SQLiteDocstore.mget) as mock_mget:
+            results = batch_retrieve_documents(get_retriever(vector_db, k=3), ["과학 청크 4", "과학 청크 9"],
+                                               show_status=False)
+
+        assert mock_mget.call_count == 1
+        assert len(mock_mget.call_args[0][1]) <= 6
+        assert results[0][0].page_content == "과학 청크 4"
+        assert results[1][0].page_content == "과학 청크 9"
+
+    def test_legacy_pickled_index_still_loads(self):
+        db_path = get_index_path("legacy", self.base_dir)
+        FAISS.from_documents(self.chunks, self.embeddings).save_local(db_path)
+
+        assert index_exists(db_path)
+        vector_db = self.registry.get(db_path, self.embeddings)
+        assert vector_db.similarity_search("과학 청크 2", k=1)[0].page_content == "과학 청크 2"
@@ -0,0 +1,275 @@
+"""
+Tests for concurrent batch grading.
+
+Validates that the bounded worker pool and the asyncio path keep result order
+stable, report progress from the calling thread and isolate per-student failures.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pandas as pd
+import pytest
+
+from core.concurrency import run_ordered, run_ordered_coroutines
+from core.dynamic_models import DynamicModelFactory
+from core.grading_config import GradingConfig, ConcurrencyMode
+from core.grading_pipeline import GradingPipeline
+from models.llm_manager import LLMManager
+
+
+class TestRunOrdered:
+    """Test the ordered worker pool helper."""
+
+    def test_results_keep_task_order(self):
+        """Results are returned in task order even when later tasks finish first."""
+        delays = [0.05, 0.01, 0.03, 0.0]
+        tasks = [lambda d=d, i=i: (time.sleep(d), i)[1] for i, d in enumerate(delays)]
+
+        results = run_ordered(tasks, max_workers=4)
+
+        assert results == [0, 1, 2, 3]
+
+    def test_progress_reported_from_calling_thread(self):
+        """Progress callback runs on the caller's thread once per task."""
+        caller = threading.current_thread()
+        calls = []
+
+        def on_progress(completed, total):
+            assert threading.current_thread() is caller
+            calls.append((completed, total))
+
+        run_ordered([lambda: 1, lambda: 2, lambda: 3], max_workers=3, progress_callback=on_progress)
+
+        assert calls == [(1, 3), (2, 3), (3, 3)]
+
+    def test_error_handler_isolates_failures(self):
+        """A failing task yields the error handler's result without affecting others."""
+        def failing():
+            raise ValueError("boom")
+
+        results = run_ordered(
+            [lambda: "ok", failing, lambda: "ok"],
+            max_workers=2,
+            error_handler=lambda index, error: f"error-{index}: {error}"
+        )
+
+        assert results == ["ok", "error-1: boom", "ok"]
+
+    def test_sequential_mode_without_handler_raises(self):
+        """Without an error handler, exceptions propagate."""
+        def failing():
+            raise RuntimeError("fail")
+
+        with pytest.raises(RuntimeError):
+            run_ordered([failing], max_workers=1)
+
+    def test_bounded_concurrency(self):
+        """No more than max_workers tasks run at the same time."""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def task():
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+
+        run_ordered([task] * 10, max_workers=3)
+
+        assert state["peak"] <= 3
+
+
+class TestConcurrentProcessBatch:
+    """Test GradingPipeline.process_batch with the worker pool."""
+
+    def setup_method(self):
+        self.rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        self.df = pd.DataFrame({
+            "이름": [f"학생{i}" for i in range(6)],
+            "답안": [f"답안 {i}" for i in range(6)]
+        })
+        # Batch retrieval/reranking happen before the per-student tasks; keep them out of these tests
+        self.patchers = [
+            patch('core.grading_pipeline.batch_retrieve_documents',
+                  side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries]),
+            patch('core.grading_pipeline.batch_rerank_documents',
+                  side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries]),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+    
+    def teardown_method(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def _make_pipeline(self, config):
+        return GradingPipeline(llm_manager=Mock(), retriever=Mock(), grading_config=config)
+
+    def test_batch_results_in_row_order(self):
+        """Concurrent batch grading preserves DataFrame row order."""
+        pipeline = self._make_pipeline(GradingConfig(ConcurrencyMode.THREAD, max_workers=4))
+
+        def fake_process(student_name, student_answer, rubric, question_type, parser, show_status=True,
+                         **kwargs):
+            time.sleep(0.01 * (6 - int(student_name[-1])))
+            return {"이름": student_name, "답안": student_answer, "show_status": show_status}
+
+        with patch.object(pipeline, "process_student_answer", side_effect=fake_process):
+            results = pipeline.process_batch(self.df, self.rubric, "서술형", Mock())
+
+        assert [r["이름"] for r in results] == list(self.df["이름"])
+        # Streamlit status messages are suppressed off the script thread
+        assert all(r["show_status"] is False for r in results)
+
+    def test_sequential_mode_keeps_status_messages(self):
+        """Sequential mode grades on the calling thread and keeps status messages."""
+        pipeline = self._make_pipeline(GradingConfig(ConcurrencyMode.SEQUENTIAL))
+        progress = []
+
+        with patch.object(pipeline, "process_student_answer",
+                          side_effect=lambda name, *args, show_status=True, **kwargs: {"이름": name, "show_status": show_status}):
+            results = pipeline.process_batch(
+                self.df, self.rubric, "서술형", Mock(),
+                progress_callback=lambda completed, total: progress.append(completed)
+            )
+
+        assert all(r["show_status"] is True for r in results)
+        assert progress == [1, 2, 3, 4, 5, 6]
+
+    def test_unexpected_error_becomes_student_error(self):
+        """An exception escaping the per-student path is reported for that student only."""
+        pipeline = self._make_pipeline(GradingConfig(ConcurrencyMode.THREAD, max_workers=2))
+
+        def fake_process(student_name, *args, show_status=True, **kwargs):
+            if student_name == "학생2":
+                raise RuntimeError("unexpected")
+            return {"이름": student_name}
+
+        with patch.object(pipeline, "process_student_answer", side_effect=fake_process):
+            results = pipeline.process_batch(self.df, self.rubric, "서술형", Mock())
+
+        assert results[2]["이름"] == "학생2"
+        assert "unexpected" in results[2]["오류"]
+        assert all("오류" not in r for i, r in enumerate(results) if i != 2)
+
+
+class TestAsyncGrading:
+    """Test the asyncio grading path and the async LLM manager API."""
+
+    def setup_method(self):
+        self.rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        self.parser = DynamicModelFactory.create_parser(self.rubric)
+        self.llm_manager = LLMManager()
+        self.response = json.dumps({
+            "채점결과": {"주요_채점_요소_1_점수": 1, "세부_채점_요소_1_1_점수": 1, "합산_점수": 1,
+                     "점수_판단_근거": {"주요_채점_요소_1": "정확함"}},
+            "피드백": {"교과_내용_피드백": "좋습니다.", "의사_응답_여부": False, "의사_응답_설명": ""}
+        }, ensure_ascii=False)
+
+    def test_run_ordered_coroutines_keeps_order(self):
+        """Coroutines run on the manager's loop and results come back in order."""
+        async def job(i):
+            await asyncio.sleep(0.01 * (5 - i))
+            return i
+
+        progress = []
+        results = run_ordered_coroutines(
+            [lambda i=i: job(i) for i in range(5)],
+            submit=self.llm_manager.run_async,
+            max_concurrency=5,
+            progress_callback=lambda completed, total: progress.append(completed)
+        )
+
+        assert results == [0, 1, 2, 3, 4]
+        assert progress == [1, 2, 3, 4, 5]
+
+    def test_acall_llm_with_retry_uses_ainvoke(self):
+        """The async retry loop awaits ainvoke and retries after a failure."""
+        llm = Mock()
+        llm.ainvoke = AsyncMock(side_effect=[RuntimeError("temporary"), Mock(content="ok")])
+
+        result = asyncio.run(self.llm_manager.acall_llm_with_retry(llm, "prompt", max_retries=3, delay=0))
+
+        assert result == "ok"
+        assert llm.ainvoke.await_count == 2
+
+    @patch('core.grading_pipeline.get_grading_prompt', return_value="prompt")
+    @patch('core.grading_pipeline.batch_rerank_documents',
+           side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries])
+    @patch('core.grading_pipeline.batch_retrieve_documents',
+           side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries])
+    def test_async_process_batch(self, mock_retrieve, mock_rerank, mock_prompt):
+        """ASYNC mode grades every student through the async LLM API."""
+        manager = Mock(spec=LLMManager)
+        manager.run_async.side_effect = self.llm_manager.run_async
+        manager.aget_llm = AsyncMock(return_value=Mock())
+        manager.acall_llm_with_retry = AsyncMock(return_value=self.response)
+
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.ASYNC, max_concurrent_requests=8)
+        )
+        df = pd.DataFrame({"이름": ["가", "나", "다"], "답안": ["a", "b", "c"]})
+
+        results = pipeline.process_batch(df, self.rubric, "서술형", self.parser)
+
+        assert [r["이름"] for r in results] == ["가", "나", "다"]
+        assert all(r["채점결과"]["합산_점수"] == 1 for r in results)
+        assert manager.acall_llm_with_retry.await_count == 3
+        manager.get_llm.assert_not_called()
+
+    @patch('core.grading_pipeline.get_grading_prompt', return_value="prompt")
+    @patch('core.grading_pipeline.batch_rerank_documents',
+           side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries])
+    @patch('core.grading_pipeline.batch_retrieve_documents',
+           side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries])
+    def test_aprocess_batch_survives_caller_loops_closing(self, mock_retrieve, mock_rerank, mock_prompt):
+        """LLM calls from aprocess_batch run on the manager's loop, not on the caller's short-lived loops."""
+        call_loops = []
+
+        async def fake_call(llm, prompt):
+            call_loops.append(asyncio.get_running_loop())
+            return self.response
+
+        manager = Mock(spec=LLMManager)
+        manager.run_async.side_effect = self.llm_manager.run_async
+        manager.aget_llm = AsyncMock(return_value=Mock())
+        manager.acall_llm_with_retry = AsyncMock(side_effect=fake_call)
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.ASYNC, max_concurrent_requests=8)
+        )
+        df = pd.DataFrame({"이름": ["가", "나"], "답안": ["a", "b"]})
+
+        for _ in range(2):
+            results = asyncio.run(pipeline.aprocess_batch(df, self.rubric, "서술형", self.parser))
+            assert all(r["채점결과"]["합산_점수"] == 1 for r in results)
+
+        manager_loop = self.llm_manager._get_event_loop()
+        assert len(call_loops) == 4
+        assert all(loop is manager_loop for loop in call_loops)
+        assert not manager_loop.is_closed()
+
+    def test_pipeline_uses_selected_model(self):
+        """The pipeline requests the provider/model it was configured with."""
+        manager = Mock()
+        manager.get_llm.return_value = Mock()
+        manager.call_llm_with_retry.return_value = self.response
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL),
+            llm_provider="OpenAI", llm_model="gpt-5"
+        )
+
+        with patch('core.grading_pipeline.retrieve_documents', return_value=[]), \
+             patch('core.grading_pipeline.rerank_documents', return_value=[]), \
+             patch('core.grading_pipeline.get_grading_prompt', return_value="prompt"):
+            pipeline.process_student_answer("가", "a", self.rubric, "서술형", self.parser, show_status=False)
+
+        manager.get_llm.assert_called_once_with("OpenAI", "gpt-5")
@@ -0,0 +1,108 @@
+"""
+Tests for the token-aware reference context builder.
+"""
+
+import os
+import sys
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain.docstore.document import Document
+
+from core.dynamic_models import DynamicModelFactory
+from core.grading_config import ConcurrencyMode, GradingConfig
+from core.grading_pipeline import GradingPipeline
+from utils.context_builder import build_context, estimate_text_tokens, overlap_length, remove_overlaps
+from utils.text_splitter import split_documents
+
+SOURCE_TEXT = (
+    "제주도는 화산 활동으로 형성된 섬으로 현무암과 오름이 분포한다. "
+    "한라산 정상에는 백록담이라는 화구호가 있다. "
+    "해안 침식으로 해식애와 파식대가 발달하며 동해안에서 잘 나타난다. "
+    "카르스트 지형은 석회암이 빗물에 용식되어 돌리네를 만든다. "
+    "충적 평야는 하천의 퇴적 작용으로 형성되며 범람원이 넓게 나타난다. "
+    "우리나라의 벼농사는 여름철 고온 다습한 계절풍 기후에 유리하다."
+)
+
+
+class TestOverlapRemoval:
+    """Text repeated between overlapping chunks is kept once."""
+
+    def test_overlap_length_finds_suffix_prefix_match(self):
+        assert overlap_length("가나다라마바사아자차", "아자차카타파", min_overlap=3) == 3
+        assert overlap_length("가나다라마바사아자차", "카타파하", min_overlap=3) == 0
+
+    def test_split_chunks_are_restored_without_repetition(self):
+        chunks = split_documents([Document(page_content=SOURCE_TEXT)], chunk_size=80, chunk_overlap=40)
+        assert len(chunks) > 2
+
+        pieces = remove_overlaps([chunk.page_content for chunk in chunks])
+
+        assert " ".join(piece for piece in pieces if piece) == SOURCE_TEXT
+
+    def test_reranked_order_removes_overlap_in_both_directions(self):
+        chunks = [chunk.page_content for chunk in
+                  split_documents([Document(page_content=SOURCE_TEXT)], chunk_size=80, chunk_overlap=40)]
+
+        pieces = remove_overlaps([chunks[1], chunks[0]])
+
+        assert pieces[0] == chunks[1]
+        assert pieces[1] and chunks[0].startswith(pieces[1])
+        assert pieces[1] not in chunks[1]
+
+
+class TestBuildContext:
+    """Budgeted sentence selection and token reporting."""
+
+    def setup_method(self):
+        self.docs = [Document(page_content=SOURCE_TEXT)]
+
+    def test_without_budget_content_is_unchanged(self):
+        context = build_context(self.docs, query="제주도", token_budget=0)
+
+        assert context.content == SOURCE_TEXT
+        assert context.tokens_saved == 0
+
+    def test_budget_keeps_sentences_relevant_to_answer(self):
+        context = build_context(self.docs, query="카르스트 지형의 돌리네", token_budget=40)
+
+        assert "돌리네" in context.content
+        assert "벼농사" not in context.content
+        assert context.context_tokens <= 40
+        assert context.tokens_saved == estimate_text_tokens(SOURCE_TEXT) - context.context_tokens
+
+    def test_custom_token_counter_is_used(self):
+        count_tokens = Mock(side_effect=lambda text: len(text.split()))
+
+        context = build_context(self.docs, query="한라산 백록담", token_budget=8, count_tokens=count_tokens)
+
+        assert context.content == "한라산 정상에는 백록담이라는 화구호가 있다."
+        assert context.original_tokens == len(SOURCE_TEXT.split())
+
+
+class TestPipelineContext:
+    """The grading prompt carries the compressed context and reports the savings."""
+
+    def test_result_reports_tokens_saved(self):
+        rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        parser = DynamicModelFactory.create_parser(rubric)
+        chunks = split_documents([Document(page_content=SOURCE_TEXT)], chunk_size=80, chunk_overlap=40)
+        manager = Mock()
+        manager.call_llm_with_retry.return_value = (
+            '{"채점결과": {"주요_채점_요소_1_점수": 1, "세부_채점_요소_1_1_점수": 1, "합산_점수": 1, '
+            '"점수_판단_근거": {}}, "피드백": {"교과_내용_피드백": "좋음", "의사_응답_여부": false, '
+            '"의사_응답_설명": ""}}'
+        )
+        pipeline = GradingPipeline(llm_manager=manager, retriever=Mock(),
+                                   grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL))
+
+        with patch('core.grading_pipeline.get_token_counter', return_value=estimate_text_tokens):
+            result = pipeline.process_student_answer("가", "제주도의 오름", rubric, "서술형", parser,
+                                                     show_status=False, reranked_docs=chunks)
+
+        prompt = manager.call_llm_with_retry.call_args.args[1]
+        assert prompt.count("한라산 정상에는 백록담이라는 화구호가 있다.") == 1
+        assert result["참고자료_절약_토큰"] > 0
+        original = "\n\n".join(chunk.page_content for chunk in chunks)
+        assert result["참고자료_토큰"] + result["참고자료_절약_토큰"] == estimate_text_tokens(original)
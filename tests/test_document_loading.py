@@ -0,0 +1,213 @@
+"""
+Tests for parallel, in-memory source loading.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.file_service import FileService
+from utils.data_loader import WORD_MIME_TYPES, _load_file, load_documents_parallel
+from utils.text_splitter import split_documents
+
+
+class TestLoadDocumentsParallel:
+    """Process-pool loading with per-file error isolation."""
+
+    def setup_method(self):
+        self.cwd = os.getcwd()
+        self.work_dir = tempfile.mkdtemp()
+        os.chdir(self.work_dir)
+
+    def teardown_method(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_loads_files_in_process_pool_and_isolates_errors(self):
+        files = [
+            ("a.txt", "text/plain", "수도권 인구 집중".encode("utf-8")),
+            ("b.bin", "application/octet-stream", b"\x00"),
+            ("c.txt", "text/plain", "제주도 화산 지형".encode("utf-8")),
+        ]
+
+        results = {name: (documents, error) for name, documents, error in load_documents_parallel(files, max_workers=2)}
+
+        assert set(results) == {"a.txt", "b.bin", "c.txt"}
+        assert results["a.txt"][0][0].page_content == "수도권 인구 집중"
+        assert results["c.txt"][0][0].page_content == "제주도 화산 지형"
+        assert results["b.bin"][0] == []
+        assert "Unsupported file type" in results["b.bin"][1]
+
+    def test_zero_workers_loads_in_current_process(self):
+        files = [("a.txt", "text/plain", b"one"), ("b.txt", "text/plain", b"two")]
+
+        with patch("utils.data_loader._get_process_pool") as mock_pool:
+            results = list(load_documents_parallel(files, max_workers=0))
+
+        mock_pool.assert_not_called()
+        assert [name for name, _, _ in results] == ["a.txt", "b.txt"]
+
+    def test_broken_pool_falls_back_to_current_process(self):
+        files = [("a.txt", "text/plain", b"one"), ("b.txt", "text/plain", b"two")]
+
+        with patch("utils.data_loader._get_process_pool", side_effect=OSError("no processes")):
+            results = list(load_documents_parallel(files, max_workers=2))
+
+        assert sorted(name for name, _, error in results if error is None) == ["a.txt", "b.txt"]
+
+
+class TestProcessUploadedFiles:
+    """FileService streams loaded files into chunking."""
+
+    def setup_method(self):
+        self.state = {}
+        state_manager = Mock()
+        state_manager.get.side_effect = lambda key, default=None: self.state.get(key, default)
+        state_manager.set.side_effect = lambda key, value: self.state.__setitem__(key, value)
+        state_manager.update.side_effect = lambda **kwargs: self.state.update(kwargs)
+        with patch("services.file_service.get_embedding_model", return_value=DeterministicFakeEmbedding(size=8)):
+            self.file_service = FileService(state_manager)
+
+    @staticmethod
+    def _upload(name, file_id):
+        uploaded = Mock(file_id=file_id, type="text/plain")
+        uploaded.name = name
+        uploaded.getvalue.return_value = name.encode("utf-8")
+        return uploaded
+
+    def test_successful_files_are_chunked_and_failures_reported(self):
+        results = iter([
+            ("b.txt", [], "파싱 실패"),
+            ("a.txt", [Document(page_content="지리 " * 400)], None),
+        ])
+        progress = []
+
+        with patch("services.file_service.load_documents_parallel", return_value=results):
+            errors = self.file_service.process_uploaded_files(
+                [self._upload("a.txt", "1"), self._upload("b.txt", "2")],
+                progress_callback=lambda *args: progress.append(args)
+            )
+
+        assert errors == {"b.txt": "파싱 실패"}
+        assert progress == [(1, 2, "b.txt", "파싱 실패"), (2, 2, "a.txt", None)]
+        assert self.file_service.get_source_file_names() == ["a.txt"]
+        assert self.state['chunks'] and all(c.metadata["source_file"] == "a.txt" for c in self.state['chunks'])
+        assert self.state['chunk_settings'] == {"chunk_size": 1000, "chunk_overlap": 200}
+
+    def test_different_files_with_the_same_name_are_both_loaded(self):
+        first, second, repeat = self._upload("notes.txt", "1"), self._upload("notes.txt", "2"), self._upload("notes.txt", "3")
+        second.getvalue.return_value = "다른 폴더의 노트".encode("utf-8")
+        progress = []
+
+        def load(payloads):
+            return iter((name, [Document(page_content=content.decode("utf-8"))], None) for name, _, content in payloads)
+
+        with patch("services.file_service.load_documents_parallel", side_effect=load) as mock_load:
+            errors = self.file_service.process_uploaded_files(
+                [first, second, repeat], progress_callback=lambda *args: progress.append(args)
+            )
+
+        assert errors == {}
+        assert [name for name, _, _ in mock_load.call_args.args[0]] == ["notes.txt", "notes (2).txt"]
+        assert progress == [(1, 2, "notes.txt", None), (2, 2, "notes (2).txt", None)]
+        assert sorted(self.file_service.get_source_file_names()) == ["notes (2).txt", "notes.txt"]
+
+    def test_already_processed_uploads_are_skipped(self):
+        upload = self._upload("a.txt", "1")
+        with patch("services.file_service.load_documents_parallel",
+                   return_value=iter([("a.txt", [Document(page_content="지리")], None)])) as mock_load:
+            self.file_service.process_uploaded_files([upload])
+            self.file_service.process_uploaded_files([upload])
+
+        assert mock_load.call_count == 1
+
+    def test_rechunking_only_splits_files_with_other_settings(self):
+        with patch("services.file_service.load_documents_parallel",
+                   return_value=iter([("a.txt", [Document(page_content="지리 " * 400)], None)])):
+            self.file_service.process_uploaded_files([self._upload("a.txt", "1")])
+
+        with patch("services.file_service.split_documents", wraps=split_documents) as mock_split:
+            self.file_service.create_chunks(1000, 200)
+            assert mock_split.call_count == 0
+            self.file_service.create_chunks(500, 50)
+            assert mock_split.call_count == 1
+
+
+def _make_pdf(page_texts):
+    """Build a minimal PDF with one line of ASCII text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return output
+
+
+class TestInMemoryLoading:
+    """Uploads are parsed from memory without writing to ./data."""
+
+    def setup_method(self):
+        self.cwd = os.getcwd()
+        self.work_dir = tempfile.mkdtemp()
+        os.chdir(self.work_dir)
+
+    def teardown_method(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_pdf_is_parsed_from_bytes_page_by_page(self):
+        documents = _load_file("textbook.pdf", "application/pdf", _make_pdf(["Seoul metropolitan area", "Jeju island"]))
+
+        assert [doc.page_content for doc in documents] == ["Seoul metropolitan area", "Jeju island"]
+        assert [doc.metadata["page"] for doc in documents] == [0, 1]
+        assert documents[0].metadata["source"] == "textbook.pdf"
+        assert not os.path.exists("data")
+
+    def test_text_is_decoded_without_a_file(self):
+        [utf8_doc] = _load_file("a.txt", "text/plain", "수도권 인구 집중".encode("utf-8"))
+        [cp949_doc] = _load_file("b.txt", "text/plain", "제주도 화산 지형".encode("cp949"))
+
+        assert utf8_doc.page_content == "수도권 인구 집중"
+        assert cp949_doc.page_content == "제주도 화산 지형"
+        assert utf8_doc.metadata == {"source": "a.txt"}
+        assert not os.path.exists("data")
+
+    def test_path_based_loader_uses_temp_file_that_is_removed(self):
+        seen_paths = []
+
+        class FakeWordLoader:
+            def __init__(self, file_path):
+                seen_paths.append(file_path)
+
+            def load(self):
+                with open(seen_paths[-1], "rb") as f:
+                    return [Document(page_content=f.read().decode("utf-8"), metadata={"source": seen_paths[-1]})]
+
+        with patch("utils.data_loader.UnstructuredWordDocumentLoader", FakeWordLoader):
+            [document] = _load_file("보고서.docx", WORD_MIME_TYPES[0], "본문".encode("utf-8"))
+
+        assert document.page_content == "본문"
+        assert document.metadata["source"] == "보고서.docx"
+        assert os.path.basename(seen_paths[0]) == "보고서.docx"
+        assert not os.path.exists(seen_paths[0])
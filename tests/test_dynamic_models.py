@@ -0,0 +1,74 @@
+"""
+Tests for the dynamic grading model cache.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.dynamic_models import (
+    DynamicModelFactory, clear_model_cache, get_default_parser, get_model_cache_stats, get_rubric_signature
+)
+from core.parsing_models import ParsingConfig
+from core.validation_engine import ValidationEngine
+
+
+def make_rubric(*sub_counts, label="지형"):
+    return [
+        {
+            'main_criterion': f'{label} 요소 {i + 1}',
+            'sub_criteria': [{'score': j + 1, 'content': f'{label} 내용 {i + 1}-{j + 1}'} for j in range(count)]
+        }
+        for i, count in enumerate(sub_counts)
+    ]
+
+
+class TestDynamicModelCache:
+    """Models, parsers and schemas are shared per rubric structure."""
+
+    def setup_method(self):
+        clear_model_cache()
+
+    def test_signature_ignores_rubric_text(self):
+        assert get_rubric_signature(make_rubric(2, 1)) == (2, 1)
+        assert get_rubric_signature(make_rubric(2, 1, label="기후")) == (2, 1)
+        assert get_rubric_signature(make_rubric(1, 2)) != (2, 1)
+
+    def test_same_structure_reuses_parser_and_model(self):
+        parser = DynamicModelFactory.create_parser(make_rubric(2, 1))
+
+        assert DynamicModelFactory.create_parser(make_rubric(2, 1, label="기후")) is parser
+        assert DynamicModelFactory.create_grading_output_model(make_rubric(2, 1)) is parser.pydantic_object
+        assert DynamicModelFactory.create_parser(make_rubric(1, 2)) is not parser
+        assert get_model_cache_stats() == {"entries": 2, "hits": 2, "misses": 2}
+
+    def test_format_instructions_rendered_once(self):
+        parser = DynamicModelFactory.create_parser(make_rubric(2))
+        instructions = DynamicModelFactory.get_grading_models(make_rubric(2)).format_instructions
+
+        with patch.object(parser.pydantic_object, "model_json_schema") as mock_schema:
+            assert parser.get_format_instructions() == instructions
+        mock_schema.assert_not_called()
+        assert "세부_채점_요소_1_2_점수" in instructions
+
+    def test_parser_still_parses_matching_output(self):
+        parser = get_default_parser()
+        result = parser.parse(
+            '{"채점결과": {"주요_채점_요소_1_점수": 1, "세부_채점_요소_1_1_점수": 1, "합산_점수": 1, '
+            '"점수_판단_근거": {}}, "피드백": {"교과_내용_피드백": "좋음", "의사_응답_여부": false, '
+            '"의사_응답_설명": ""}}'
+        )
+
+        assert result.채점결과.합산_점수 == 1
+        assert get_default_parser() is parser
+
+    def test_validation_engine_uses_cached_adaptive_schema(self):
+        engine = ValidationEngine(ParsingConfig())
+        schema = engine._create_adaptive_schema(make_rubric(2, 1))
+        properties = schema["properties"]["채점결과"]["properties"]
+
+        assert engine._create_adaptive_schema(make_rubric(2, 1, label="기후")) is schema
+        assert {"주요_채점_요소_2_점수", "세부_채점_요소_1_2_점수", "합산_점수"} <= set(properties)
+        assert "세부_채점_요소_2_2_점수" not in properties
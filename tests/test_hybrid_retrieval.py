@@ -0,0 +1,116 @@
+"""
+Tests for hybrid BM25 + dense retrieval.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.index_registry import VectorIndexRegistry
+from utils.retrieval import (
+    HybridRetriever, RetrievalConfig, batch_retrieve_documents, get_retriever, reciprocal_rank_fusion
+)
+from utils.retrieval_benchmark import benchmark_retrieval, make_known_item_queries
+from utils.sparse_index import tokenize_korean
+from utils.vector_db import create_vector_db, get_index_path
+from utils.vector_index import VectorIndexConfig
+
+
+class SymmetricFakeEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings declared symmetric, so batch retrieval embeds all queries at once."""
+    symmetric_query_embeddings: bool = True
+
+
+GEOGRAPHY_CHUNKS = [
+    "제주도는 화산 활동으로 형성된 섬으로 현무암과 오름이 분포한다.",
+    "해안 침식으로 해식애와 파식대가 발달하며 동해안에서 잘 나타난다.",
+    "감입 곡류 하천은 산지 사이를 깊게 파고들며 흐른다.",
+    "카르스트 지형은 석회암이 빗물에 용식되어 돌리네를 만든다.",
+    "우리나라의 벼농사는 여름철 고온 다습한 계절풍 기후에 유리하다.",
+    "충적 평야는 하천의 퇴적 작용으로 형성되며 범람원이 넓게 나타난다.",
+]
+
+
+class TestKoreanTokenizer:
+    """Character n-gram tokenization."""
+
+    def test_hangul_words_split_into_bigrams(self):
+        assert tokenize_korean("제주도는") == ["제주", "주도", "도는"]
+
+    def test_short_words_and_latin_kept_whole(self):
+        assert tokenize_korean("섬 DMZ 2024년") == ["섬", "dmz", "2024", "년"]
+
+    def test_particles_do_not_hide_terms(self):
+        assert set(tokenize_korean("제주")) <= set(tokenize_korean("제주에서는 해안이"))
+
+
+class TestReciprocalRankFusion:
+    """Rank-based fusion of dense and sparse results."""
+
+    def test_documents_ranked_by_both_come_first(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], rrf_k=60)
+        assert fused[:2] == ["a", "c"]
+        assert set(fused) == {"a", "b", "c", "d"}
+
+
+class TestHybridRetriever:
+    """Hybrid retrieval over the SQLite chunk store."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        # Random embeddings: exact-term matches can only come from the BM25 side
+        self.embeddings = SymmetricFakeEmbedding(size=16)
+        chunks = [Document(page_content=text, metadata={"source_file": "geo.pdf"}) for text in GEOGRAPHY_CHUNKS]
+        db_path = get_index_path("geo", self.base_dir)
+        create_vector_db(chunks, self.embeddings, db_path, index_config=VectorIndexConfig())
+        self.vector_db = VectorIndexRegistry().get(db_path, self.embeddings)
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_sparse_search_finds_exact_terms(self):
+        [(doc_id, score)] = self.vector_db.docstore.sparse_search("해안 침식", k=1)
+        assert self.vector_db.docstore.search(doc_id).page_content == GEOGRAPHY_CHUNKS[1]
+        assert score > 0
+
+    def test_get_retriever_selects_mode(self):
+        assert isinstance(get_retriever(self.vector_db, k=2, config=RetrievalConfig(mode="hybrid")), HybridRetriever)
+        assert not isinstance(get_retriever(self.vector_db, k=2, config=RetrievalConfig(mode="dense")),
+                              HybridRetriever)
+
+    def test_pickled_docstore_falls_back_to_dense(self):
+        vector_db = FAISS.from_texts(GEOGRAPHY_CHUNKS, self.embeddings)
+        assert not isinstance(get_retriever(vector_db, k=2, config=RetrievalConfig(mode="hybrid")), HybridRetriever)
+
+    def test_hybrid_retrieval_matches_place_names(self):
+        retriever = get_retriever(self.vector_db, k=2, config=RetrievalConfig(mode="hybrid"))
+
+        assert retriever.invoke("제주의 오름")[0].page_content == GEOGRAPHY_CHUNKS[0]
+        batch = batch_retrieve_documents(retriever, ["제주의 오름", "카르스트 돌리네"], show_status=False)
+        assert [docs[0].page_content for docs in batch] == [GEOGRAPHY_CHUNKS[0], GEOGRAPHY_CHUNKS[3]]
+        assert all(len(docs) == 2 for docs in batch)
+
+    def test_batch_hybrid_embeds_queries_once(self):
+        retriever = get_retriever(self.vector_db, k=2, config=RetrievalConfig(mode="hybrid"))
+        with patch.object(DeterministicFakeEmbedding, "embed_documents", autospec=True,
+                          side_effect=DeterministicFakeEmbedding.embed_documents) as mock_embed:
+            batch_retrieve_documents(retriever, ["제주", "해안", "평야"], show_status=False)
+        mock_embed.assert_called_once()
+
+    def test_benchmark_reports_hybrid_recall_gain(self):
+        documents = [(doc_id, self.vector_db.docstore.search(doc_id).page_content)
+                     for doc_id in self.vector_db.index_to_docstore_id.values()]
+        queries = make_known_item_queries(documents, num_queries=6, span_chars=15)
+        results = {(r["mode"], r["k"]): r for r in benchmark_retrieval(self.vector_db, queries, ks=(1, 3))}
+
+        assert results[("hybrid", 1)]["recall_at_k"] == 1.0
+        assert results[("hybrid", 1)]["recall_at_k"] >= results[("dense", 1)]["recall_at_k"]
+        assert results[("hybrid", 3)]["rerank_pairs"] == 18
@@ -0,0 +1,94 @@
+"""
+Tests for the process-wide shared vector index registry.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.chunk_store import load_chunk_store
+from utils.index_registry import ReadOnlyFAISS, VectorIndexRegistry
+from utils.vector_db import create_vector_db, get_index_path, load_or_create_vector_db
+from utils.vector_index import VectorIndexConfig
+
+
+class TestVectorIndexRegistry:
+    """Indexes are loaded once per process and shared read-only."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.chunks = [Document(page_content=f"역사 청크 {i}", metadata={"source_file": "a.pdf"}) for i in range(20)]
+        self.registry = VectorIndexRegistry(max_entries=2)
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def _create(self, name: str, config: VectorIndexConfig = None) -> str:
+        db_path = get_index_path(name, self.base_dir)
+        create_vector_db(self.chunks, self.embeddings, db_path, index_config=config or VectorIndexConfig())
+        return db_path
+
+    def test_loads_each_index_once(self):
+        db_path = self._create("a")
+        with patch("utils.index_registry.load_chunk_store", wraps=load_chunk_store) as mock_open_store:
+            first = self.registry.get(db_path, self.embeddings)
+            second = self.registry.get(db_path, self.embeddings)
+
+        assert first is second
+        assert mock_open_store.call_count == 1
+        assert self.registry.get_stats() == {"entries": 1, "hits": 1, "loads": 1}
+        assert first.similarity_search("역사 청크 3", k=1)[0].page_content == "역사 청크 3"
+
+    def test_mmap_loaded_hnsw_is_searchable(self):
+        config = VectorIndexConfig(index_type="hnsw", train_threshold=10, ef_search=12)
+        store = self.registry.get(self._create("hnsw", config), self.embeddings, config)
+
+        assert store.index.hnsw.efSearch == 12
+        assert store.similarity_search("역사 청크 11", k=1)[0].page_content == "역사 청크 11"
+
+    def test_shared_handle_rejects_mutation(self):
+        store = self.registry.get(self._create("a"), self.embeddings)
+
+        assert isinstance(store, ReadOnlyFAISS)
+        with pytest.raises(PermissionError):
+            store.add_texts(["새 청크"])
+        with pytest.raises(PermissionError):
+            store.delete([store.index_to_docstore_id[0]])
+        assert store.index.ntotal == 20
+
+    def test_resaved_index_is_reloaded(self):
+        db_path = self._create("a")
+        first = self.registry.get(db_path, self.embeddings)
+        os.utime(os.path.join(db_path, "index.faiss"), (1, 1))
+
+        assert self.registry.get(db_path, self.embeddings) is not first
+        assert self.registry.get_stats()["loads"] == 2
+
+    def test_least_recently_used_index_is_released(self):
+        paths = [self._create(name) for name in ("a", "b", "c")]
+        first = self.registry.get(paths[0], self.embeddings)
+        self.registry.get(paths[1], self.embeddings)
+        self.registry.get(paths[2], self.embeddings)
+
+        assert self.registry.get_stats()["entries"] == 2
+        assert self.registry.get(paths[0], self.embeddings) is not first
+
+    def test_load_or_create_returns_shared_handle(self):
+        with patch("utils.vector_db.get_index_registry", return_value=self.registry):
+            built = load_or_create_vector_db(self.chunks, self.embeddings, "fp", base_dir=self.base_dir,
+                                             index_config=VectorIndexConfig())
+            loaded = load_or_create_vector_db(self.chunks, self.embeddings, "fp", base_dir=self.base_dir,
+                                              index_config=VectorIndexConfig())
+
+        assert isinstance(built, ReadOnlyFAISS)
+        assert loaded is built
+        assert self.registry.get_stats()["loads"] == 1
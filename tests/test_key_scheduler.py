@@ -0,0 +1,264 @@
+"""
+Tests for the per-key rate-limit scheduler.
+
+Validates headroom-based key selection, waiting when every key is exhausted,
+retry-after parsing and benching of failing keys.
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from models.key_scheduler import (
+    KeyScheduler, KeyWaitTimeoutError, RateLimits, estimate_tokens, is_quota_exhausted_error, is_rate_limit_error, parse_retry_after
+)
+from models.llm_manager import LLMManager
+
+
+class TestKeyScheduler:
+    """Test KeyScheduler selection and health tracking."""
+
+    def setup_method(self):
+        self.limits = RateLimits(requests_per_minute=2, tokens_per_minute=1000)
+        self.scheduler = KeyScheduler("GROQ", ["key-a", "key-b"], limits=self.limits)
+
+    def test_acquire_spreads_load_by_headroom(self):
+        """Reservations go to the key with the most remaining headroom."""
+        first, _ = self.scheduler.acquire(100)
+        second, _ = self.scheduler.acquire(100)
+
+        assert {first, second} == {"GROQ#1", "GROQ#2"}
+
+    def test_exhausted_keys_return_wait_time(self):
+        """When every key is out of requests, acquire reports how long to wait."""
+        for _ in range(4):
+            key_id, _ = self.scheduler.acquire(10)
+            assert key_id is not None
+
+        key_id, wait = self.scheduler.acquire(10)
+
+        assert key_id is None
+        assert 0 < wait <= 60
+
+    def test_token_budget_limits_selection(self):
+        """A key without enough tokens left in the window is skipped."""
+        key_id, _ = self.scheduler.acquire(900)
+        other, _ = self.scheduler.acquire(900)
+
+        assert other != key_id
+        assert self.scheduler.acquire(900)[0] is None
+
+    def test_report_success_corrects_estimate(self):
+        """Actual usage replaces the reservation in the token window."""
+        key_id, _ = self.scheduler.acquire(500)
+        self.scheduler.report_success(key_id, 500, actual_tokens=200)
+
+        status = {s["key_id"]: s for s in self.scheduler.get_status()}
+        assert status[key_id]["tokens_in_window"] == 200
+
+    def test_rate_limit_failure_benches_key_by_retry_after(self):
+        """A 429 benches the key for the hinted duration and the other key is used."""
+        key_id, _ = self.scheduler.acquire(10)
+        bench = self.scheduler.report_failure(key_id, Exception("429 Rate limit reached. Please try again in 7.5s"))
+
+        assert bench == 7.5
+        next_key, _ = self.scheduler.acquire(10)
+        assert next_key != key_id
+
+    def test_repeated_failures_bench_longer(self):
+        """Consecutive non-rate-limit failures back off exponentially, then for at least 30s."""
+        benches = [self.scheduler.report_failure("GROQ#1", RuntimeError("boom")) for _ in range(3)]
+
+        assert benches[0] < benches[1]
+        assert benches[2] >= 30
+
+    def test_quota_exhausted_key_is_marked_unusable(self):
+        """A billing quota error is not a rate limit: the key is benched past any wait and marked unusable."""
+        error = Exception("Error code: 429 - {'error': {'code': 'insufficient_quota'}}")
+        bench = self.scheduler.report_failure("GROQ#1", error)
+
+        status = {s["key_id"]: s for s in self.scheduler.get_status()}
+        assert bench > 300
+        assert status["GROQ#1"]["quota_exhausted"] and status["GROQ#1"]["rate_limited_count"] == 0
+        assert self.scheduler.acquire(10)[0] == "GROQ#2"
+        assert self.scheduler.has_usable_key()
+
+        self.scheduler.report_failure("GROQ#2", error)
+        assert not self.scheduler.has_usable_key()
+
+    def test_status_hides_api_keys(self):
+        """Monitoring status exposes key ids but never the secrets."""
+        status = self.scheduler.get_status()
+
+        assert [s["key_id"] for s in status] == ["GROQ#1", "GROQ#2"]
+        assert "key-a" not in str(status)
+
+    def test_no_keys(self):
+        """A provider without keys yields no key and no wait."""
+        scheduler = KeyScheduler("OpenAI", [])
+
+        assert scheduler.select_key() is None
+        assert scheduler.wait_for_key(10) is None
+
+    def test_wait_gives_up_with_an_error(self):
+        """If no key frees up within max_wait the wait fails instead of returning no key."""
+        for key_id in ("GROQ#1", "GROQ#2"):
+            self.scheduler.report_failure(key_id, Exception("429 Rate limit reached. Please try again in 60s"))
+
+        with pytest.raises(KeyWaitTimeoutError):
+            self.scheduler.wait_for_key(10, max_wait=1)
+        with pytest.raises(KeyWaitTimeoutError):
+            asyncio.run(self.scheduler.await_key(10, max_wait=1))
+
+
+class TestRetryAfterParsing:
+    """Test extraction of retry hints from provider errors."""
+
+    def test_header_takes_precedence(self):
+        error = Exception("rate limited")
+        error.response = Mock(headers={"retry-after": "3"})
+
+        assert parse_retry_after(error) == 3.0
+
+    def test_message_durations(self):
+        assert parse_retry_after(Exception("Please try again in 1m30s")) == 90.0
+        assert parse_retry_after(Exception("'retryDelay': '12s'")) == 12.0
+        assert parse_retry_after(Exception("no hint")) is None
+
+    def test_rate_limit_detection(self):
+        assert is_rate_limit_error(Exception("Error code: 429"))
+        assert is_rate_limit_error(Exception("RESOURCE_EXHAUSTED: quota"))
+        assert not is_rate_limit_error(Exception("connection reset"))
+
+    def test_quota_exhaustion_is_not_a_rate_limit(self):
+        error = Exception("Error code: 429 - You exceeded your current quota, please check your plan and billing "
+                          "details. {'code': 'insufficient_quota'}")
+        error.status_code = 429
+
+        assert is_quota_exhausted_error(error)
+        assert not is_rate_limit_error(error)
+        assert not is_quota_exhausted_error(Exception("429 Rate limit reached for tokens per min"))
+
+    def test_estimate_tokens_counts_images(self):
+        text_only = estimate_tokens("가" * 100)
+        with_image = estimate_tokens([{"type": "text", "text": "가" * 100},
+                                      {"type": "image_url", "image_url": {"url": "data:"}}])
+
+        assert with_image > text_only
+
+
+class TestLLMManagerScheduling:
+    """Test that LLMManager routes retries through the key scheduler."""
+
+    def test_retry_switches_to_healthy_key(self):
+        """After a rate-limit error the retry is sent with another key."""
+        manager = LLMManager()
+        manager.key_schedulers["GROQ"] = KeyScheduler(
+            "GROQ", ["key-a", "key-b"], limits=RateLimits(requests_per_minute=10, tokens_per_minute=100000)
+        )
+        used_keys = []
+
+        def fake_create(provider, model_name, api_key, key_id=None, http_async_client=None):
+            def invoke(**kwargs):
+                used_keys.append(key_id)
+                if len(used_keys) == 1:
+                    raise Exception("429 Rate limit reached. Please try again in 5s")
+                return Mock(content="ok", usage_metadata={"total_tokens": 50})
+
+            llm = Mock()
+            llm.metadata = {"llm_provider": provider, "llm_model": model_name, "llm_key_id": key_id}
+            llm.invoke.side_effect = invoke
+            return llm
+
+        manager._create_llm = fake_create
+        llm = manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+
+        start = time.time()
+        result = manager.call_llm_with_retry(llm, "prompt", max_retries=2)
+
+        assert result == "ok"
+        assert len(set(used_keys)) == 2
+        assert time.time() - start < 2
+
+
+    def test_exhausted_quota_on_every_key_stops_retrying(self):
+        """Once no key has quota left the call gives up instead of burning through max_retries."""
+        manager = LLMManager()
+        manager.key_schedulers["GROQ"] = KeyScheduler(
+            "GROQ", ["key-a", "key-b"], limits=RateLimits(requests_per_minute=10, tokens_per_minute=100000)
+        )
+        used_keys = []
+
+        def fake_create(provider, model_name, api_key, key_id=None, http_async_client=None):
+            def invoke(**kwargs):
+                used_keys.append(key_id)
+                raise Exception("Error code: 429 - {'code': 'insufficient_quota'}")
+
+            llm = Mock()
+            llm.metadata = {"llm_provider": provider, "llm_model": model_name, "llm_key_id": key_id}
+            llm.invoke.side_effect = invoke
+            return llm
+
+        manager._create_llm = fake_create
+        llm = manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+
+        start = time.time()
+        assert manager.call_llm_with_retry(llm, "prompt", max_retries=5) is None
+        assert sorted(used_keys) == ["GROQ#1", "GROQ#2"]
+        assert time.time() - start < 2
+
+    def test_saturated_keys_are_not_bypassed(self):
+        """When no key frees up in time the call fails instead of going out on an unscheduled client."""
+        manager = LLMManager()
+        manager.key_schedulers["GROQ"] = KeyScheduler(
+            "GROQ", ["key-a"], limits=RateLimits(requests_per_minute=10, tokens_per_minute=100000)
+        )
+        manager._create_llm = lambda provider, model_name, api_key, key_id=None, http_async_client=None: Mock(
+            metadata={"llm_provider": provider, "llm_model": model_name, "llm_key_id": key_id}
+        )
+        llm = manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+        manager.key_schedulers["GROQ"].report_failure("GROQ#1", Exception("insufficient_quota"))
+
+        with pytest.raises(KeyWaitTimeoutError):
+            manager.call_llm_with_retry(llm, "prompt", max_retries=5)
+        llm.invoke.assert_not_called()
+
+
+class TestLLMClientCache:
+    """Test that LLM clients are reused per (provider, model, key)."""
+
+    def setup_method(self):
+        self.manager = LLMManager()
+        self.manager.key_schedulers["GROQ"] = KeyScheduler("GROQ", ["key-a"])
+        self.created = []
+
+        def fake_create(provider, model_name, api_key, key_id=None, http_async_client=None):
+            llm = Mock()
+            llm.metadata = {"llm_provider": provider, "llm_model": model_name, "llm_key_id": key_id}
+            self.created.append((provider, model_name, key_id))
+            return llm
+
+        self.manager._create_llm = fake_create
+
+    def test_same_model_and_key_reuses_client(self):
+        first = self.manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+        second = self.manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+
+        assert first is second
+        assert len(self.created) == 1
+
+    def test_different_model_gets_own_client(self):
+        first = self.manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+        second = self.manager.get_llm("GROQ", "llama-3.1-8b-instant")
+
+        assert first is not second
+        assert self.created == [("GROQ", "llama-3.3-70b-versatile", "GROQ#1"),
+                                ("GROQ", "llama-3.1-8b-instant", "GROQ#1")]
+
+    def test_sync_and_async_share_client(self):
+        sync_llm = self.manager.get_llm("GROQ", "llama-3.3-70b-versatile")
+        async_llm = asyncio.run(self.manager.aget_llm("GROQ", "llama-3.3-70b-versatile"))
+
+        assert sync_llm is async_llm
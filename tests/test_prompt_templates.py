@@ -0,0 +1,76 @@
+"""
+Tests for the compiled grading prompt.
+"""
+
+import json
+import os
+import sys
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.dynamic_models import DynamicModelFactory
+from core.grading_config import ConcurrencyMode, GradingConfig
+from core.grading_pipeline import GradingPipeline
+from prompts.prompt_templates import compile_grading_prompt, get_grading_prompt
+
+
+class TestCompiledGradingPrompt:
+    """Static prefix rendering and per-student splicing."""
+
+    def setup_method(self):
+        self.rubric = [{'main_criterion': '해안 지형', 'sub_criteria': [{'score': 1, 'content': "해식애의 '형성'"}]}]
+        self.format_instructions = DynamicModelFactory.create_parser(self.rubric).get_format_instructions()
+
+    def test_student_sections_follow_shared_prefix(self):
+        compiled = compile_grading_prompt("서술형", self.rubric, self.format_instructions)
+
+        first = compiled.render("파도의 침식", "참고 자료 A")
+        second = compiled.render("모르겠습니다", "참고 자료 B")
+
+        assert first.startswith(compiled.static_prefix) and second.startswith(compiled.static_prefix)
+        assert "파도의 침식" not in compiled.static_prefix
+        assert first.index(self.format_instructions) < first.index("참고 자료 A") < first.index("파도의 침식")
+
+    def test_rubric_is_embedded_as_json(self):
+        compiled = compile_grading_prompt("서술형", self.rubric, self.format_instructions)
+
+        assert json.loads(compiled.rubric_json) == self.rubric
+        assert compiled.rubric_json in compiled.static_prefix
+        assert "'main_criterion'" not in compiled.static_prefix
+
+    def test_get_grading_prompt_matches_compiled_render(self):
+        compiled = compile_grading_prompt("서술형", self.rubric, self.format_instructions)
+
+        assert get_grading_prompt("서술형", self.rubric, "답안 {중괄호}", "자료", self.format_instructions) == \
+            compiled.render("답안 {중괄호}", "자료")
+
+
+class TestPipelinePromptCompilation:
+    """The batch pipeline compiles the prompt once."""
+
+    def test_process_batch_compiles_once(self):
+        rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        parser = DynamicModelFactory.create_parser(rubric)
+        manager = Mock()
+        manager.call_llm_with_retry.return_value = "not json"
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL, deduplicate_answers=False)
+        )
+        df = pd.DataFrame({"이름": ["가", "나", "다"], "답안": ["a", "b", "c"]})
+
+        with patch('core.grading_pipeline.batch_retrieve_documents',
+                   side_effect=lambda retriever, queries, show_status=True: [[] for _ in queries]), \
+             patch('core.grading_pipeline.batch_rerank_documents',
+                   side_effect=lambda docs_list, queries, **kwargs: [[] for _ in queries]), \
+             patch('core.grading_pipeline.compile_grading_prompt',
+                   wraps=compile_grading_prompt) as mock_compile:
+            pipeline.process_batch(df, rubric, "서술형", parser)
+
+        mock_compile.assert_called_once()
+        prompts = [call.args[1] for call in manager.call_llm_with_retry.call_args_list]
+        assert len(prompts) == 3
+        assert len({prompt[:prompt.index("### 3. 참고 자료")] for prompt in prompts}) == 1
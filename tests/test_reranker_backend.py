@@ -0,0 +1,94 @@
+"""
+Tests for the reranker inference backends.
+
+Validates backend configuration, fallback to PyTorch when ONNX Runtime is not
+available, and the parity/latency micro-benchmark (with stand-in models).
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from utils.reranker_backend import RerankerConfig, benchmark_rerankers, load_reranker
+
+
+class TestRerankerConfig:
+    """Test RerankerConfig.from_env."""
+
+    def test_defaults(self, monkeypatch):
+        for name in ("RERANKER_BACKEND", "RERANKER_NUM_THREADS", "RERANKER_ONNX_DIR", "RERANKER_QUANTIZATION"):
+            monkeypatch.delenv(name, raising=False)
+
+        config = RerankerConfig.from_env()
+
+        assert config.backend == "torch"
+        assert config.num_threads is None
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("RERANKER_BACKEND", "ONNX-INT8")
+        monkeypatch.setenv("RERANKER_NUM_THREADS", "4")
+        monkeypatch.setenv("RERANKER_QUANTIZATION", "avx512_vnni")
+
+        config = RerankerConfig.from_env()
+
+        assert config.backend == "onnx-int8"
+        assert config.num_threads == 4
+        assert config.onnx_file_name() == "onnx/model_qint8_avx512_vnni.onnx"
+
+    def test_invalid_values_fall_back(self, monkeypatch):
+        monkeypatch.setenv("RERANKER_BACKEND", "tensorrt")
+        monkeypatch.setenv("RERANKER_NUM_THREADS", "many")
+
+        config = RerankerConfig.from_env()
+
+        assert config.backend == "torch"
+        assert config.num_threads is None
+
+
+class TestLoadReranker:
+    """Test backend selection and fallback."""
+
+    @patch('utils.reranker_backend._load_torch_reranker', return_value="torch-model")
+    @patch('utils.reranker_backend._load_onnx_reranker', side_effect=ImportError("No module named 'onnxruntime'"))
+    def test_onnx_falls_back_to_torch_without_onnxruntime(self, mock_onnx, mock_torch):
+        assert load_reranker(RerankerConfig(backend="onnx-int8")) == "torch-model"
+        mock_onnx.assert_called_once()
+
+    @patch('utils.reranker_backend._load_torch_reranker', return_value="torch-model")
+    @patch('utils.reranker_backend._load_onnx_reranker', return_value="onnx-model")
+    def test_onnx_backend_selected(self, mock_onnx, mock_torch):
+        assert load_reranker(RerankerConfig(backend="onnx")) == "onnx-model"
+        mock_torch.assert_not_called()
+
+
+class TestBenchmarkRerankers:
+    """Test the parity and ranking agreement report."""
+
+    def setup_method(self):
+        self.samples = [("답안1", ["a", "b", "c"]), ("답안2", ["d", "e"])]
+        self.reference = Mock()
+        self.reference.predict.return_value = [0.9, 0.5, 0.1, 0.2, 0.8]
+
+    def test_identical_models_agree(self):
+        result = benchmark_rerankers(self.reference, self.reference, self.samples, top_k=2, repeats=1)
+
+        assert result["pairs"] == 5
+        assert result["max_abs_diff"] == 0
+        assert result["within_tolerance"]
+        assert result["top1_agreement"] == 1.0
+        assert result["topk_overlap"] == 1.0
+
+    def test_reports_score_drift_and_rank_changes(self):
+        candidate = Mock()
+        candidate.predict.return_value = [0.5, 0.9, 0.1, 0.2, 0.81]
+
+        result = benchmark_rerankers(self.reference, candidate, self.samples, top_k=2, repeats=1, tolerance=0.02)
+
+        assert result["max_abs_diff"] == pytest.approx(0.4)
+        assert not result["within_tolerance"]
+        assert result["top1_agreement"] == 0.5
+        assert result["topk_overlap"] == 1.0
+
+    def test_requires_pairs(self):
+        with pytest.raises(ValueError):
+            benchmark_rerankers(self.reference, self.reference, [])
@@ -0,0 +1,132 @@
+"""
+Tests for the persistent LLM response cache.
+
+Validates key derivation, TTL/LRU eviction and that cache hits skip the LLM call
+in the grading pipeline.
+"""
+
+import json
+import os
+import tempfile
+import time
+from unittest.mock import Mock, patch
+
+from core.dynamic_models import DynamicModelFactory
+from core.grading_config import GradingConfig, ConcurrencyMode
+from core.grading_pipeline import GradingPipeline
+from models.response_cache import LLMResponseCache
+
+
+class TestLLMResponseCache:
+    """Test LLMResponseCache storage and eviction."""
+
+    def setup_method(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "cache", "responses.sqlite3")
+
+    def teardown_method(self):
+        self.tmpdir.cleanup()
+
+    def test_key_depends_on_provider_model_and_prompt(self):
+        key = LLMResponseCache.make_key("GROQ", "llama", "prompt")
+
+        assert key == LLMResponseCache.make_key("GROQ", "llama", "prompt")
+        assert key != LLMResponseCache.make_key("OpenAI", "llama", "prompt")
+        assert key != LLMResponseCache.make_key("GROQ", "gpt", "prompt")
+        assert key != LLMResponseCache.make_key("GROQ", "llama", "prompt ")
+
+    def test_round_trip_persists_across_instances(self):
+        LLMResponseCache(self.db_path).set("k", "response")
+
+        cache = LLMResponseCache(self.db_path)
+
+        assert cache.get("k") == "response"
+        assert cache.get("missing") is None
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_expired_entries_are_ignored(self):
+        cache = LLMResponseCache(self.db_path, ttl_seconds=0.01)
+        cache.set("k", "response")
+        time.sleep(0.02)
+
+        assert cache.get("k") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LLMResponseCache(self.db_path, max_entries=2)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", "3")
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+
+    def test_clear(self):
+        cache = LLMResponseCache(self.db_path)
+        cache.set("k", "response")
+        cache.clear()
+
+        assert cache.get_stats()["entries"] == 0
+
+
+class TestPipelineResponseCache:
+    """Test that GradingPipeline reuses cached responses."""
+
+    def setup_method(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = LLMResponseCache(os.path.join(self.tmpdir.name, "responses.sqlite3"))
+        self.rubric = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+        self.parser = DynamicModelFactory.create_parser(self.rubric)
+        self.response = json.dumps({
+            "채점결과": {"주요_채점_요소_1_점수": 1, "세부_채점_요소_1_1_점수": 1, "합산_점수": 1,
+                     "점수_판단_근거": {"주요_채점_요소_1": "정확함"}},
+            "피드백": {"교과_내용_피드백": "좋습니다.", "의사_응답_여부": False, "의사_응답_설명": ""}
+        }, ensure_ascii=False)
+
+    def teardown_method(self):
+        self.tmpdir.cleanup()
+
+    def _grade(self, manager, cache):
+        pipeline = GradingPipeline(
+            llm_manager=manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL), response_cache=cache
+        )
+        with patch('core.grading_pipeline.retrieve_documents', return_value=[]), \
+             patch('core.grading_pipeline.rerank_documents', return_value=[]), \
+             patch('core.grading_pipeline.get_grading_prompt', return_value="prompt"):
+            return pipeline.process_student_answer("가", "모르겠습니다", self.rubric, "서술형",
+                                                   self.parser, show_status=False)
+
+    def test_cache_hit_skips_llm(self):
+        manager = Mock()
+        manager.call_llm_with_retry.return_value = self.response
+
+        first = self._grade(manager, self.cache)
+        second = self._grade(manager, self.cache)
+
+        assert manager.call_llm_with_retry.call_count == 1
+        assert first["채점결과"] == second["채점결과"]
+
+    def test_unparseable_response_is_not_cached(self):
+        manager = Mock()
+        manager.call_llm_with_retry.return_value = "not json"
+
+        self._grade(manager, self.cache)
+        self._grade(manager, self.cache)
+
+        assert manager.call_llm_with_retry.call_count == 2
+
+    def test_bypass_without_cache(self):
+        manager = Mock()
+        manager.call_llm_with_retry.return_value = self.response
+
+        self._grade(manager, None)
+        self._grade(manager, None)
+
+        assert manager.call_llm_with_retry.call_count == 2
@@ -0,0 +1,166 @@
+"""
+Tests for provider-native structured output in grading.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.dynamic_models import DynamicModelFactory
+from core.grading_config import ConcurrencyMode, GradingConfig
+from core.grading_pipeline import GradingPipeline
+from models.llm_manager import STRUCTURED_OUTPUT_MAX_REJECTIONS, LLMManager
+
+RUBRIC = [{'main_criterion': '기본', 'sub_criteria': [{'score': 1, 'content': '내용'}]}]
+GRADING_OBJECT = {
+    "채점결과": {"주요_채점_요소_1_점수": 1, "세부_채점_요소_1_1_점수": 1, "합산_점수": 1,
+             "점수_판단_근거": {"주요_채점_요소_1": "정확함"}},
+    "피드백": {"교과_내용_피드백": "좋습니다.", "의사_응답_여부": False, "의사_응답_설명": ""}
+}
+RAW_JSON = json.dumps(GRADING_OBJECT, ensure_ascii=False)
+
+
+def fake_llm(provider="OpenAI", output=None, error=None):
+    """LLM client as created by LLMManager, with a stubbed structured-output binding."""
+    structured = Mock()
+    structured.invoke.side_effect = error
+    structured.invoke.return_value = output
+    llm = Mock(metadata={"llm_provider": provider, "llm_model": "model", "llm_key_id": f"{provider}_1"})
+    llm.with_structured_output.return_value = structured
+    return llm
+
+
+class TestStructuredOutputCall:
+    """LLMManager binds each provider's native structured output and records the outcome."""
+
+    def setup_method(self):
+        self.manager = LLMManager()
+        self.schema = DynamicModelFactory.create_parser(RUBRIC).pydantic_object
+
+    def test_schema_valid_reply_is_returned_and_binding_reused(self):
+        parsed = self.schema(**GRADING_OBJECT)
+        llm = fake_llm(output={"raw": AIMessage(content=RAW_JSON), "parsed": parsed, "parsing_error": None})
+
+        for _ in range(2):
+            assert self.manager.call_llm_structured_with_retry(llm, "프롬프트", self.schema) == (parsed, RAW_JSON)
+
+        llm.with_structured_output.assert_called_once_with(
+            self.schema, include_raw=True, method="json_schema", strict=False
+        )
+        stats = self.manager.get_structured_output_stats()["OpenAI"]
+        assert stats["native"] == 2 and stats["success_rate"] == 1.0
+
+    def test_invalid_reply_returns_raw_text_for_the_parser(self):
+        llm = fake_llm("GROQ", output={"raw": AIMessage(content="점수는 1점"), "parsed": None,
+                                       "parsing_error": ValueError("not json")})
+
+        assert self.manager.call_llm_structured_with_retry(llm, "프롬프트", self.schema) == (None, "점수는 1점")
+        assert llm.with_structured_output.call_args.kwargs["method"] == "json_mode"
+        assert self.manager.get_structured_output_stats()["GROQ"]["invalid"] == 1
+
+    def test_rejected_requests_stop_structured_output_for_the_model(self):
+        llm = fake_llm("Google", error=ValueError("response_schema is not supported"))
+
+        for _ in range(STRUCTURED_OUTPUT_MAX_REJECTIONS):
+            assert self.manager.call_llm_structured_with_retry(llm, "프롬프트", self.schema) == (None, None)
+
+        # Not retried with other keys, and no further requests once the model is marked unsupported
+        assert llm.with_structured_output.return_value.invoke.call_count == STRUCTURED_OUTPUT_MAX_REJECTIONS
+        assert not self.manager.supports_structured_output(llm)
+        assert self.manager.get_structured_output_stats()["Google"]["success_rate"] == 0.0
+
+    def test_quota_errors_are_not_counted_as_rejections(self):
+        llm = fake_llm("OpenAI", error=Exception("Error code: 429 - {'code': 'insufficient_quota'}"))
+
+        with pytest.raises(Exception, match="insufficient_quota"):
+            self.manager.call_llm_structured_with_retry(llm, "프롬프트", self.schema)
+        assert "OpenAI" not in self.manager.get_structured_output_stats()
+        assert self.manager.supports_structured_output(llm)
+
+    def test_connection_errors_are_retried_then_raised(self):
+        llm = fake_llm("OpenAI", error=ConnectionError("connection reset"))
+
+        with pytest.raises(ConnectionError):
+            self.manager.call_llm_structured_with_retry(llm, "프롬프트", self.schema, max_retries=2, delay=0)
+
+        assert llm.with_structured_output.return_value.invoke.call_count == 2
+        assert "OpenAI" not in self.manager.get_structured_output_stats()
+
+    def test_clients_not_created_by_the_manager_are_not_supported(self):
+        assert self.manager.call_llm_structured_with_retry(Mock(metadata=None), "프롬프트", self.schema) == (None, None)
+
+
+class TestStructuredOutputPipeline:
+    """Schema-valid replies skip the response parser; everything else falls back to it."""
+
+    def setup_method(self):
+        self.parser = DynamicModelFactory.create_parser(RUBRIC)
+        self.manager = Mock()
+        self.manager.call_llm_with_retry.return_value = RAW_JSON
+        self.pipeline = GradingPipeline(
+            llm_manager=self.manager, retriever=Mock(),
+            grading_config=GradingConfig(ConcurrencyMode.SEQUENTIAL, structured_output=True)
+        )
+
+    def _grade(self):
+        with patch.object(self.pipeline.enhanced_parser, 'parse_response_with_rubric',
+                          wraps=self.pipeline.enhanced_parser.parse_response_with_rubric) as parse:
+            result = self.pipeline.process_student_answer("가", "답안", RUBRIC, "서술형", self.parser,
+                                                          show_status=False, reranked_docs=[])
+        return result, parse
+
+    def test_schema_valid_reply_skips_the_parser(self):
+        parsed = self.parser.pydantic_object(**GRADING_OBJECT)
+        self.manager.call_llm_structured_with_retry.return_value = (parsed, RAW_JSON)
+
+        result, parse = self._grade()
+
+        assert result["채점결과"]["합산_점수"] == 1
+        assert result["점수_판단_근거"] == {"주요_채점_요소_1": "정확함"}
+        parse.assert_not_called()
+        self.manager.call_llm_with_retry.assert_not_called()
+        assert self.manager.call_llm_structured_with_retry.call_args.args[2] is self.parser.pydantic_object
+
+    def test_invalid_reply_is_repaired_by_the_parser_without_another_call(self):
+        self.manager.call_llm_structured_with_retry.return_value = (None, f"```json\n{RAW_JSON}\n```")
+
+        result, parse = self._grade()
+
+        assert result["채점결과"]["합산_점수"] == 1
+        parse.assert_called_once()
+        self.manager.call_llm_with_retry.assert_not_called()
+
+    def test_unsupported_provider_falls_back_to_the_plain_call(self):
+        self.manager.call_llm_structured_with_retry.return_value = (None, None)
+
+        result, parse = self._grade()
+
+        assert result["채점결과"]["합산_점수"] == 1
+        self.manager.call_llm_with_retry.assert_called_once()
+
+    def test_provider_errors_do_not_retry_with_the_plain_call(self):
+        self.manager.call_llm_structured_with_retry.side_effect = Exception("429 Rate limit reached")
+
+        result, parse = self._grade()
+
+        assert "429" in result["오류"]
+        self.manager.call_llm_with_retry.assert_not_called()
+
+    def test_async_path_uses_structured_output(self):
+        parsed = self.parser.pydantic_object(**GRADING_OBJECT)
+        self.manager.aget_llm = AsyncMock(return_value=Mock())
+        self.manager.acall_llm_structured_with_retry = AsyncMock(return_value=(parsed, None))
+        self.manager.acall_llm_with_retry = AsyncMock()
+
+        result = asyncio.run(self.pipeline.aprocess_student_answer("가", "답안", RUBRIC, "서술형", self.parser,
+                                                                   reranked_docs=[]))
+
+        assert result["채점결과"]["합산_점수"] == 1
+        self.manager.acall_llm_with_retry.assert_not_awaited()
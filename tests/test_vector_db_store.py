@@ -0,0 +1,296 @@
+"""
+Tests for fingerprint-keyed vector index persistence and incremental updates.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.file_service import FileService
+from utils.vector_db import (
+    add_chunks_to_vector_db, compute_corpus_fingerprint, create_vector_db, embed_chunks_in_batches,
+    evict_stale_indexes, get_index_path, index_exists, list_stored_indexes, load_chunk_manifest,
+    load_or_create_vector_db, remove_source_from_vector_db, save_vector_db, sync_vector_db
+)
+
+
+class TestCorpusFingerprint:
+    """Fingerprint inputs."""
+
+    def test_fingerprint_changes_with_each_input(self):
+        base = compute_corpus_fingerprint(["a"], 1000, 200, "model")
+        assert base == compute_corpus_fingerprint(["a"], 1000, 200, "model")
+        assert base != compute_corpus_fingerprint(["b"], 1000, 200, "model")
+        assert base != compute_corpus_fingerprint(["a"], 500, 200, "model")
+        assert base != compute_corpus_fingerprint(["a"], 1000, 100, "model")
+        assert base != compute_corpus_fingerprint(["a"], 1000, 200, "other-model")
+
+    def test_fingerprint_ignores_source_order(self):
+        assert compute_corpus_fingerprint(["a", "b"], 1000, 200, "m") == \
+            compute_corpus_fingerprint(["b", "a"], 1000, 200, "m")
+
+
+class TestIndexStore:
+    """Load-or-create and LRU eviction."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.chunks = [Document(page_content=f"청크 {i}") for i in range(3)]
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_matching_fingerprint_reuses_index(self):
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir)
+        assert index_exists(get_index_path("fp1", self.base_dir))
+
+        with patch("utils.vector_db.FAISS.from_embeddings") as mock_create:
+            vector_db = load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir)
+
+        mock_create.assert_not_called()
+        assert vector_db.index.ntotal == 3
+
+    def test_metadata_is_saved_with_index(self):
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir,
+                                 metadata={"file_name": "교과서.pdf"})
+        [entry] = list_stored_indexes(self.base_dir)
+        assert entry["fingerprint"] == "fp1"
+        assert entry["file_name"] == "교과서.pdf"
+        assert entry["chunk_count"] == 3
+
+    def test_least_recently_used_index_is_evicted(self):
+        for fingerprint in ("fp1", "fp2"):
+            load_or_create_vector_db(self.chunks, self.embeddings, fingerprint, base_dir=self.base_dir, max_indexes=2)
+            time.sleep(0.01)
+        # Using fp1 again makes fp2 the least recently used
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir, max_indexes=2)
+        time.sleep(0.01)
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp3", base_dir=self.base_dir, max_indexes=2)
+
+        remaining = {entry["fingerprint"] for entry in list_stored_indexes(self.base_dir)}
+        assert remaining == {"fp1", "fp3"}
+
+    def test_rebuild_replaces_index_even_if_old_files_cannot_be_deleted(self):
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir)
+        db_path = get_index_path("fp1", self.base_dir)
+        manifest = load_chunk_manifest(db_path)
+        vector_db = load_or_create_vector_db(self.chunks[:1], self.embeddings, "fp2", base_dir=self.base_dir)
+
+        # e.g. Windows, where another session still has the old index.faiss memory-mapped
+        with patch("utils.vector_db.shutil.rmtree"):
+            save_vector_db(vector_db, db_path, manifest, {"fingerprint": "fp1"})
+
+        assert {entry["chunk_count"] for entry in list_stored_indexes(self.base_dir)} == {1}
+        assert any(".old-" in name for name in os.listdir(self.base_dir))
+
+        save_vector_db(vector_db, db_path, manifest, {"fingerprint": "fp1"})
+        assert not any(".old-" in name or ".tmp-" in name for name in os.listdir(self.base_dir))
+
+    def test_directories_without_metadata_are_left_alone(self):
+        legacy_path = os.path.join(self.base_dir, "faiss_index")
+        os.makedirs(legacy_path)
+        load_or_create_vector_db(self.chunks, self.embeddings, "fp1", base_dir=self.base_dir)
+
+        assert evict_stale_indexes(self.base_dir, max_indexes=1) == []
+        assert os.path.isdir(legacy_path)
+
+
+class TestIncrementalUpdates:
+    """Chunk manifest driven add/remove without re-embedding unchanged chunks."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.chunks_a = [Document(page_content=f"A 청크 {i}", metadata={"source_file": "a.pdf"}) for i in range(3)]
+        self.chunks_b = [Document(page_content=f"B 청크 {i}", metadata={"source_file": "b.pdf"}) for i in range(2)]
+        self.embedded = []
+        original_embed = DeterministicFakeEmbedding.embed_documents
+
+        def counting_embed(embeddings, texts):
+            self.embedded.extend(texts)
+            return original_embed(embeddings, texts)
+
+        self.embed_patch = patch.object(DeterministicFakeEmbedding, "embed_documents", counting_embed)
+        self.embed_patch.start()
+
+    def teardown_method(self):
+        self.embed_patch.stop()
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def _create(self, chunks, fingerprint="fp1"):
+        db_path = get_index_path(fingerprint, self.base_dir)
+        vector_db = create_vector_db(chunks, self.embeddings, db_path)
+        return vector_db, load_chunk_manifest(db_path)
+
+    def test_add_embeds_only_new_chunks(self):
+        vector_db, manifest = self._create(self.chunks_a)
+        self.embedded.clear()
+
+        stats = add_chunks_to_vector_db(vector_db, self.chunks_a + self.chunks_b, self.embeddings, manifest)
+
+        assert stats == {"added": 2, "unchanged": 3}
+        assert self.embedded == ["B 청크 0", "B 청크 1"]
+        assert vector_db.index.ntotal == 5
+        assert set(manifest["sources"]) == {"a.pdf", "b.pdf"}
+
+    def test_remove_source_drops_its_chunks(self):
+        vector_db, manifest = self._create(self.chunks_a + self.chunks_b)
+
+        assert remove_source_from_vector_db(vector_db, "a.pdf", manifest) == 3
+
+        assert vector_db.index.ntotal == 2
+        assert set(manifest["sources"]) == {"b.pdf"}
+        results = vector_db.similarity_search("청크", k=5)
+        assert {doc.metadata["source_file"] for doc in results} == {"b.pdf"}
+
+    def test_sync_replaces_only_changed_chunks(self):
+        vector_db, manifest = self._create(self.chunks_a)
+        self.embedded.clear()
+        edited = self.chunks_a[:2] + [Document(page_content="A 청크 수정", metadata={"source_file": "a.pdf"})]
+
+        stats = sync_vector_db(vector_db, edited, self.embeddings, manifest)
+
+        assert stats == {"added": 1, "removed": 1, "unchanged": 2}
+        assert self.embedded == ["A 청크 수정"]
+        assert vector_db.index.ntotal == 3
+
+    def test_new_fingerprint_is_built_from_base_index(self):
+        load_or_create_vector_db(self.chunks_a, self.embeddings, "fp1", base_dir=self.base_dir,
+                                 metadata={"chunk_size": 100})
+        self.embedded.clear()
+
+        vector_db = load_or_create_vector_db(self.chunks_a + self.chunks_b, self.embeddings, "fp2",
+                                             base_dir=self.base_dir, metadata={"chunk_size": 100},
+                                             base_fingerprint="fp1")
+
+        assert self.embedded == ["B 청크 0", "B 청크 1"]
+        assert vector_db.index.ntotal == 5
+        assert index_exists(get_index_path("fp1", self.base_dir))
+        assert set(load_chunk_manifest(get_index_path("fp2", self.base_dir))["sources"]) == {"a.pdf", "b.pdf"}
+
+    def test_base_index_with_other_settings_is_not_reused(self):
+        load_or_create_vector_db(self.chunks_a, self.embeddings, "fp1", base_dir=self.base_dir,
+                                 metadata={"chunk_size": 100})
+        self.embedded.clear()
+
+        load_or_create_vector_db(self.chunks_a + self.chunks_b, self.embeddings, "fp2", base_dir=self.base_dir,
+                                 metadata={"chunk_size": 200}, base_fingerprint="fp1")
+
+        assert len(self.embedded) == 5
+
+
+class TestBatchedEmbedding:
+    """Chunks are embedded and added in fixed-size batches with progress."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=8)
+        self.chunks = [Document(page_content=f"청크 {i}", metadata={"source_file": "a.pdf"}) for i in range(5)]
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_embeds_in_batches_and_reports_progress(self):
+        batch_sizes, progress = [], []
+        original_embed = DeterministicFakeEmbedding.embed_documents
+
+        def counting_embed(embeddings, texts):
+            batch_sizes.append(len(texts))
+            return original_embed(embeddings, texts)
+
+        with patch.object(DeterministicFakeEmbedding, "embed_documents", counting_embed):
+            vector_db = embed_chunks_in_batches(None, self.chunks, [f"id{i}" for i in range(5)], self.embeddings,
+                                                batch_size=2, progress_callback=lambda *args: progress.append(args))
+
+        assert batch_sizes == [2, 2, 1]
+        assert progress == [(2, 5), (4, 5), (5, 5)]
+        assert vector_db.index.ntotal == 5
+        assert vector_db.similarity_search("청크 3", k=1)[0].page_content == "청크 3"
+
+    def test_create_uses_batch_size_from_env(self):
+        progress = []
+        with patch.dict(os.environ, {"EMBEDDING_BATCH_SIZE": "3"}):
+            create_vector_db(self.chunks, self.embeddings, get_index_path("fp1", self.base_dir),
+                             progress_callback=lambda *args: progress.append(args))
+
+        assert progress == [(3, 5), (5, 5)]
+
+
+class TestFileServiceIndexReuse:
+    """FileService keys the vector DB by corpus fingerprint."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {"VECTOR_DB_DIR": self.base_dir})
+        self.env.start()
+        documents = [Document(page_content="지리 교과서 본문 " * 50, metadata={"source_file": "교과서.txt"})]
+        self.state = {
+            'source_documents': documents,
+            'source_files': {"교과서.txt": {"hash": "hash-a", "documents": documents}},
+        }
+        state_manager = Mock()
+        state_manager.get.side_effect = lambda key, default=None: self.state.get(key, default)
+        state_manager.set.side_effect = lambda key, value: self.state.__setitem__(key, value)
+        state_manager.update.side_effect = lambda **kwargs: self.state.update(kwargs)
+        with patch("services.file_service.get_embedding_model", return_value=DeterministicFakeEmbedding(size=8)):
+            self.file_service = FileService(state_manager)
+
+    def teardown_method(self):
+        self.env.stop()
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_rechunking_with_same_settings_reuses_stored_index(self):
+        assert self.file_service.create_chunks(100, 20)
+        assert self.state['vector_db'] is None
+        assert self.file_service.build_vector_database()
+
+        assert self.file_service.create_chunks(100, 20)
+        assert self.state['vector_db'] is not None
+
+    def test_different_file_or_settings_do_not_reuse_index(self):
+        self.file_service.create_chunks(100, 20)
+        self.file_service.build_vector_database()
+        first_fingerprint = self.file_service.get_corpus_fingerprint()
+
+        self.file_service.create_chunks(200, 20)
+        assert self.state['vector_db'] is None
+
+        self.state['source_files']["교과서.txt"]["hash"] = "hash-b"
+        self.file_service.create_chunks(100, 20)
+        assert self.state['vector_db'] is None
+        assert self.file_service.get_corpus_fingerprint() != first_fingerprint
+
+    def test_adding_a_file_only_embeds_its_chunks(self):
+        self.file_service.create_chunks(100, 20)
+        self.file_service.build_vector_database()
+        first_count = self.state['vector_db'].index.ntotal
+
+        uploaded = Mock(file_id="upload-1", type="text/plain")
+        uploaded.name = "지도.txt"
+        uploaded.getvalue.return_value = b"map"
+        new_documents = [Document(page_content="지도 읽기 자료 " * 20)]
+        with patch("services.file_service.load_documents_parallel",
+                   return_value=iter([("지도.txt", new_documents, None)])):
+            assert self.file_service.process_uploaded_file(uploaded)
+        assert self.file_service.get_source_file_names() == ["교과서.txt", "지도.txt"]
+
+        self.file_service.create_chunks(100, 20)
+        with patch("utils.vector_db.FAISS.from_embeddings") as mock_create:
+            assert self.file_service.build_vector_database()
+        mock_create.assert_not_called()
+        assert self.state['vector_db'].index.ntotal > first_count
+
+    def test_removing_a_file_clears_derived_data(self):
+        self.file_service.create_chunks(100, 20)
+        assert self.file_service.remove_source_file("교과서.txt")
+        assert self.state['source_documents'] is None
+        assert not self.file_service.remove_source_file("교과서.txt")
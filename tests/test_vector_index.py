@@ -0,0 +1,115 @@
+"""
+Tests for configurable FAISS index types.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import faiss
+from langchain.docstore.document import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from utils.vector_db import compute_corpus_fingerprint, create_vector_db, get_index_path, list_stored_indexes, \
+    load_vector_db
+from utils.vector_index import (
+    VectorIndexConfig, _synthetic_vectors, benchmark_index_types, build_index, get_index_type, upgrade_index
+)
+
+
+class TestVectorIndexConfig:
+    """Configuration parsing and signatures."""
+
+    def test_from_env(self):
+        env = {"VECTOR_INDEX_TYPE": "HNSW", "VECTOR_INDEX_EF_SEARCH": "128", "VECTOR_INDEX_TRAIN_THRESHOLD": "500"}
+        with patch.dict(os.environ, env):
+            config = VectorIndexConfig.from_env()
+        assert (config.index_type, config.ef_search, config.train_threshold) == ("hnsw", 128, 500)
+
+    def test_unknown_type_falls_back_to_flat(self):
+        with patch.dict(os.environ, {"VECTOR_INDEX_TYPE": "annoy"}):
+            assert VectorIndexConfig.from_env().index_type == "flat"
+
+    def test_signature_ignores_search_params(self):
+        assert VectorIndexConfig(index_type="hnsw", ef_search=16).signature() == \
+            VectorIndexConfig(index_type="hnsw", ef_search=256).signature()
+        assert VectorIndexConfig(index_type="ivf", nprobe=1).signature() == \
+            VectorIndexConfig(index_type="ivf", nprobe=32).signature()
+
+    def test_flat_signature_keeps_existing_fingerprints(self):
+        base = compute_corpus_fingerprint(["a"], 1000, 200, "model")
+        assert compute_corpus_fingerprint(["a"], 1000, 200, "model", "flat") == base
+        assert compute_corpus_fingerprint(["a"], 1000, 200, "model", "hnsw-M32-efc80-min10000") != base
+
+    def test_nlist_is_bounded_by_training_size(self):
+        assert VectorIndexConfig().resolve_nlist(10000) == 256
+        assert VectorIndexConfig().resolve_nlist(100) == 2
+        assert VectorIndexConfig(nlist=1000).resolve_nlist(3900) == 100
+
+
+class TestBuildIndex:
+    """Index construction, training and search parameters."""
+
+    def setup_method(self):
+        self.vectors, self.queries = _synthetic_vectors(2000, 32, 50)
+
+    def test_below_threshold_stays_flat(self):
+        index = build_index(self.vectors, VectorIndexConfig(index_type="hnsw", train_threshold=5000))
+        assert get_index_type(index) == "flat"
+        assert index.ntotal == 2000
+
+    def test_builds_each_type_with_search_params(self):
+        hnsw = build_index(self.vectors, VectorIndexConfig(index_type="hnsw", train_threshold=0, ef_search=99))
+        ivf = build_index(self.vectors, VectorIndexConfig(index_type="ivf", train_threshold=0, nprobe=3))
+        ivfpq = build_index(self.vectors, VectorIndexConfig(index_type="ivfpq", train_threshold=0, pq_m=12,
+                                                            pq_nbits=4))
+
+        assert get_index_type(hnsw) == "hnsw" and hnsw.hnsw.efSearch == 99
+        assert get_index_type(ivf) == "ivf" and ivf.nprobe == 3 and ivf.is_trained
+        assert get_index_type(ivfpq) == "ivfpq" and ivfpq.pq.M == 8  # largest divisor of 32 not above 12
+        for index in (hnsw, ivf, ivfpq):
+            assert index.ntotal == 2000
+
+    def test_benchmark_reports_recall_against_flat(self):
+        configs = [VectorIndexConfig(index_type="hnsw"), VectorIndexConfig(index_type="ivf", nprobe=8)]
+        results = benchmark_index_types(self.vectors, self.queries, configs, k=5, repeats=1)
+
+        assert [result["index"] for result in results][0] == "flat"
+        assert results[0]["recall_at_k"] == 1.0
+        assert all(0.5 <= result["recall_at_k"] <= 1.0 for result in results)
+        assert all(result["ms_per_query"] >= 0 and result["size_mb"] > 0 for result in results)
+
+
+class TestVectorStoreUpgrade:
+    """Flat LangChain stores switch to the configured index past the threshold."""
+
+    def setup_method(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.chunks = [Document(page_content=f"지리 청크 {i}", metadata={"source_file": "a.pdf"}) for i in range(60)]
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_upgrade_preserves_docstore_mapping(self):
+        vector_db = create_vector_db(self.chunks, self.embeddings, get_index_path("flat", self.base_dir),
+                                     index_config=VectorIndexConfig())
+        assert get_index_type(vector_db.index) == "flat"
+
+        assert upgrade_index(vector_db, VectorIndexConfig(index_type="hnsw", train_threshold=50))
+        assert isinstance(vector_db.index, faiss.IndexHNSW)
+        assert vector_db.similarity_search("지리 청크 17", k=1)[0].page_content == "지리 청크 17"
+
+    def test_created_index_type_is_saved_and_search_params_applied_on_load(self):
+        db_path = get_index_path("hnsw", self.base_dir)
+        create_vector_db(self.chunks, self.embeddings, db_path,
+                         index_config=VectorIndexConfig(index_type="hnsw", train_threshold=50))
+        [entry] = list_stored_indexes(self.base_dir)
+        assert entry["index_type"] == "hnsw"
+
+        vector_db = load_vector_db(self.embeddings, db_path, VectorIndexConfig(index_type="hnsw", ef_search=7))
+        assert vector_db.index.hnsw.efSearch == 7
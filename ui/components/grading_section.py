@@ -7,6 +7,9 @@ from typing import Optional
 from ui.state_manager import StateManager
 from services.grading_service import GradingService
 from utils.rubric_manager import display_rubric_editor
+from core.grading_config import GradingConfig, ConcurrencyMode
+from models.response_cache import get_response_cache
+from utils.retrieval import get_retrieval_cache
 
 
 class GradingSectionComponent:
@@ -97,9 +100,116 @@ class GradingSectionComponent:
         """
         st.header("4. RAG 기반 유사 문서 검색 및 채점")
         
+        self._render_grading_options()
+        
         if st.button("채점 시작"):
             self._handle_grading_start(question_type)
     
+    def _render_grading_options(self):
+        """Render advanced grading options (concurrency settings)."""
+        grading_config = self.state_manager.get('grading_config') or GradingConfig()
+        mode_labels = {
+            ConcurrencyMode.THREAD: "병렬 처리 (스레드 풀)",
+            ConcurrencyMode.ASYNC: "비동기 처리 (asyncio)",
+            ConcurrencyMode.SEQUENTIAL: "순차 처리"
+        }
+        modes = list(mode_labels.keys())
+        
+        with st.expander("고급 채점 설정"):
+            concurrency_mode = st.selectbox(
+                "동시 채점 방식",
+                modes,
+                index=modes.index(grading_config.concurrency_mode),
+                format_func=lambda mode: mode_labels[mode]
+            )
+            if concurrency_mode == ConcurrencyMode.ASYNC:
+                grading_config.max_concurrent_requests = st.slider(
+                    "동시에 진행할 LLM 요청 수", 1, 256, grading_config.max_concurrent_requests
+                )
+            else:
+                grading_config.max_workers = st.slider(
+                    "동시에 채점할 학생 수", 1, 16, grading_config.max_workers,
+                    disabled=concurrency_mode == ConcurrencyMode.SEQUENTIAL
+                )
+            
+            grading_config.batch_grading_size = st.slider(
+                "LLM 호출 1회당 채점할 답안 수", 1, 10, grading_config.batch_grading_size,
+                help="2 이상이면 루브릭과 참고 자료를 공유하는 한 프롬프트로 여러 답안을 채점합니다. "
+                     "응답에서 누락되거나 형식이 맞지 않는 답안은 따로 다시 채점합니다."
+            )
+            grading_config.structured_output = st.checkbox(
+                "제공사 구조화 출력(JSON 모드) 사용",
+                value=grading_config.structured_output,
+                help="OpenAI JSON 스키마, Gemini response_schema, GROQ JSON 모드로 채점 결과를 요청해 "
+                     "응답 파싱 단계를 건너뜁니다. 형식이 맞지 않거나 지원하지 않는 모델이면 기존 파서로 처리합니다."
+            )
+            structured_stats = self.grading_service.llm_manager.get_structured_output_stats()
+            for provider, stats in structured_stats.items():
+                st.caption(f"{provider} 구조화 출력: 성공 {stats['native']}회 / 형식 오류 {stats['invalid']}회 / "
+                           f"거절 {stats['rejected']}회 (성공률 {stats['success_rate']:.0%})")
+
+            grading_config.deduplicate_answers = st.checkbox(
+                "동일 답안은 한 번만 채점",
+                value=grading_config.deduplicate_answers,
+                help="공백, 문장 부호, 대소문자를 제외하고 내용이 같은 답안(빈 답안 포함)은 한 번만 채점하고 결과를 공유합니다."
+            )
+            grading_config.flag_near_duplicates = st.checkbox(
+                "유사 답안 후보 표시",
+                value=grading_config.flag_near_duplicates,
+                help="거의 같은 답안을 찾아 검토 대상으로 표시합니다. 채점은 학생별로 따로 진행됩니다."
+            )
+            if grading_config.flag_near_duplicates:
+                grading_config.near_duplicate_threshold = st.slider(
+                    "유사도 기준", 0.5, 1.0, grading_config.near_duplicate_threshold, 0.05
+                )
+            
+            grading_config.batch_rerank = st.checkbox(
+                "Rerank 일괄 처리",
+                value=grading_config.batch_rerank,
+                help="모든 학생의 (답안, 문서) 쌍을 모아 Reranker를 한 번에 실행합니다."
+            )
+            grading_config.rubric_retrieval = st.checkbox(
+                "루브릭 기준으로 참고 문서 검색",
+                value=grading_config.rubric_retrieval,
+                help="학생 답안 대신 루브릭의 채점 기준별로 한 번만 문서를 검색/재정렬하고, 모든 학생에게 같은 참고 자료를 사용합니다."
+            )
+            if grading_config.rubric_retrieval:
+                grading_config.answer_top_k = st.slider(
+                    "답안별 추가 참고 문서 수", 0, 5, grading_config.answer_top_k,
+                    help="0이면 루브릭 기준 문서만 사용합니다."
+                )
+            grading_config.dedupe_context = st.checkbox(
+                "참고 자료 중복 구간 제거",
+                value=grading_config.dedupe_context,
+                help="겹치게 나뉜 청크에서 반복되는 문장을 한 번만 프롬프트에 넣습니다."
+            )
+            grading_config.context_token_budget = st.number_input(
+                "참고 자료 최대 토큰 수", min_value=0, max_value=8000, step=100,
+                value=grading_config.context_token_budget,
+                help="답안 1개 기준이며 0이면 제한하지 않습니다. 제한을 넘으면 학생 답안과 관련이 큰 문장부터 남깁니다. "
+                     "여러 답안을 한 번에 채점하면 답안 수만큼 늘어난 예산을 공유합니다."
+            )
+            retrieval_stats = get_retrieval_cache().get_stats()
+            if retrieval_stats["hits"] or retrieval_stats["misses"]:
+                st.caption(f"검색 결과 캐시: 저장된 답안 {retrieval_stats['entries']}개 · "
+                           f"적중 {retrieval_stats['hits']}회 / 미스 {retrieval_stats['misses']}회")
+            
+            grading_config.use_response_cache = st.checkbox(
+                "LLM 응답 캐시 사용",
+                value=grading_config.use_response_cache,
+                help="같은 프롬프트(모델, 루브릭, 답안, 참고 문서)로 채점한 적이 있으면 LLM을 다시 호출하지 않고 저장된 응답을 사용합니다."
+            )
+            if grading_config.use_response_cache:
+                response_cache = get_response_cache()
+                stats = response_cache.get_stats()
+                st.caption(f"저장된 응답 {stats['entries']}개 · 적중 {stats['hits']}회 / 미스 {stats['misses']}회")
+                if st.button("응답 캐시 비우기"):
+                    response_cache.clear()
+                    st.success("LLM 응답 캐시를 비웠습니다.")
+        
+        grading_config.concurrency_mode = concurrency_mode
+        self.state_manager.set('grading_config', grading_config)
+    
     def _handle_grading_start(self, question_type: str):
         """
         Handle the grading start process.
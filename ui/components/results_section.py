@@ -156,6 +156,15 @@ class ResultsSectionComponent:
         # Display processing time
         if "채점_소요_시간" in result_row:
             st.write(f"**채점 소요 시간:** {result_row['채점_소요_시간']:.2f}초")
+        if "참고자료_절약_토큰" in result_row and pd.notna(result_row["참고자료_절약_토큰"]):
+            st.caption(f"참고 자료 {int(result_row['참고자료_토큰'])}토큰 사용 "
+                       f"(중복 제거·압축으로 {int(result_row['참고자료_절약_토큰'])}토큰 절약)")
+        
+        # Display duplicate answer information
+        if "중복_답안_대표" in result_row and pd.notna(result_row["중복_답안_대표"]):
+            st.caption(f"동일 답안 {int(result_row['중복_답안_수'])}건을 한 번에 채점했습니다 (대표: {result_row['중복_답안_대표']}).")
+        if "유사_답안_후보" in result_row and pd.notna(result_row["유사_답안_후보"]):
+            st.warning(f"유사 답안 후보: {result_row['유사_답안_후보']} — 검토가 필요할 수 있습니다.")
     
     def _render_dashboard(self, graded_results: List[Dict[str, Any]]):
         """
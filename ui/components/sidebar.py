@@ -55,10 +55,12 @@ class SidebarComponent:
         elif llm_provider == "Google":
             llm_model = st.selectbox("Google Gemini 모델 선택", ("gemini-2.5-pro", "gemini-2.5-flash"))
         
-        # Initialize selected LLM
+        # Initialize selected LLM (clients are cached by the LLM manager across reruns)
         if llm_model:
             selected_llm = self.llm_manager.get_llm(llm_provider, llm_model)
             self.state_manager.set('selected_llm', selected_llm)
+            self.state_manager.set('selected_llm_provider', llm_provider)
+            self.state_manager.set('selected_llm_model', llm_model)
             
             if selected_llm:
                 st.success(f"{llm_provider}의 {llm_model} 모델이 선택되었습니다.")
@@ -69,18 +71,41 @@ class SidebarComponent:
         """Render file upload interface for source documents."""
         st.subheader("Source Data 업로드")
         
-        uploaded_file = st.file_uploader(
+        uploaded_files = st.file_uploader(
             "문항 개발 시 사용된 원본 자료를 업로드하세요", 
             type=["pdf", "xlsx", "xls", "docx", "doc", "txt"], 
+            accept_multiple_files=True,
             key="file_uploader"
         )
         
-        if uploaded_file is not None:
-            success = self.file_service.process_uploaded_file(uploaded_file)
-            if success and self.file_service.has_source_documents():
-                document_count = self.file_service.get_documents_count()
-                if document_count > 0:
-                    st.info(f"현재 {document_count}개의 문서가 로드되어 있습니다.")
+        if uploaded_files:
+            progress_bar = None
+
+            def update_progress(completed: int, total: int, file_name: str, error: Optional[str]):
+                nonlocal progress_bar
+                if progress_bar is None:
+                    progress_bar = st.progress(0.0)
+                progress_bar.progress(completed / total, text=f"파일 처리 중... ({completed}/{total}) {file_name}")
+                if error:
+                    st.error(f"'{file_name}' 파일 처리 중 오류가 발생했습니다: {error}")
+                else:
+                    st.success(f"'{file_name}' 파일을 로드했습니다.")
+
+            self.file_service.process_uploaded_files(uploaded_files, progress_callback=update_progress)
+            if progress_bar is not None:
+                progress_bar.empty()
+
+            document_count = self.file_service.get_documents_count()
+            if document_count > 0:
+                st.info(f"현재 {document_count}개의 문서가 로드되어 있습니다.")
+
+        # Loaded sources accumulate across uploads; removing one drops its chunks on the next build
+        for file_name in self.file_service.get_source_file_names():
+            name_col, remove_col = st.columns([4, 1])
+            name_col.caption(file_name)
+            if remove_col.button("삭제", key=f"remove_source_{file_name}"):
+                self.file_service.remove_source_file(file_name)
+                st.rerun()
     
     def _render_chunking_section(self):
         """Render document chunking interface."""
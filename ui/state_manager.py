@@ -4,6 +4,7 @@ Handles all Streamlit session state operations in one place.
 """
 import streamlit as st
 from typing import Any, Dict, Optional
+from core.grading_config import GradingConfig
 
 
 class StateManager:
@@ -18,16 +19,23 @@ class StateManager:
         defaults = {
             'initialized': True,
             'selected_llm': None,
+            'selected_llm_provider': None,
+            'selected_llm_model': None,
             'source_documents': None,
             'uploaded_file_name': None,
+            'source_files': {},
+            'processed_upload_ids': set(),
             'chunks': None,
+            'chunk_settings': None,
             'vector_db': None,
+            'vector_db_fingerprint': None,
             'final_rubric': [],
             'rubric_items': [],
             'last_question_type': None,
             'student_answers_df': None,
             'uploaded_map_images': None,
-            'graded_results': []
+            'graded_results': [],
+            'grading_config': GradingConfig()
         }
         
         for key, default_value in defaults.items():
@@ -57,7 +65,7 @@ class StateManager:
     
     def clear_document_data(self) -> None:
         """Clear document-related data when new file is uploaded."""
-        keys_to_clear = ['chunks', 'vector_db']
+        keys_to_clear = ['chunks', 'chunk_settings', 'vector_db']
         for key in keys_to_clear:
             self.remove(key)
     
@@ -0,0 +1,255 @@
+"""
+SQLite 기반 청크 저장소.
+
+FAISS.save_local은 모든 청크 본문이 든 InMemoryDocstore를 통째로 피클로 저장하므로, 로드할 때 전체를
+역직렬화해야 하고 모든 청크가 메모리에 상주합니다. 이 모듈은 청크 본문과 메타데이터(JSON)를
+`chunks.sqlite`에 저장하고, 검색된 청크만 ID로 읽어옵니다. 벡터 위치와 청크 ID의 매핑도 같은 파일에 저장합니다.
+청크를 추가/삭제할 때 한국어 BM25 역색인(utils/sparse_index.py)도 같은 파일에서 함께 갱신합니다.
+"""
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+from utils.sparse_index import bm25_idf, bm25_term_score, tokenize_korean
+
+CHUNK_STORE_FILE = "chunks.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS index_map (position INTEGER PRIMARY KEY, id TEXT NOT NULL);
+"""
+_SPARSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sparse_docs (id TEXT PRIMARY KEY, length INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS sparse_postings (token TEXT NOT NULL, id TEXT NOT NULL, tf INTEGER NOT NULL,
+                                            PRIMARY KEY (token, id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sparse_postings_id ON sparse_postings (id);
+"""
+# SQLite 바인딩 변수 개수 제한(기본 999)보다 작게 나누어 조회합니다.
+_QUERY_BATCH_SIZE = 500
+
+
+def get_chunk_store_path(db_path: str) -> str:
+    """인덱스 경로의 청크 저장소 파일 경로를 반환합니다."""
+    return os.path.join(db_path, CHUNK_STORE_FILE)
+
+
+def _row_to_document(row: Tuple[str, str, str]) -> Document:
+    doc_id, content, metadata = row
+    return Document(page_content=content, metadata=json.loads(metadata), id=doc_id)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    청크를 ID로 지연 로드하는 docstore. LangChain FAISS의 docstore로 그대로 사용할 수 있습니다.
+    여러 작업자 스레드가 함께 검색하므로 하나의 연결을 잠금으로 보호합니다.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, read_only: bool = False):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._sparse_stats: Optional[Tuple[int, float]] = None
+        has_sparse_index = self._table_exists("sparse_docs")
+        if not read_only:
+            with self._lock:
+                self._connection.executescript(_SCHEMA + _SPARSE_SCHEMA)
+            if not has_sparse_index:
+                # BM25 역색인 도입 이전에 저장된 청크를 색인합니다.
+                rows = self._execute("SELECT id, content FROM chunks")
+                with self._lock:
+                    with self._connection:
+                        self._index_sparse(rows)
+            has_sparse_index = True
+        self.supports_sparse_search = has_sparse_index
+
+    def _table_exists(self, name: str) -> bool:
+        return bool(self._execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)))
+
+    @classmethod
+    def open(cls, path: str, read_only: bool = True) -> "SQLiteDocstore":
+        """
+        저장된 청크 저장소를 엽니다.
+
+        Args:
+            path: chunks.sqlite 파일 경로
+            read_only: True이면 파일을 읽기 전용으로 열어 필요한 청크만 읽습니다.
+                False이면 메모리로 복사하여 원본 파일을 바꾸지 않고 수정할 수 있게 합니다 (증분 갱신용).
+        """
+        if read_only:
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return cls(connection, read_only=True)
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            source.backup(connection)
+        finally:
+            source.close()
+        return cls(connection)
+
+    def _execute(self, sql: str, parameters: Sequence = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def search(self, search: str) -> Union[str, Document]:
+        """ID로 청크를 읽습니다. 없으면 InMemoryDocstore와 같은 오류 메시지를 반환합니다."""
+        rows = self._execute("SELECT id, content, metadata FROM chunks WHERE id = ?", (search,))
+        if not rows:
+            return f"ID {search} not found."
+        return _row_to_document(rows[0])
+
+    def mget(self, ids: Sequence[str]) -> List[Optional[Document]]:
+        """여러 청크를 한 번에 읽습니다. 없는 ID는 None으로 채워 순서를 유지합니다."""
+        found = {}
+        unique_ids = list(dict.fromkeys(ids))
+        for start in range(0, len(unique_ids), _QUERY_BATCH_SIZE):
+            batch = unique_ids[start:start + _QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            for row in self._execute(f"SELECT id, content, metadata FROM chunks WHERE id IN ({placeholders})",
+                                     batch):
+                found[row[0]] = _row_to_document(row)
+        return [found.get(doc_id) for doc_id in ids]
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """청크를 추가합니다. 이미 있는 ID이면 ValueError를 발생시킵니다."""
+        existing = [doc for doc in self.mget(list(texts)) if doc is not None]
+        if existing:
+            raise ValueError(f"Tried to add ids that already exist: {[doc.id for doc in existing]}")
+        rows = [(doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str))
+                for doc_id, doc in texts.items()]
+        with self._lock:
+            with self._connection:
+                self._connection.executemany("INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?)", rows)
+                self._index_sparse((doc_id, doc.page_content) for doc_id, doc in texts.items())
+
+    def delete(self, ids: List) -> None:
+        """청크를 삭제합니다. 주어진 ID가 하나도 없으면 ValueError를 발생시킵니다."""
+        if not any(doc is not None for doc in self.mget(ids)):
+            raise ValueError(f"Tried to delete ids that does not  exist: {ids}")
+        with self._lock:
+            with self._connection:
+                rows = [(doc_id,) for doc_id in ids]
+                self._connection.executemany("DELETE FROM chunks WHERE id = ?", rows)
+                self._connection.executemany("DELETE FROM sparse_docs WHERE id = ?", rows)
+                self._connection.executemany("DELETE FROM sparse_postings WHERE id = ?", rows)
+                self._sparse_stats = None
+
+    def _index_sparse(self, rows: Iterable[Tuple[str, str]]):
+        """청크 본문을 토큰화하여 BM25 역색인에 추가합니다 (잠금과 트랜잭션 안에서 호출)."""
+        for doc_id, content in rows:
+            term_freqs = Counter(tokenize_korean(content))
+            self._connection.execute("INSERT INTO sparse_docs (id, length) VALUES (?, ?)",
+                                     (doc_id, sum(term_freqs.values())))
+            self._connection.executemany("INSERT INTO sparse_postings (token, id, tf) VALUES (?, ?, ?)",
+                                         [(token, doc_id, tf) for token, tf in term_freqs.items()])
+        self._sparse_stats = None
+
+    def _get_sparse_stats(self) -> Tuple[int, float]:
+        """BM25용 (청크 수, 평균 길이)를 반환합니다. 쓰기와 같은 잠금 안에서 계산하고 캐시합니다."""
+        with self._lock:
+            if self._sparse_stats is None:
+                count, avg_length = self._connection.execute(
+                    "SELECT COUNT(*), AVG(length) FROM sparse_docs").fetchone()
+                self._sparse_stats = (count, avg_length or 0.0)
+            return self._sparse_stats
+
+    def sparse_search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        BM25로 쿼리와 어휘가 겹치는 청크를 찾습니다. 쿼리 토큰의 역색인 항목만 읽습니다.
+
+        Args:
+            query: 검색어 (학생 답안 등)
+            k: 반환할 청크 수
+
+        Returns:
+            list: 점수가 높은 순서의 (청크 ID, BM25 점수)
+        """
+        query_tokens = Counter(tokenize_korean(query))
+        if not self.supports_sparse_search or not query_tokens:
+            return []
+        num_docs, avg_length = self._get_sparse_stats()
+        if num_docs == 0:
+            return []
+
+        tokens = list(query_tokens)[:_QUERY_BATCH_SIZE]
+        placeholders = ",".join("?" * len(tokens))
+        rows = self._execute(
+            "SELECT p.token, p.id, p.tf, d.length FROM sparse_postings p JOIN sparse_docs d ON d.id = p.id "
+            f"WHERE p.token IN ({placeholders})", tokens)
+        doc_freqs = Counter(row[0] for row in rows)
+        idfs = {token: bm25_idf(doc_freq, num_docs) for token, doc_freq in doc_freqs.items()}
+        scores = defaultdict(float)
+        for token, doc_id, term_freq, length in rows:
+            scores[doc_id] += query_tokens[token] * bm25_term_score(term_freq, length, avg_length, idfs[token])
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM chunks")[0][0]
+
+    def load_index_map(self) -> Dict[int, str]:
+        """저장된 벡터 위치 -> 청크 ID 매핑을 읽습니다."""
+        return dict(self._execute("SELECT position, id FROM index_map ORDER BY position"))
+
+    def save(self, path: str, index_to_docstore_id: Dict[int, str]):
+        """인덱스에 남아 있는 청크와 벡터 위치 매핑을 새 파일에 저장합니다."""
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._connection.backup(target)
+            _write_index_map(target, index_to_docstore_id)
+        finally:
+            target.close()
+
+
+def _write_index_map(connection: sqlite3.Connection, index_to_docstore_id: Dict[int, str]):
+    with connection:
+        connection.execute("DELETE FROM index_map")
+        connection.executemany("INSERT INTO index_map (position, id) VALUES (?, ?)",
+                               sorted(index_to_docstore_id.items()))
+        # 인덱스에서 빠졌지만 docstore에 남은 청크는 저장하지 않습니다.
+        for table in ("chunks", "sparse_docs", "sparse_postings"):
+            connection.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT id FROM index_map)")
+
+
+def _iter_documents(docstore: Docstore, ids: Iterable[str]) -> Iterable[Tuple[str, Document]]:
+    for doc_id in ids:
+        doc = docstore.search(doc_id)
+        if isinstance(doc, Document):
+            yield doc_id, doc
+
+
+def save_chunk_store(db_path: str, docstore: Docstore, index_to_docstore_id: Dict[int, str]):
+    """
+    FAISS 저장소의 docstore를 인덱스 경로의 청크 저장소 파일로 저장합니다.
+
+    Args:
+        db_path: 인덱스 경로 (디렉터리)
+        docstore: InMemoryDocstore 또는 SQLiteDocstore
+        index_to_docstore_id: 벡터 위치 -> 청크 ID 매핑
+    """
+    path = get_chunk_store_path(db_path)
+    if isinstance(docstore, SQLiteDocstore):
+        docstore.save(path, index_to_docstore_id)
+        return
+    store = SQLiteDocstore(sqlite3.connect(path, check_same_thread=False))
+    try:
+        store.add(dict(_iter_documents(docstore, index_to_docstore_id.values())))
+        _write_index_map(store._connection, index_to_docstore_id)
+    finally:
+        store._connection.close()
+
+
+def load_chunk_store(db_path: str, read_only: bool = True) -> Tuple[SQLiteDocstore, Dict[int, str]]:
+    """
+    인덱스 경로의 청크 저장소와 벡터 위치 매핑을 엽니다.
+
+    Returns:
+        tuple: (SQLiteDocstore, 벡터 위치 -> 청크 ID 매핑)
+    """
+    docstore = SQLiteDocstore.open(get_chunk_store_path(db_path), read_only=read_only)
+    return docstore, docstore.load_index_map()
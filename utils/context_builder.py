@@ -0,0 +1,189 @@
+"""
+채점 프롬프트에 넣을 참고 자료를 토큰 예산 안에서 구성합니다.
+
+split_documents는 청크를 200자씩 겹치게 나누므로, 재정렬된 상위 청크를 그대로 이어 붙이면 같은 문장이
+여러 번 들어가고 입력 토큰이 불필요하게 늘어납니다. 이 모듈은 청크 사이의 겹치는 구간을 제거하고,
+토큰 예산이 주어지면 학생 답안과 어휘가 많이 겹치는 문장부터 예산 안에서 남깁니다.
+토큰 수는 채점 모델의 토크나이저(tiktoken)로 세고, 토크나이저를 쓸 수 없으면 대략적인 추정치를 사용합니다.
+"""
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from utils.sparse_index import tokenize_korean
+
+# 이보다 짧게 겹치는 구간은 우연히 같은 표현일 수 있으므로 제거하지 않습니다.
+DEFAULT_MIN_OVERLAP_CHARS = 30
+# tiktoken에 모델 정보가 없을 때 사용하는 인코딩 (다른 제공사 모델은 근사치)
+FALLBACK_ENCODING = "o200k_base"
+# 문장 끝 부호 또는 줄바꿈까지를 한 문장으로 봅니다.
+_SENTENCE_PATTERN = re.compile(r"[^.!?。\n]+(?:[.!?。]+|\n|$)")
+
+TokenCounter = Callable[[str], int]
+
+
+@dataclass
+class BuiltContext:
+    """참고 자료 구성 결과와 토큰 사용량."""
+    content: str
+    original_tokens: int
+    context_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.context_tokens, 0)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수를 추정합니다 (한국어 기준 약 2자당 1토큰)."""
+    return (len(text) + 1) // 2
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        # 인코딩 파일을 내려받지 못한 경우 등
+        return None
+    try:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception:
+        return None
+
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """
+    채점 모델의 토큰 수를 세는 함수를 반환합니다.
+
+    Args:
+        model: 모델 이름 (tiktoken이 모르는 모델은 o200k_base 인코딩으로 근사)
+
+    Returns:
+        callable: 텍스트를 받아 토큰 수를 반환하는 함수
+    """
+    encoding = _load_encoding(model or "")
+    if encoding is None:
+        return estimate_text_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def overlap_length(left: str, right: str, min_overlap: int = DEFAULT_MIN_OVERLAP_CHARS) -> int:
+    """
+    left의 끝부분과 right의 앞부분이 겹치는 가장 긴 길이를 구합니다.
+
+    Returns:
+        int: 겹치는 글자 수 (min_overlap보다 짧으면 0)
+    """
+    if min_overlap <= 0 or len(left) < min_overlap or len(right) < min_overlap:
+        return 0
+    probe = right[:min_overlap]
+    index = left.find(probe, max(0, len(left) - len(right)))
+    while index != -1:
+        # 가장 앞에서 찾은 위치가 가장 긴 겹침입니다.
+        if right.startswith(left[index:]):
+            return len(left) - index
+        index = left.find(probe, index + 1)
+    return 0
+
+
+def remove_overlaps(texts: Sequence[str], min_overlap: int = DEFAULT_MIN_OVERLAP_CHARS) -> List[str]:
+    """
+    앞선 청크와 겹치는 구간을 뒤의 청크에서 제거합니다.
+    재정렬 후에는 인접 청크의 순서가 바뀔 수 있으므로 양쪽 방향의 겹침을 모두 확인합니다.
+
+    Args:
+        texts: 관련도 순서의 청크 본문
+        min_overlap: 제거할 최소 겹침 길이
+
+    Returns:
+        list: 겹침이 제거된 본문 (완전히 포함된 청크는 빈 문자열)
+    """
+    kept: List[str] = []
+    results = []
+    for text in texts:
+        trimmed = text
+        for previous in kept:
+            if trimmed and trimmed in previous:
+                trimmed = ""
+                break
+            head = overlap_length(previous, trimmed, min_overlap)
+            if head:
+                trimmed = trimmed[head:]
+            tail = overlap_length(trimmed, previous, min_overlap)
+            if tail:
+                trimmed = trimmed[:len(trimmed) - tail]
+        kept.append(text)
+        results.append(trimmed.strip())
+    return results
+
+
+def split_sentences(text: str) -> List[str]:
+    """텍스트를 문장 단위로 나눕니다 (빈 문장 제외)."""
+    return [match.group().strip() for match in _SENTENCE_PATTERN.finditer(text) if match.group().strip()]
+
+
+def _select_sentences(pieces: Sequence[str], query: str, token_budget: int,
+                      count_tokens: TokenCounter) -> List[List[str]]:
+    """질의와 어휘가 많이 겹치는 문장부터 예산 안에서 고르고, 청크별 원래 순서로 돌려줍니다."""
+    query_tokens = set(tokenize_korean(query))
+    candidates: List[Tuple[float, int, int, str]] = []
+    for doc_rank, piece in enumerate(pieces):
+        for position, sentence in enumerate(split_sentences(piece)):
+            sentence_tokens = set(tokenize_korean(sentence))
+            score = len(sentence_tokens & query_tokens) / math.sqrt(len(sentence_tokens) or 1)
+            # 점수가 같으면 재정렬 순위가 높은 청크, 앞쪽 문장을 먼저 고릅니다.
+            candidates.append((-score, doc_rank, position, sentence))
+
+    selected: List[Tuple[int, int, str]] = []
+    used = 0
+    for _, doc_rank, position, sentence in sorted(candidates):
+        tokens = count_tokens(sentence)
+        if used + tokens <= token_budget:
+            selected.append((doc_rank, position, sentence))
+            used += tokens
+
+    sentences_by_doc: List[List[str]] = [[] for _ in pieces]
+    for doc_rank, _, sentence in sorted(selected):
+        sentences_by_doc[doc_rank].append(sentence)
+    return sentences_by_doc
+
+
+def build_context(documents: Sequence[Any], query: str = "", token_budget: int = 0,
+                  count_tokens: Optional[TokenCounter] = None, dedupe: bool = True,
+                  min_overlap: int = DEFAULT_MIN_OVERLAP_CHARS) -> BuiltContext:
+    """
+    재정렬된 문서로 채점 프롬프트의 참고 자료를 구성합니다.
+
+    Args:
+        documents: 관련도 순서의 문서 (page_content 속성)
+        query: 문장 선택 기준이 되는 질의 (학생 답안)
+        token_budget: 참고 자료의 최대 토큰 수 (0이면 제한 없음)
+        count_tokens: 토큰 수를 세는 함수 (기본값: 추정치)
+        dedupe: 청크 사이의 겹치는 구간 제거 여부
+        min_overlap: 제거할 최소 겹침 길이
+
+    Returns:
+        BuiltContext: 참고 자료 본문과 원래/최종 토큰 수
+    """
+    count_tokens = count_tokens or estimate_text_tokens
+    texts = [str(doc.page_content) for doc in documents]
+    original = "\n\n".join(texts)
+    original_tokens = count_tokens(original)
+
+    pieces = remove_overlaps(texts, min_overlap) if dedupe else texts
+    content = "\n\n".join(piece for piece in pieces if piece)
+    if token_budget > 0 and count_tokens(content) > token_budget:
+        sentences_by_doc = _select_sentences(pieces, query, token_budget, count_tokens)
+        content = "\n\n".join(" ".join(sentences) for sentences in sentences_by_doc if sentences)
+
+    context_tokens = original_tokens if content == original else count_tokens(content)
+    return BuiltContext(content=content, original_tokens=original_tokens, context_tokens=context_tokens)
@@ -1,7 +1,79 @@
 import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredExcelLoader, UnstructuredWordDocumentLoader, TextLoader
+from langchain_community.document_loaders import UnstructuredExcelLoader, UnstructuredWordDocumentLoader
+from langchain_community.document_loaders.blob_loaders import Blob
+from langchain_community.document_loaders.parsers import PyPDFParser
 from langchain.docstore.document import Document
+import atexit
+import multiprocessing
 import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# (파일 이름, MIME 타입, 파일 내용)
+FilePayload = Tuple[str, str, bytes]
+
+EXCEL_MIME_TYPES = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/vnd.ms-excel")
+WORD_MIME_TYPES = ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword")
+# 인코딩이 지정되지 않은 한글 텍스트 파일을 위해 UTF-8 다음으로 CP949를 시도합니다.
+TEXT_ENCODINGS = ("utf-8-sig", "cp949")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _decode_text(file_bytes: bytes) -> str:
+    """텍스트 파일 내용을 디코딩합니다."""
+    for encoding in TEXT_ENCODINGS:
+        try:
+            return file_bytes.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"텍스트 파일 인코딩을 인식할 수 없습니다 (지원: {', '.join(TEXT_ENCODINGS)})")
+
+
+def _load_with_temp_file(loader_class, file_name: str, file_bytes: bytes) -> List[Document]:
+    """
+    파일 경로가 필요한 로더를 위해 호출마다 별도의 임시 디렉터리에 파일을 쓰고, 로드 후 삭제합니다.
+    여러 세션이 같은 이름의 파일을 올려도 서로 덮어쓰지 않습니다.
+    """
+    with tempfile.TemporaryDirectory(prefix="source_upload_") as temp_dir:
+        # 로더가 확장자로 형식을 판단하므로 원래 파일 이름을 유지합니다.
+        file_path = os.path.join(temp_dir, os.path.basename(file_name) or "upload")
+        with open(file_path, "wb") as f:
+            f.write(file_bytes)
+        documents = loader_class(file_path).load()
+    for document in documents:
+        document.metadata["source"] = file_name
+    return documents
+
+
+def _load_file(file_name: str, file_type: str, file_bytes: bytes) -> List[Document]:
+    """
+    메모리의 파일 내용을 MIME 타입에 맞게 문서로 로드합니다. 실패 시 예외를 그대로 전달합니다.
+    PDF는 pypdf로 바이트에서 바로 읽고, 텍스트는 파일 없이 디코딩합니다.
+    경로가 필요한 Excel/Word 로더만 임시 파일을 사용합니다.
+    """
+    if file_type == "application/pdf":
+        return list(PyPDFParser().lazy_parse(Blob.from_data(file_bytes, path=file_name, mime_type=file_type)))
+    if file_type == "text/plain":
+        return [Document(page_content=_decode_text(file_bytes), metadata={"source": file_name})]
+    if file_type in EXCEL_MIME_TYPES:
+        return _load_with_temp_file(UnstructuredExcelLoader, file_name, file_bytes)
+    if file_type in WORD_MIME_TYPES:
+        return _load_with_temp_file(UnstructuredWordDocumentLoader, file_name, file_bytes)
+    raise ValueError(f"Unsupported file type: {file_type}")
+
+
+def _load_file_safely(file_name: str, file_type: str, file_bytes: bytes) -> Tuple[str, List[Document], Optional[str]]:
+    """작업 프로세스에서 실행됩니다. 한 파일의 오류가 다른 파일 처리에 영향을 주지 않도록 오류를 값으로 반환합니다."""
+    try:
+        return file_name, _load_file(file_name, file_type, file_bytes), None
+    except Exception as e:
+        return file_name, [], str(e)
+
 
 def load_document(uploaded_file):
     """
@@ -9,37 +81,78 @@ def load_document(uploaded_file):
     지원 형식: PDF, Excel, Word, Text
     """
     if uploaded_file is not None:
-        file_type = uploaded_file.type
-        file_name = uploaded_file.name
-        
-        # 데이터 디렉토리 확인 및 생성
-        data_dir = "./data"
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-        file_path = os.path.join(data_dir, file_name)
-
-        # 임시 파일로 저장
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        loader = None
-        if file_type == "application/pdf":
-            loader = PyPDFLoader(file_path)
-        elif file_type in ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/vnd.ms-excel"]:
-            loader = UnstructuredExcelLoader(file_path)
-        elif file_type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"]:
-            loader = UnstructuredWordDocumentLoader(file_path)
-        elif file_type == "text/plain":
-            loader = TextLoader(file_path)
-        
-        if loader is None:
-            print(f"Unsupported file type: {file_type}")
-            return []
+        _, documents, error = _load_file_safely(uploaded_file.name, uploaded_file.type, uploaded_file.getvalue())
+        if error:
+            print(f"Error loading document '{uploaded_file.name}': {error}")
+        return documents
+    return []
+
+
+def get_loader_workers() -> int:
+    """문서 로딩 프로세스 수를 반환합니다 (DOCUMENT_LOADER_WORKERS 환경 변수, 0이면 현재 프로세스에서 로드)."""
+    value = os.getenv("DOCUMENT_LOADER_WORKERS", "")
+    if value.isdigit():
+        return int(value)
+    return min(4, os.cpu_count() or 1)
+
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    프로세스 전체에서 공유하는 문서 로딩 프로세스 풀을 반환합니다.
+    Streamlit 서버는 여러 스레드를 사용하므로 fork 대신 spawn으로 작업 프로세스를 만듭니다.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+        return _process_pool
+
 
+def _reset_process_pool():
+    """손상된 프로세스 풀을 버립니다. 다음 호출 때 새로 만듭니다."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def load_documents_parallel(files: Sequence[FilePayload],
+                            max_workers: Optional[int] = None) -> Iterator[Tuple[str, List[Document], Optional[str]]]:
+    """
+    여러 파일을 프로세스 풀에서 병렬로 로드하고, 끝나는 순서대로 결과를 내보냅니다.
+    PDF/DOCX 파싱은 CPU를 많이 쓰고 GIL을 잡고 있으므로 스레드 대신 프로세스를 사용합니다.
+    파일이 하나뿐이거나 프로세스 풀을 사용할 수 없으면 현재 프로세스에서 순서대로 로드합니다.
+
+    Args:
+        files: (파일 이름, MIME 타입, 파일 내용) 목록
+        max_workers: 작업 프로세스 수 (기본값: DOCUMENT_LOADER_WORKERS 환경 변수)
+
+    Yields:
+        tuple: (파일 이름, 문서 목록, 오류 메시지 또는 None)
+    """
+    max_workers = get_loader_workers() if max_workers is None else max_workers
+    remaining = list(files)
+
+    if len(remaining) > 1 and max_workers > 0:
         try:
-            documents = loader.load()
-            return documents
-        except Exception as e:
-            print(f"Error loading document '{file_name}': {e}")
-            return []
-    return []
+            pool = _get_process_pool(max_workers)
+            futures = {pool.submit(_load_file_safely, *payload): payload for payload in remaining}
+            for future in as_completed(futures):
+                payload = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    result = (payload[0], [], str(e))
+                remaining.remove(payload)
+                yield result
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            print(f"문서 로딩 프로세스 풀을 사용할 수 없어 현재 프로세스에서 로드합니다: {e}")
+            _reset_process_pool()
+
+    for payload in remaining:
+        yield _load_file_safely(*payload)
@@ -2,6 +2,10 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 import streamlit as st
 
+# 쿼리와 문서를 같은 방식으로 인코딩하는(대칭) 임베딩 모델임을 밝히는 속성 이름.
+# 대칭 모델만 여러 검색 쿼리를 embed_documents 한 번으로 임베딩할 수 있습니다.
+SYMMETRIC_EMBEDDINGS_ATTR = "symmetric_query_embeddings"
+
 @st.cache_resource
 def get_embedding_model():
     """
@@ -24,3 +28,29 @@ def embed_documents(documents: list[Document], embeddings_model) -> list[list[fl
     texts = [doc.page_content for doc in documents]
     embedded_docs = embeddings_model.embed_documents(texts)
     return embedded_docs
+
+
+def is_symmetric_embedding(embeddings_model) -> bool:
+    """
+    임베딩 모델이 쿼리와 문서를 같은 방식으로 인코딩하는지 확인합니다.
+    `symmetric_query_embeddings` 속성이 있으면 그 값을 따르고, HuggingFaceEmbeddings는 쿼리 전용 인코딩
+    설정(query_encode_kwargs)이 없거나 문서 설정과 같을 때만 대칭으로 봅니다. 그 외 모델은 비대칭으로 간주합니다.
+    """
+    flag = getattr(embeddings_model, SYMMETRIC_EMBEDDINGS_ATTR, None)
+    if flag is not None:
+        return bool(flag)
+    if isinstance(embeddings_model, HuggingFaceEmbeddings):
+        query_kwargs = embeddings_model.query_encode_kwargs
+        return not query_kwargs or query_kwargs == embeddings_model.encode_kwargs
+    return False
+
+
+def embed_queries(queries: list[str], embeddings_model) -> list[list[float]]:
+    """
+    검색 쿼리를 임베딩합니다.
+    대칭 모델은 모든 쿼리를 embed_documents 한 번으로 임베딩하고, 그 외 모델은 쿼리마다 embed_query를
+    호출하여 쿼리 전용 인코딩(프롬프트 등)을 그대로 적용합니다.
+    """
+    if is_symmetric_embedding(embeddings_model):
+        return embeddings_model.embed_documents(queries)
+    return [embeddings_model.embed_query(query) for query in queries]
@@ -0,0 +1,144 @@
+"""
+프로세스 전체에서 공유하는 벡터 인덱스 레지스트리.
+
+같은 인덱스를 여러 세션이 사용해도 디스크에서 한 번만 로드합니다. 벡터는 FAISS의 mmap 읽기
+(IO_FLAG_MMAP)로 페이지 캐시를 공유하고, 청크는 SQLite 청크 저장소에서 검색된 것만 읽습니다.
+이전 형식(index.pkl)의 인덱스는 docstore를 프로세스당 한 번만 역직렬화합니다.
+세션에는 수정 메서드를 막은 읽기 전용 핸들(ReadOnlyFAISS)을 넘겨줍니다.
+
+환경 변수:
+    VECTOR_DB_REGISTRY_SIZE: 메모리에 유지할 최대 인덱스 수 (기본값: VECTOR_DB_MAX_INDEXES)
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import streamlit as st
+from langchain_community.vectorstores import FAISS
+
+from utils.chunk_store import get_chunk_store_path, load_chunk_store
+from utils.vector_index import VectorIndexConfig, apply_search_params
+
+# Flat/HNSW 벡터는 IO_FLAG_MMAP_IFC로, IVF 역색인 리스트는 IO_FLAG_MMAP로 mmap됩니다.
+# IVF 인덱스는 IO_FLAG_MMAP_IFC와 함께 읽을 수 없으므로 순서대로 시도합니다.
+_MMAP_READ_FLAGS = tuple(
+    flags | faiss.IO_FLAG_READ_ONLY
+    for flags in (faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0), faiss.IO_FLAG_MMAP)
+)
+DEFAULT_REGISTRY_SIZE = 5
+
+
+class ReadOnlyFAISS(FAISS):
+    """
+    여러 세션이 공유하는 읽기 전용 FAISS 저장소.
+    mmap으로 읽은 인덱스에 벡터를 추가하면 프로세스가 중단되므로 수정 메서드를 막습니다.
+    인덱스를 갱신하려면 utils.vector_db의 증분 갱신 함수를 사용하세요 (별도 사본을 수정한 뒤 저장).
+    """
+    # 로드한 경로와 index.faiss 수정 시각. 내용이 바뀌지 않으므로 검색 결과 캐시의 키로 사용합니다.
+    index_fingerprint: Optional[str] = None
+
+    def _read_only(self, *args, **kwargs):
+        raise PermissionError("공유 벡터 DB는 읽기 전용입니다. 새 인덱스를 구축하거나 증분 갱신을 사용하세요.")
+
+    add_texts = _read_only
+    add_documents = _read_only
+    add_embeddings = _read_only
+    delete = _read_only
+    merge_from = _read_only
+
+
+def read_index_mmap(index_file: str) -> Any:
+    """FAISS 인덱스를 mmap 읽기 전용으로 읽습니다. mmap을 지원하지 않는 형식이면 일반 읽기로 대체합니다."""
+    for flags in _MMAP_READ_FLAGS:
+        try:
+            return faiss.read_index(index_file, flags)
+        except RuntimeError:
+            continue
+    return faiss.read_index(index_file)
+
+
+def _load_shared_store(db_path: str, embeddings_model, index_config: VectorIndexConfig) -> ReadOnlyFAISS:
+    """save_local로 저장된 인덱스를 읽기 전용 공유 저장소로 로드합니다."""
+    index = apply_search_params(read_index_mmap(os.path.join(db_path, "index.faiss")), index_config)
+    if os.path.exists(get_chunk_store_path(db_path)):
+        docstore, index_to_docstore_id = load_chunk_store(db_path, read_only=True)
+    else:
+        # 청크 저장소 도입 이전에 FAISS.save_local로 저장된 docstore 피클
+        with open(os.path.join(db_path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    return ReadOnlyFAISS(embeddings_model, index, docstore, index_to_docstore_id)
+
+
+class VectorIndexRegistry:
+    """경로별로 공유 인덱스를 캐시하고, 최근 사용 순서로 개수를 제한하는 레지스트리."""
+
+    def __init__(self, max_entries: int = DEFAULT_REGISTRY_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.loads = 0
+        self._entries: "OrderedDict[str, Tuple[float, ReadOnlyFAISS]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, db_path: str, embeddings_model, index_config: Optional[VectorIndexConfig] = None) -> ReadOnlyFAISS:
+        """
+        경로의 인덱스에 대한 공유 핸들을 반환합니다. 처음 요청될 때만 디스크에서 로드합니다.
+        같은 경로에 인덱스가 다시 저장되면(index.faiss 수정 시각 변경) 새로 로드합니다.
+
+        Args:
+            db_path: save_local로 저장된 인덱스 경로
+            embeddings_model: 쿼리 임베딩 모델
+            index_config: 검색 파라미터 설정 (기본값: 환경 변수)
+
+        Returns:
+            ReadOnlyFAISS: 읽기 전용 공유 저장소
+        """
+        key = os.path.realpath(db_path)
+        version = os.path.getmtime(os.path.join(key, "index.faiss"))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # 같은 인덱스를 여러 세션이 동시에 요청해도 한 번만 로드합니다.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+            store = _load_shared_store(key, embeddings_model, index_config or VectorIndexConfig.from_env())
+            store.index_fingerprint = f"{key}@{version}"
+            with self._lock:
+                self._entries[key] = (version, store)
+                self._entries.move_to_end(key)
+                self.loads += 1
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._load_locks.pop(evicted, None)
+            return store
+
+    def clear(self):
+        """모든 공유 인덱스를 해제합니다 (세션이 참조 중인 핸들은 계속 사용할 수 있습니다)."""
+        with self._lock:
+            self._entries.clear()
+            self._load_locks.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """로드된 인덱스 수와 재사용/로드 횟수를 반환합니다."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "loads": self.loads}
+
+
+@st.cache_resource
+def get_index_registry() -> VectorIndexRegistry:
+    """프로세스 전체에서 공유하는 인덱스 레지스트리를 반환합니다."""
+    value = os.getenv("VECTOR_DB_REGISTRY_SIZE") or os.getenv("VECTOR_DB_MAX_INDEXES", "")
+    return VectorIndexRegistry(int(value) if value.isdigit() and int(value) > 0 else DEFAULT_REGISTRY_SIZE)
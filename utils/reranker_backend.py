@@ -0,0 +1,230 @@
+"""
+Reranker 추론 백엔드.
+
+기본값은 기존과 같은 PyTorch CrossEncoder이며, CPU 서버에서는 ONNX Runtime으로 내보낸
+모델(선택적으로 동적 int8 양자화)을 사용할 수 있습니다. ONNX 백엔드에는 optimum과
+onnxruntime 패키지가 필요하며(`pip install "optimum[onnxruntime]"`), 없으면 PyTorch로 대체합니다.
+
+환경 변수:
+    RERANKER_BACKEND: torch | onnx | onnx-int8 (기본값: torch)
+    RERANKER_NUM_THREADS: 추론 스레드 수 (기본값: 라이브러리 기본값)
+    RERANKER_ONNX_DIR: 내보낸 ONNX 모델 저장 경로
+    RERANKER_QUANTIZATION: int8 양자화 설정 (arm64 | avx2 | avx512 | avx512_vnni, 기본값: avx2)
+
+벤치마크:
+    python -m utils.reranker_backend --backend onnx-int8 --num-threads 4
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from sentence_transformers import CrossEncoder
+
+RERANKER_MODEL_NAME = "Dongjin-kr/ko-reranker"
+SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_ONNX_DIR = "./model_cache/ko-reranker-onnx"
+# ko-reranker 점수는 시그모이드(0~1) 값이므로 절대 오차로 비교합니다.
+DEFAULT_PARITY_TOLERANCE = 0.02
+
+
+@dataclass
+class RerankerConfig:
+    """Reranker 추론 백엔드 설정."""
+    backend: str = "torch"
+    num_threads: Optional[int] = None
+    onnx_dir: str = DEFAULT_ONNX_DIR
+    quantization: str = "avx2"
+
+    @classmethod
+    def from_env(cls) -> "RerankerConfig":
+        """환경 변수에서 설정을 읽습니다. 잘못된 값은 기본값으로 대체합니다."""
+        backend = os.getenv("RERANKER_BACKEND", "torch").strip().lower()
+        if backend not in SUPPORTED_BACKENDS:
+            print(f"지원하지 않는 RERANKER_BACKEND '{backend}', torch를 사용합니다.")
+            backend = "torch"
+        num_threads = os.getenv("RERANKER_NUM_THREADS")
+        return cls(
+            backend=backend,
+            num_threads=int(num_threads) if num_threads and num_threads.isdigit() and int(num_threads) > 0 else None,
+            onnx_dir=os.getenv("RERANKER_ONNX_DIR", DEFAULT_ONNX_DIR),
+            quantization=os.getenv("RERANKER_QUANTIZATION", "avx2")
+        )
+
+    def onnx_file_name(self) -> str:
+        """로드할 ONNX 파일 경로 (onnx_dir 기준)."""
+        if self.backend == "onnx-int8":
+            return f"onnx/model_qint8_{self.quantization}.onnx"
+        return "onnx/model.onnx"
+
+
+def _load_torch_reranker(config: RerankerConfig) -> CrossEncoder:
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    if config.num_threads and device == 'cpu':
+        torch.set_num_threads(config.num_threads)
+    return CrossEncoder(RERANKER_MODEL_NAME, device=device)
+
+
+def _load_onnx_reranker(config: RerankerConfig) -> CrossEncoder:
+    """ONNX로 내보낸 모델을 로드합니다. 처음 사용할 때 내보내기/양자화를 수행해 onnx_dir에 저장합니다."""
+    import onnxruntime as ort  # 선택 의존성
+
+    def _model_kwargs(file_name: Optional[str] = None) -> Dict[str, Any]:
+        session_options = ort.SessionOptions()
+        if config.num_threads:
+            session_options.intra_op_num_threads = config.num_threads
+        kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+        if file_name:
+            kwargs["file_name"] = file_name
+        return kwargs
+
+    if not os.path.exists(os.path.join(config.onnx_dir, "onnx", "model.onnx")):
+        print(f"Reranker를 ONNX로 내보내는 중: {config.onnx_dir}")
+        exported = CrossEncoder(RERANKER_MODEL_NAME, device="cpu", backend="onnx", model_kwargs=_model_kwargs())
+        exported.save_pretrained(config.onnx_dir)
+
+    if config.backend == "onnx-int8" and not os.path.exists(os.path.join(config.onnx_dir, config.onnx_file_name())):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        print(f"Reranker ONNX 모델을 int8로 양자화하는 중 ({config.quantization})")
+        base = CrossEncoder(config.onnx_dir, device="cpu", backend="onnx",
+                            model_kwargs=_model_kwargs("onnx/model.onnx"))
+        export_dynamic_quantized_onnx_model(base, config.quantization, config.onnx_dir)
+
+    return CrossEncoder(config.onnx_dir, device="cpu", backend="onnx",
+                        model_kwargs=_model_kwargs(config.onnx_file_name()))
+
+
+def load_reranker(config: Optional[RerankerConfig] = None) -> CrossEncoder:
+    """
+    설정된 백엔드로 Reranker를 로드합니다. ONNX 백엔드를 사용할 수 없으면 PyTorch로 대체합니다.
+
+    Args:
+        config: 백엔드 설정 (기본값: 환경 변수)
+
+    Returns:
+        CrossEncoder: predict(pairs, batch_size=...)를 지원하는 Reranker
+    """
+    config = config or RerankerConfig.from_env()
+    if config.backend in ("onnx", "onnx-int8"):
+        try:
+            return _load_onnx_reranker(config)
+        except ImportError as e:
+            print(f"ONNX Reranker 백엔드를 사용할 수 없어 PyTorch로 대체합니다 (optimum[onnxruntime] 필요): {e}")
+        except Exception as e:
+            print(f"ONNX Reranker 로드 중 오류 발생, PyTorch로 대체합니다: {e}")
+    return _load_torch_reranker(config)
+
+
+def _timed_predict(model: Any, pairs: List[List[str]], batch_size: int, repeats: int) -> Tuple[np.ndarray, float]:
+    """예측 점수와 반복 실행 중 가장 짧은 소요 시간(초)을 반환합니다 (첫 실행은 워밍업)."""
+    scores = np.asarray(model.predict(pairs, batch_size=batch_size), dtype=np.float64)
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        model.predict(pairs, batch_size=batch_size)
+        best = min(best, time.perf_counter() - start)
+    return scores, best
+
+
+def benchmark_rerankers(reference: Any, candidate: Any, samples: Sequence[Tuple[str, Sequence[str]]],
+                        top_k: int = 5, batch_size: int = 32, repeats: int = 3,
+                        tolerance: float = DEFAULT_PARITY_TOLERANCE) -> Dict[str, Any]:
+    """
+    두 Reranker의 지연 시간, 점수 차이, 순위 일치도를 비교합니다.
+
+    Args:
+        reference: 기준 모델 (기존 PyTorch CrossEncoder)
+        candidate: 비교할 모델 (예: ONNX int8)
+        samples: (답안, 후보 문서 목록) 리스트
+        top_k: 순위 비교에 사용할 상위 문서 수 (채점 프롬프트에 들어가는 개수)
+        batch_size: predict 배치 크기
+        repeats: 지연 시간 측정 반복 횟수
+        tolerance: 허용되는 최대 절대 점수 차이
+
+    Returns:
+        dict: 지연 시간(ms/쌍), 속도 향상 배율, 최대/평균 점수 차이, 허용 오차 충족 여부,
+            top-1 일치율, top-k 집합 겹침 비율
+    """
+    pairs = [[query, doc] for query, docs in samples for doc in docs]
+    if not pairs:
+        raise ValueError("벤치마크할 (답안, 문서) 쌍이 없습니다.")
+
+    reference_scores, reference_time = _timed_predict(reference, pairs, batch_size, repeats)
+    candidate_scores, candidate_time = _timed_predict(candidate, pairs, batch_size, repeats)
+    differences = np.abs(reference_scores - candidate_scores)
+
+    top1_matches, overlaps, offset = 0, [], 0
+    for _, docs in samples:
+        n = len(docs)
+        if n == 0:
+            continue
+        reference_order = np.argsort(-reference_scores[offset:offset + n], kind="stable")
+        candidate_order = np.argsort(-candidate_scores[offset:offset + n], kind="stable")
+        top1_matches += int(reference_order[0] == candidate_order[0])
+        k = min(top_k, n)
+        overlaps.append(len(set(reference_order[:k]) & set(candidate_order[:k])) / k)
+        offset += n
+
+    return {
+        "pairs": len(pairs),
+        "reference_ms_per_pair": reference_time / len(pairs) * 1000,
+        "candidate_ms_per_pair": candidate_time / len(pairs) * 1000,
+        "speedup": reference_time / candidate_time if candidate_time > 0 else float("inf"),
+        "max_abs_diff": float(differences.max()),
+        "mean_abs_diff": float(differences.mean()),
+        "within_tolerance": bool(differences.max() <= tolerance),
+        "top1_agreement": top1_matches / len(overlaps) if overlaps else 1.0,
+        "topk_overlap": float(np.mean(overlaps)) if overlaps else 1.0,
+    }
+
+
+# 벤치마크용 기본 예시 (지리 교과 답안과 참고 문단)
+_SAMPLE_DOCUMENTS = [
+    "수도권은 인구와 산업이 집중되어 주택 부족, 교통 혼잡 등의 문제가 나타난다.",
+    "제주도는 화산 활동으로 형성된 섬으로 현무암이 널리 분포한다.",
+    "우리나라의 기후는 여름에 고온 다습하고 겨울에 한랭 건조한 계절풍 기후이다.",
+    "농촌은 이촌 향도 현상으로 인구가 감소하고 고령화가 빠르게 진행되고 있다.",
+    "하천 하류에는 퇴적 작용으로 범람원과 삼각주가 발달한다.",
+    "도시 내부에는 도심, 부도심, 주거 지역 등 기능별로 분화된 지역이 나타난다.",
+    "해안에는 파랑의 침식으로 해식애와 파식대가 형성된다.",
+    "지역 축제와 지리적 표시제는 지역의 브랜드 가치를 높이는 지역화 전략이다.",
+    "공업 입지는 원료, 시장, 노동력, 집적 이익 등의 요인에 따라 달라진다.",
+    "열대 우림 기후 지역은 연중 기온이 높고 강수량이 많다.",
+]
+_SAMPLE_ANSWERS = [
+    "수도권에 인구가 몰려서 집값이 오르고 교통이 막힌다.",
+    "제주도는 화산섬이라 현무암이 많다.",
+    "농촌은 젊은 사람들이 도시로 떠나 노인 비율이 높아졌다.",
+    "하천 하류에는 삼각주가 생긴다.",
+    "공장은 원료나 시장과 가까운 곳에 세운다.",
+    "모르겠습니다.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ko-reranker 백엔드 마이크로 벤치마크")
+    parser.add_argument("--backend", choices=("onnx", "onnx-int8"), default="onnx-int8")
+    parser.add_argument("--num-threads", type=int, default=None)
+    parser.add_argument("--onnx-dir", default=DEFAULT_ONNX_DIR)
+    parser.add_argument("--quantization", default="avx2")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_PARITY_TOLERANCE)
+    args = parser.parse_args()
+
+    reference = load_reranker(RerankerConfig(backend="torch", num_threads=args.num_threads))
+    candidate = load_reranker(RerankerConfig(backend=args.backend, num_threads=args.num_threads,
+                                             onnx_dir=args.onnx_dir, quantization=args.quantization))
+    samples = [(answer, _SAMPLE_DOCUMENTS) for answer in _SAMPLE_ANSWERS]
+    result = benchmark_rerankers(reference, candidate, samples, batch_size=args.batch_size,
+                                 repeats=args.repeats, tolerance=args.tolerance)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
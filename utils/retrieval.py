@@ -1,64 +1,452 @@
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import os
+import threading
+import numpy as np
 import streamlit as st
 
-def get_retriever(vector_db: FAISS, k: int = 3):
+from core.answer_dedup import answer_hash, normalize_answer
+from utils.embedding import embed_queries
+from utils.reranker_backend import RerankerConfig, load_reranker
+
+RETRIEVAL_MODES = ("dense", "hybrid")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "")
+    return int(value) if value.isdigit() and int(value) > 0 else default
+
+
+@dataclass
+class RetrievalConfig:
+    """
+    채점 시 참고 문서 검색 설정.
+
+    환경 변수:
+        RETRIEVAL_MODE: dense | hybrid (기본값: hybrid, BM25 역색인이 없는 인덱스는 dense로 동작)
+        RETRIEVAL_K: 답안별 검색 문서 수 (기본값: 10)
+        RETRIEVAL_FETCH_K: 결합 전 밀집/BM25 검색에서 각각 가져올 후보 수 (기본값: 20)
+        RETRIEVAL_RRF_K: Reciprocal Rank Fusion 상수 (기본값: 60)
+    """
+    mode: str = "hybrid"
+    k: int = 10
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    @classmethod
+    def from_env(cls) -> "RetrievalConfig":
+        mode = os.getenv("RETRIEVAL_MODE", "hybrid").strip().lower()
+        if mode not in RETRIEVAL_MODES:
+            print(f"지원하지 않는 RETRIEVAL_MODE '{mode}', hybrid를 사용합니다.")
+            mode = "hybrid"
+        return cls(mode=mode, k=_env_int("RETRIEVAL_K", 10), fetch_k=_env_int("RETRIEVAL_FETCH_K", 20),
+                   rrf_k=_env_int("RETRIEVAL_RRF_K", 60))
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    FAISS 밀집 검색과 청크 저장소의 BM25 검색 결과를 Reciprocal Rank Fusion으로 결합하는 Retriever.
+    임베딩이 놓치는 지명/용어의 정확한 일치를 BM25가 보완합니다.
+    """
+    vectorstore: FAISS
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        return _cached_search(self, [query])[0]
+
+
+def supports_hybrid_search(vector_db) -> bool:
+    """벡터 DB의 docstore에 BM25 역색인이 있는지 확인합니다 (SQLite 청크 저장소)."""
+    return getattr(getattr(vector_db, "docstore", None), "supports_sparse_search", False) is True
+
+
+def get_retriever(vector_db: FAISS, k: int = 3, config: RetrievalConfig = None):
     """
     FAISS 벡터 DB로부터 Retriever를 생성합니다.
+    하이브리드 모드이고 BM25 역색인이 있으면 HybridRetriever를, 아니면 밀집 검색 Retriever를 반환합니다.
     """
+    config = config or RetrievalConfig.from_env()
+    if config.mode == "hybrid" and supports_hybrid_search(vector_db):
+        return HybridRetriever(vectorstore=vector_db, k=k, fetch_k=config.fetch_k, rrf_k=config.rrf_k)
     return vector_db.as_retriever(search_kwargs={"k": k})
 
-def retrieve_documents(retriever, query: str, student_name: str) -> list[Document]:
+def retrieve_documents(retriever, query: str, student_name: str, show_status: bool = True) -> list[Document]:
     """
     주어진 쿼리에 대해 관련 문서를 검색합니다.
+    show_status가 False이면 Streamlit 상태 메시지를 표시하지 않습니다 (작업자 스레드에서 호출 시).
     """
     if not retriever:
-        st.error("Retriever가 초기화되지 않았습니다.")
+        if show_status:
+            st.error("Retriever가 초기화되지 않았습니다.")
         return []
+
+    if not show_status:
+        try:
+            return _invoke_retriever(retriever, query)
+        except Exception as e:
+            print(f"문서 검색 중 오류 발생 ({student_name}): {e}")
+            return []
     
     with st.spinner(f"{student_name} 학생의 답안과 관련된 문서를 검색 중..."):
         try:
-            docs = retriever.invoke(query)
+            docs = _invoke_retriever(retriever, query)
             st.success(f"{student_name} 학생의 답안과 관련된 {len(docs)}개의 관련 문서를 찾았습니다.")
             return docs
         except Exception as e:
             st.error(f"문서 검색 중 오류 발생: {e}")
             return []
 
-from sentence_transformers import CrossEncoder
-import torch
+
+def _invoke_retriever(retriever, query: str) -> list[Document]:
+    """검색 결과 캐시를 사용할 수 있으면 캐시를 거쳐 검색하고, 실패하면 Retriever를 직접 호출합니다."""
+    if _get_search_function(retriever) is not None:
+        try:
+            return _cached_search(retriever, [query])[0]
+        except Exception as e:
+            print(f"캐시 검색 실패, Retriever로 다시 검색합니다: {e}")
+    return retriever.invoke(query)
+
+
+ScoredIds = list[tuple[str, float]]
+
+
+def normalizes_embeddings(vector_db: FAISS) -> bool:
+    """
+    FAISS 벡터 저장소가 벡터를 L2 정규화해 저장/검색하는지(normalize_L2=True로 생성) 확인합니다.
+    langchain의 FAISS는 이 설정을 공개 속성으로 제공하지 않으므로 이 함수에서만 읽습니다.
+    """
+    return bool(getattr(vector_db, "_normalize_L2", False))
+
+
+def _dense_search(vector_db: FAISS, queries: list[str], k: int) -> list[ScoredIds]:
+    """
+    모든 쿼리를 임베딩하고(대칭 임베딩 모델이면 embed_documents 한 번으로), 쌓은 쿼리 행렬로 FAISS 검색을
+    한 번 수행합니다.
+
+    Returns:
+        list: 쿼리별 (청크 ID, 거리) 목록 (유사도 순)
+    """
+    queries = [str(query) for query in queries]
+    embedding_function = vector_db.embedding_function
+    if isinstance(embedding_function, Embeddings):
+        vectors = embed_queries(queries, embedding_function)
+    else:
+        vectors = [embedding_function(query) for query in queries]
+    query_matrix = np.asarray(vectors, dtype=np.float32)
+    if normalizes_embeddings(vector_db):
+        norms = np.linalg.norm(query_matrix, axis=1, keepdims=True)
+        query_matrix = query_matrix / np.where(norms == 0, 1, norms)
+
+    distances, indices = vector_db.index.search(query_matrix, k)
+    # 문서 수가 k보다 적으면 -1이 반환됩니다.
+    return [[(vector_db.index_to_docstore_id[i], float(d)) for i, d in zip(row, dists) if i != -1]
+            for row, dists in zip(indices, distances)]
+
+
+def _documents_for_ids(vector_db: FAISS, rows: list[ScoredIds]) -> list[list[Document]]:
+    """쿼리별 (청크 ID, 점수) 목록을 문서 목록으로 바꿉니다. 검색된 청크만 한 번에 읽어옵니다."""
+    documents = _fetch_documents(vector_db.docstore, list(dict.fromkeys(i for row in rows for i, _ in row)))
+    return [[documents[doc_id] for doc_id, _ in row if doc_id in documents] for row in rows]
+
+
+def _rrf_scores(rankings: list[list[str]], rrf_k: int = 60) -> ScoredIds:
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], rrf_k: int = 60) -> list[str]:
+    """
+    여러 검색 결과 순위를 Reciprocal Rank Fusion(점수 = Σ 1 / (rrf_k + 순위))으로 결합합니다.
+    검색기마다 점수 척도가 달라도 순위만 사용하므로 정규화가 필요 없습니다.
+    """
+    return [doc_id for doc_id, _ in _rrf_scores(rankings, rrf_k)]
+
+
+def _hybrid_search_ids(vector_db: FAISS, queries: list[str], k: int, fetch_k: int = 20,
+                       rrf_k: int = 60) -> list[ScoredIds]:
+    """
+    밀집 검색(모든 쿼리를 한 번에)과 쿼리별 BM25 검색에서 각각 fetch_k개 후보를 가져와 RRF로 결합합니다.
+
+    Returns:
+        list: 쿼리별 (청크 ID, RRF 점수) 목록
+    """
+    queries = [str(query) for query in queries]
+    fetch_k = max(k, fetch_k)
+    dense_rows = _dense_search(vector_db, queries, fetch_k)
+    fused_rows = []
+    for query, dense in zip(queries, dense_rows):
+        sparse_ids = [doc_id for doc_id, _ in vector_db.docstore.sparse_search(query, fetch_k)]
+        fused_rows.append(_rrf_scores([[doc_id for doc_id, _ in dense], sparse_ids], rrf_k)[:k])
+    return fused_rows
+
+
+def _fetch_documents(docstore, ids: list[str]) -> dict[str, Document]:
+    """
+    청크 ID로 문서를 가져옵니다. 일괄 조회(mget)를 지원하는 docstore(SQLite 청크 저장소)는 한 번에 읽습니다.
+    """
+    if hasattr(docstore, "mget"):
+        docs = docstore.mget(ids)
+    else:
+        docs = [docstore.search(doc_id) for doc_id in ids]
+    return {doc_id: doc for doc_id, doc in zip(ids, docs) if isinstance(doc, Document)}
+
+
+class RetrievalCache:
+    """
+    (인덱스 지문, 정규화된 답안, 검색 설정) -> (청크 ID, 점수) 목록을 저장하는 LRU 캐시.
+    재채점이나 같은 답안을 다시 검색할 때 임베딩과 FAISS/BM25 검색을 건너뜁니다.
+    Reranker 점수는 (답안, 청크 ID)별로 따로 캐시되므로 적중 시 재정렬 모델 호출도 생략됩니다.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """저장된 (청크 ID, 점수) 목록을 반환합니다. 없으면 None."""
+        with self._lock:
+            row = self._entries.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(row)
+
+    def put(self, key: tuple, row: ScoredIds):
+        with self._lock:
+            self._entries[key] = tuple(row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """모든 항목과 적중/미스 횟수를 초기화합니다."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> dict:
+        """캐시 항목 수와 적중/미스 횟수를 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_retrieval_cache = RetrievalCache(_env_int("RETRIEVAL_CACHE_SIZE", 5000))
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """프로세스 전체에서 공유하는 검색 결과 캐시를 반환합니다 (RETRIEVAL_CACHE_SIZE 환경 변수로 크기 설정)."""
+    return _retrieval_cache
+
+
+def _get_search_function(retriever):
+    """
+    ID 단위 일괄 검색을 지원하는 Retriever이면 (검색 함수, 검색 설정 서명)을, 아니면 None을 반환합니다.
+    검색 함수는 쿼리 목록을 받아 쿼리별 (청크 ID, 점수) 목록을 반환합니다.
+    """
+    vector_db = getattr(retriever, "vectorstore", None)
+    if isinstance(retriever, HybridRetriever):
+        def search(queries):
+            return _hybrid_search_ids(vector_db, queries, retriever.k, retriever.fetch_k, retriever.rrf_k)
+        return search, ("hybrid", retriever.k, retriever.fetch_k, retriever.rrf_k)
+
+    search_kwargs = getattr(retriever, "search_kwargs", None) or {}
+    if (isinstance(vector_db, FAISS) and getattr(retriever, "search_type", "similarity") == "similarity"
+            and set(search_kwargs) <= {"k"}):
+        k = search_kwargs.get("k", 4)
+
+        def search(queries):
+            return _dense_search(vector_db, queries, k)
+        return search, ("dense", k)
+    return None
+
+
+def _cached_search(retriever, queries: list[str]) -> list[list[Document]]:
+    """
+    검색 결과 캐시를 확인하고, 캐시에 없는 답안만 한 번에 검색합니다.
+    공유 인덱스(읽기 전용이라 내용이 바뀌지 않음)만 캐시하며, 수정 가능한 인덱스는 매번 검색합니다.
+    """
+    search, signature = _get_search_function(retriever)
+    vector_db = retriever.vectorstore
+    fingerprint = getattr(vector_db, "index_fingerprint", None)
+    if fingerprint is None:
+        return _documents_for_ids(vector_db, search(queries))
+
+    cache = get_retrieval_cache()
+    keys = [(fingerprint, normalize_answer(query), *signature) for query in queries]
+    rows = [cache.get(key) for key in keys]
+    # 정규화 후 같은 답안은 한 번만 검색합니다.
+    pending = {key: query for key, query, row in zip(keys, queries, rows) if row is None}
+    if pending:
+        found = dict(zip(pending, search(list(pending.values()))))
+        for key, row in found.items():
+            cache.put(key, row)
+        rows = [found[key] if row is None else row for key, row in zip(keys, rows)]
+    return _documents_for_ids(vector_db, rows)
+
+
+def batch_retrieve_documents(retriever, queries: list[str], show_status: bool = True) -> list[list[Document]]:
+    """
+    여러 쿼리(학생 답안)에 대한 관련 문서를 한 번에 검색합니다.
+    FAISS 기반 유사도 검색 Retriever와 HybridRetriever는 임베딩 1회 + FAISS 검색 1회로 처리하고
+    (검색 결과 캐시에 있는 답안은 제외), 그 외 Retriever(MMR, 점수 임계값 등)는 쿼리별 검색으로 대체합니다.
+
+    Returns:
+        list: 쿼리 순서대로 정렬된 문서 리스트의 리스트
+    """
+    if not queries:
+        return []
+    if not retriever:
+        if show_status:
+            st.error("Retriever가 초기화되지 않았습니다.")
+        return [[] for _ in queries]
+
+    if _get_search_function(retriever) is None:
+        return [retrieve_documents(retriever, query, f"#{i + 1}", show_status=False) for i, query in enumerate(queries)]
+
+    try:
+        if show_status:
+            with st.spinner(f"{len(queries)}개 답안과 관련된 문서를 한 번에 검색 중..."):
+                results = _cached_search(retriever, queries)
+            st.success(f"{len(queries)}개 답안의 관련 문서 검색을 완료했습니다.")
+            return results
+        return _cached_search(retriever, queries)
+    except Exception as e:
+        print(f"일괄 문서 검색 중 오류 발생, 답안별 검색으로 대체합니다: {e}")
+        return [retrieve_documents(retriever, query, f"#{i + 1}", show_status=False) for i, query in enumerate(queries)]
+
+
+# 여러 작업자 스레드가 동시에 채점할 때 토크나이저/모델 동시 접근을 막기 위한 잠금
+_reranker_lock = threading.Lock()
 
 
 @st.cache_resource
 def get_reranker_model():
     """
     Reranker 모델을 로드합니다. GPU가 사용 가능하면 GPU를 사용합니다.
+    RERANKER_BACKEND 환경 변수로 ONNX Runtime(int8 양자화 포함) 백엔드를 선택할 수 있습니다.
     """
-    model_name = "Dongjin-kr/ko-reranker"
-    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    return CrossEncoder(model_name, device=device)
+    return load_reranker(RerankerConfig.from_env())
+
+# (정규화된 답안 해시, 청크 ID) -> Reranker 점수. 재채점이나 같은 청크를 공유하는 답안 간에 점수를 재사용합니다.
+# 검색 결과 캐시와 같은 정규화를 사용하므로, 검색 캐시에 적중한 답안은 재정렬도 건너뜁니다.
+_RERANK_SCORE_CACHE_SIZE = 50000
+_rerank_score_cache: "OrderedDict[tuple, float]" = OrderedDict()
+_rerank_score_cache_lock = threading.Lock()
+
 
-def rerank_documents(documents: list[Document], query: str) -> list[Document]:
+def _chunk_id(doc: Document) -> str:
+    """문서 청크의 식별자를 반환합니다 (ID가 없으면 내용과 출처로 해시)."""
+    if getattr(doc, "id", None):
+        return doc.id
+    key = f"{doc.metadata.get('source', '')}|{doc.metadata.get('page', '')}|{doc.page_content}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def merge_documents(document_lists: list[list[Document]]) -> list[Document]:
+    """여러 문서 목록을 순서대로 합치고, 같은 청크는 처음 나온 것만 남깁니다."""
+    merged = {}
+    for documents in document_lists:
+        for doc in documents or []:
+            merged.setdefault(_chunk_id(doc), doc)
+    return list(merged.values())
+
+
+def clear_rerank_score_cache():
+    """Reranker 점수 캐시를 비웁니다."""
+    with _rerank_score_cache_lock:
+        _rerank_score_cache.clear()
+
+
+def batch_rerank_documents(documents_list: list[list[Document]], queries: list[str], top_n: int = 5,
+                           batch_size: int = 64, show_status: bool = True) -> list[list[Document]]:
+    """
+    여러 학생의 (답안, 청크) 쌍을 모아 CrossEncoder.predict를 한 번만 호출하여 재정렬합니다.
+    점수는 (정규화된 답안 해시, 청크 ID)로 캐시되며, 캐시에 없는 쌍만 모델에 전달됩니다.
+
+    Args:
+        documents_list: 학생별 검색 문서 리스트
+        queries: 학생별 답안 (documents_list와 같은 순서)
+        top_n: 학생별로 남길 상위 문서 수
+        batch_size: CrossEncoder 배치 크기
+        show_status: Streamlit 상태 메시지 표시 여부
+
+    Returns:
+        list: 학생별 상위 top_n개 문서 리스트
+    """
+    query_hashes = [answer_hash(query) for query in queries]
+    keyed_documents = [
+        [((query_hash, _chunk_id(doc)), doc) for doc in documents or []]
+        for query_hash, documents in zip(query_hashes, documents_list)
+    ]
+
+    # 캐시된 점수는 가져오고, 캐시에 없는 쌍만 중복 없이 수집
+    scores = {}
+    pending = {}
+    with _rerank_score_cache_lock:
+        for query, keyed in zip(queries, keyed_documents):
+            for key, doc in keyed:
+                if key in _rerank_score_cache:
+                    scores[key] = _rerank_score_cache[key]
+                    _rerank_score_cache.move_to_end(key)
+                elif key not in pending:
+                    pending[key] = [str(query), doc.page_content]
+
+    if pending:
+        reranker = get_reranker_model()
+        with _reranker_lock:
+            predicted = reranker.predict(list(pending.values()), batch_size=batch_size)
+        new_scores = dict(zip(pending.keys(), (float(score) for score in predicted)))
+        scores.update(new_scores)
+        with _rerank_score_cache_lock:
+            _rerank_score_cache.update(new_scores)
+            while len(_rerank_score_cache) > _RERANK_SCORE_CACHE_SIZE:
+                _rerank_score_cache.popitem(last=False)
+
+    results = []
+    for keyed in keyed_documents:
+        # 점수가 높은 순서대로 문서만 반환
+        scored_documents = sorted(((scores[key], doc) for key, doc in keyed), key=lambda x: x[0], reverse=True)
+        results.append([doc for score, doc in scored_documents][:top_n])
+
+    if show_status:
+        st.info(f"{len(queries)}개 답안의 문서 {len(pending)}쌍을 한 번에 재정렬했습니다 (캐시 재사용 제외).")
+    return results
+
+
+def rerank_documents(documents: list[Document], query: str, show_status: bool = True) -> list[Document]:
     """
     검색된 문서를 쿼리와의 관련성 기준으로 재정렬합니다. 배치 처리를 사용합니다.
     """
     if not documents:
         return []
 
-    reranker = get_reranker_model()
-    
-    # 쿼리와 각 문서의 텍스트 쌍을 생성
-    pairs = [[query, doc.page_content] for doc in documents]
-    
-    # CrossEncoder를 사용하여 점수 계산 (배치 처리 적용)
-    scores = reranker.predict(pairs, batch_size=32) # 배치 크기 조정 가능
-    
-    # 문서와 점수를 묶어서 정렬
-    scored_documents = sorted(zip(scores, documents), key=lambda x: x[0], reverse=True)
-    
-    # 점수가 높은 순서대로 문서만 반환
-    reranked_docs = [doc for score, doc in scored_documents]
+    # 점수 캐시를 공유하도록 일괄 재정렬 경로를 사용
+    reranked_docs = batch_rerank_documents([documents], [query], top_n=len(documents), batch_size=32,
+                                           show_status=False)[0]
     
-    st.info(f"Rerank를 통해 {len(reranked_docs)}개의 문서가 재정렬되었고, 상위 5개가 선택되었습니다.")
+    if show_status:
+        st.info(f"Rerank를 통해 {len(reranked_docs)}개의 문서가 재정렬되었고, 상위 5개가 선택되었습니다.")
     return reranked_docs[:5]
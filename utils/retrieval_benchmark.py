@@ -0,0 +1,113 @@
+"""
+밀집 검색과 하이브리드(BM25 + 밀집, RRF) 검색의 recall@k 벤치마크.
+
+저장된 인덱스의 청크에서 일부 구간을 잘라 쿼리로 사용하고(학생 답안이 교재 표현을 옮겨 쓰는 경우를 흉내),
+원래 청크가 상위 k개 안에 검색되는 비율을 측정합니다. 하이브리드 검색이 더 작은 k에서 같은 recall을
+내면 RETRIEVAL_K를 낮춰 Reranker가 채점할 (답안, 청크) 쌍을 줄일 수 있습니다.
+
+    python -m utils.retrieval_benchmark --index-path ./vector_db/<지문> --k 3 5 10
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from utils.retrieval import _dense_search, reciprocal_rank_fusion, supports_hybrid_search
+
+
+def make_known_item_queries(documents: Sequence[Tuple[str, str]], num_queries: int = 200, span_chars: int = 80,
+                            seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    청크 본문의 임의 구간(어절 경계 기준 약 span_chars자)을 쿼리로 만듭니다.
+
+    Args:
+        documents: (청크 ID, 본문) 목록
+        num_queries: 만들 쿼리 수 (청크 수보다 많으면 청크 수)
+        span_chars: 쿼리 길이
+        seed: 난수 시드
+
+    Returns:
+        list: (쿼리, 정답 청크 ID) 목록
+    """
+    rng = random.Random(seed)
+    candidates = [(doc_id, text.split()) for doc_id, text in documents if text.split()]
+    queries = []
+    for doc_id, words in rng.sample(candidates, min(num_queries, len(candidates))):
+        start = rng.randrange(len(words))
+        span = []
+        for word in words[start:]:
+            span.append(word)
+            if len(" ".join(span)) >= span_chars:
+                break
+        queries.append((" ".join(span), doc_id))
+    return queries
+
+
+def benchmark_retrieval(vector_db, queries: Sequence[Tuple[str, str]], ks: Sequence[int] = (3, 5, 10),
+                        fetch_k: int = 20, rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """
+    밀집 검색과 하이브리드 검색의 recall@k, 쿼리당 지연 시간, Reranker 입력 쌍 수를 측정합니다.
+
+    Args:
+        vector_db: BM25 역색인이 있는 청크 저장소를 사용하는 FAISS 벡터 DB
+        queries: (쿼리, 정답 청크 ID) 목록
+        ks: 측정할 검색 문서 수
+        fetch_k: 하이브리드 결합 전 각 검색기의 후보 수
+        rrf_k: Reciprocal Rank Fusion 상수
+
+    Returns:
+        list: (mode, k)별 결과 (recall_at_k, ms_per_query, rerank_pairs)
+    """
+    if not supports_hybrid_search(vector_db):
+        raise ValueError("BM25 역색인이 없는 인덱스입니다. 청크 저장소 형식으로 다시 구축하세요.")
+    texts = [query for query, _ in queries]
+    targets = [doc_id for _, doc_id in queries]
+    depth = max(max(ks), fetch_k)
+
+    start = time.perf_counter()
+    dense_rows = [[doc_id for doc_id, _ in row] for row in _dense_search(vector_db, texts, depth)]
+    dense_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sparse_rows = [[doc_id for doc_id, _ in vector_db.docstore.sparse_search(text, depth)] for text in texts]
+    hybrid_rows = [reciprocal_rank_fusion([dense, sparse], rrf_k) for dense, sparse in zip(dense_rows, sparse_rows)]
+    hybrid_seconds = dense_seconds + time.perf_counter() - start
+
+    results = []
+    for mode, rows, seconds in (("dense", dense_rows, dense_seconds), ("hybrid", hybrid_rows, hybrid_seconds)):
+        for k in sorted(ks):
+            hits = sum(target in row[:k] for target, row in zip(targets, rows))
+            results.append({
+                "mode": mode,
+                "k": k,
+                "recall_at_k": hits / max(len(queries), 1),
+                "ms_per_query": seconds / max(len(queries), 1) * 1000,
+                "rerank_pairs": len(queries) * k,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="밀집 vs 하이브리드(BM25 + 밀집) 검색 recall@k 벤치마크")
+    parser.add_argument("--index-path", required=True, help="저장된 벡터 DB 경로 (./vector_db/<지문>)")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--span-chars", type=int, default=80, help="청크에서 잘라낼 쿼리 길이")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--rrf-k", type=int, default=60)
+    args = parser.parse_args()
+
+    from utils.embedding import get_embedding_model
+    from utils.index_registry import get_index_registry
+
+    vector_db = get_index_registry().get(args.index_path, get_embedding_model())
+    ids = list(vector_db.index_to_docstore_id.values())
+    documents = [(doc.id, doc.page_content) for doc in vector_db.docstore.mget(ids) if doc is not None]
+    queries = make_known_item_queries(documents, args.num_queries, args.span_chars)
+    results = benchmark_retrieval(vector_db, queries, args.k, args.fetch_k, args.rrf_k)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+한국어 희소(BM25) 검색용 토큰화와 점수 계산.
+
+임베딩 모델은 답안에 쓰인 지명이나 용어(예: 제주, 해안 침식)를 정확히 일치시키지 못하는 경우가 많아,
+청크 저장소에 BM25 역색인을 함께 저장해 밀집 검색과 결합합니다. 형태소 분석기 없이도 조사와 어미가
+붙은 어절에서 용어를 찾을 수 있도록 한글은 음절 n-gram(기본 2-gram)으로 나눕니다.
+"""
+import math
+import re
+from typing import List
+
+# 한글 음절, 영문/숫자 단어 (소문자로 변환 후 적용)
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+DEFAULT_NGRAM = 2
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize_korean(text: str, ngram: int = DEFAULT_NGRAM) -> List[str]:
+    """
+    텍스트를 BM25 색인용 토큰으로 나눕니다.
+    한글 어절은 음절 n-gram으로 나누고(n보다 짧으면 그대로), 영문/숫자는 단어 단위로 사용합니다.
+
+    Args:
+        text: 원문
+        ngram: 한글 음절 n-gram 크기
+
+    Returns:
+        list: 토큰 목록 (중복 포함)
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(str(text).lower()):
+        word = match.group()
+        if "가" <= word[0] <= "힣" and len(word) > ngram:
+            tokens.extend(word[i:i + ngram] for i in range(len(word) - ngram + 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def bm25_idf(doc_freq: int, num_docs: int) -> float:
+    """토큰이 나타난 청크 수로 BM25 역문서 빈도를 계산합니다 (항상 양수)."""
+    return math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def bm25_term_score(term_freq: int, doc_length: int, avg_length: float, idf: float,
+                    k1: float = BM25_K1, b: float = BM25_B) -> float:
+    """한 토큰이 한 청크에 기여하는 BM25 점수를 계산합니다."""
+    norm = k1 * (1 - b + b * doc_length / (avg_length or 1))
+    return idf * term_freq * (k1 + 1) / (term_freq + norm)
@@ -1,11 +1,394 @@
+"""
+FAISS 벡터 데이터베이스 생성/저장/로드.
+
+인덱스는 코퍼스 지문(원본 파일 내용, 청크 크기/중첩, 임베딩 모델 이름의 해시)별로
+`<base_dir>/<fingerprint>/`에 저장됩니다. 같은 지문의 인덱스가 있으면 다시 임베딩하지 않고
+바로 재사용하며, 저장된 인덱스가 최대 개수를 넘으면 가장 오래 사용되지 않은 것부터 삭제합니다.
+원본 파일을 추가/삭제할 때는 청크 매니페스트(원본 파일별 청크 내용 해시)를 비교하여
+새 청크만 임베딩해 추가하고 빠진 청크는 삭제합니다.
+
+환경 변수:
+    VECTOR_DB_DIR: 인덱스 저장 경로 (기본값: ./vector_db)
+    VECTOR_DB_MAX_INDEXES: 보관할 최대 인덱스 수 (기본값: 5)
+    EMBEDDING_BATCH_SIZE: 한 번에 임베딩해 인덱스에 추가할 청크 수 (기본값: 64)
+    인덱스 유형(HNSW, IVF, IVF-PQ) 설정은 utils/vector_index.py를 참고하세요.
+
+청크 본문은 피클 대신 SQLite 청크 저장소(utils/chunk_store.py)에 저장되어 검색된 청크만 읽어옵니다.
+로드한 인덱스는 utils/index_registry.py의 레지스트리를 통해 모든 세션이 읽기 전용으로 공유합니다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import faiss
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
 import streamlit as st
-import os
 
-def create_vector_db(chunks: list[Document], embeddings_model, db_path: str = "./vector_db/faiss_index"):
+from utils.chunk_store import get_chunk_store_path, load_chunk_store, save_chunk_store
+from utils.index_registry import get_index_registry
+from utils.vector_index import VectorIndexConfig, apply_search_params, get_index_type, upgrade_index
+
+DEFAULT_VECTOR_DB_DIR = "./vector_db"
+DEFAULT_MAX_INDEXES = 5
+INDEX_METADATA_FILE = "index_meta.json"
+MANIFEST_FILE = "chunk_manifest.json"
+DEFAULT_EMBEDDING_BATCH_SIZE = 64
+# 저장 중(.tmp-)이거나 교체된(.old-) 인덱스 디렉터리의 이름 표시. 인덱스 목록에서 제외합니다.
+TEMP_DIR_MARKER = ".tmp-"
+OLD_DIR_MARKER = ".old-"
+
+# (완료된 청크 수, 전체 청크 수)
+ProgressCallback = Callable[[int, int], None]
+
+
+def get_vector_db_dir() -> str:
+    """인덱스 저장 경로를 반환합니다 (VECTOR_DB_DIR 환경 변수로 변경 가능)."""
+    return os.getenv("VECTOR_DB_DIR", DEFAULT_VECTOR_DB_DIR)
+
+
+def get_max_indexes() -> int:
+    """보관할 최대 인덱스 수를 반환합니다 (VECTOR_DB_MAX_INDEXES 환경 변수로 변경 가능)."""
+    value = os.getenv("VECTOR_DB_MAX_INDEXES", "")
+    return int(value) if value.isdigit() and int(value) > 0 else DEFAULT_MAX_INDEXES
+
+
+def get_embedding_batch_size() -> int:
+    """임베딩 배치 크기를 반환합니다 (EMBEDDING_BATCH_SIZE 환경 변수로 변경 가능)."""
+    value = os.getenv("EMBEDDING_BATCH_SIZE", "")
+    return int(value) if value.isdigit() and int(value) > 0 else DEFAULT_EMBEDDING_BATCH_SIZE
+
+
+def compute_file_hash(file_bytes: bytes) -> str:
+    """파일 내용의 SHA-256 해시를 반환합니다."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def get_embedding_model_name(embeddings_model: Any) -> str:
+    """임베딩 모델 식별 이름을 반환합니다 (model_name/model 속성이 없으면 클래스 이름)."""
+    for attribute in ("model_name", "model"):
+        name = getattr(embeddings_model, attribute, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings_model).__name__
+
+
+def compute_corpus_fingerprint(source_hashes: Sequence[str], chunk_size: int, chunk_overlap: int,
+                               embedding_model_name: str, index_signature: str = "flat") -> str:
+    """
+    인덱스 재사용 여부를 판단하는 코퍼스 지문을 계산합니다.
+
+    Args:
+        source_hashes: 원본 파일 내용 해시 목록 (순서 무관)
+        chunk_size: 청크 크기
+        chunk_overlap: 청크 중첩 크기
+        embedding_model_name: 임베딩 모델 이름
+        index_signature: 인덱스 유형 설정 (VectorIndexConfig.signature)
+
+    Returns:
+        str: SHA-256 해시
+    """
+    fields = {
+        "sources": sorted(source_hashes),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedding_model_name,
+    }
+    # Flat 인덱스의 지문은 인덱스 유형 설정 이전과 같게 유지합니다.
+    if index_signature != "flat":
+        fields["index"] = index_signature
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_index_path(fingerprint: str, base_dir: Optional[str] = None) -> str:
+    """지문에 해당하는 인덱스 저장 경로를 반환합니다."""
+    return os.path.join(base_dir or get_vector_db_dir(), fingerprint)
+
+
+def index_exists(db_path: str) -> bool:
+    """저장이 완료된 FAISS 인덱스가 경로에 있는지 확인합니다 (청크 저장소 또는 이전 형식의 index.pkl)."""
+    return os.path.exists(os.path.join(db_path, "index.faiss")) and (
+        os.path.exists(get_chunk_store_path(db_path)) or os.path.exists(os.path.join(db_path, "index.pkl")))
+
+
+def _read_index_metadata(db_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(db_path, INDEX_METADATA_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index_metadata(db_path: str, metadata: Dict[str, Any]):
+    with open(os.path.join(db_path, INDEX_METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+def touch_index(db_path: str):
+    """인덱스의 마지막 사용 시각을 갱신합니다 (LRU 정리 기준)."""
+    metadata = _read_index_metadata(db_path)
+    if metadata is None:
+        return
+    metadata["last_accessed"] = time.time()
+    try:
+        _write_index_metadata(db_path, metadata)
+    except OSError as e:
+        print(f"인덱스 사용 시각 갱신 실패 ({db_path}): {e}")
+
+
+def list_stored_indexes(base_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    지문별로 저장된 인덱스 목록을 최근 사용 순으로 반환합니다.
+    메타데이터 파일이 없는 디렉터리(이전 버전의 고정 경로 인덱스 등)는 포함하지 않습니다.
+    """
+    base_dir = base_dir or get_vector_db_dir()
+    if not os.path.isdir(base_dir):
+        return []
+    indexes = []
+    for name in os.listdir(base_dir):
+        if TEMP_DIR_MARKER in name or OLD_DIR_MARKER in name:
+            continue
+        db_path = os.path.join(base_dir, name)
+        metadata = _read_index_metadata(db_path) if os.path.isdir(db_path) else None
+        if metadata is not None:
+            indexes.append({**metadata, "path": db_path})
+    return sorted(indexes, key=lambda item: item.get("last_accessed", 0), reverse=True)
+
+
+def evict_stale_indexes(base_dir: Optional[str] = None, max_indexes: Optional[int] = None,
+                        keep: Sequence[str] = ()) -> List[str]:
+    """
+    최대 개수를 넘는 인덱스를 가장 오래 사용되지 않은 것부터 삭제합니다.
+
+    Args:
+        base_dir: 인덱스 저장 경로
+        max_indexes: 보관할 최대 인덱스 수
+        keep: 삭제하지 않을 지문 목록 (방금 사용한 인덱스 등)
+
+    Returns:
+        list: 삭제된 인덱스의 지문 목록
+    """
+    max_indexes = max_indexes or get_max_indexes()
+    indexes = list_stored_indexes(base_dir)
+    removed = []
+    for item in indexes[max_indexes:]:
+        fingerprint = item.get("fingerprint", os.path.basename(item["path"]))
+        if fingerprint in keep:
+            continue
+        shutil.rmtree(item["path"], ignore_errors=True)
+        removed.append(fingerprint)
+    return removed
+
+
+def chunk_content_hash(text: str) -> str:
+    """청크 내용의 SHA-256 해시를 반환합니다."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_chunk_source(chunk: Document) -> str:
+    """청크가 속한 원본 파일 이름을 반환합니다 (source_file 메타데이터, 없으면 source)."""
+    return str(chunk.metadata.get("source_file") or chunk.metadata.get("source") or "")
+
+
+def _chunk_docstore_id(source: str, content_hash: str) -> str:
+    return hashlib.sha256(f"{source}\0{content_hash}".encode("utf-8")).hexdigest()
+
+
+def _group_chunks_by_source(chunks: Sequence[Document]) -> Dict[str, Dict[str, Document]]:
+    """청크를 원본 파일별로 묶습니다. 같은 파일 안에서 내용이 같은 청크는 하나만 남깁니다."""
+    grouped: Dict[str, Dict[str, Document]] = {}
+    for chunk in chunks:
+        grouped.setdefault(get_chunk_source(chunk), {}).setdefault(chunk_content_hash(chunk.page_content), chunk)
+    return grouped
+
+
+def new_chunk_manifest() -> Dict[str, Any]:
+    """빈 청크 매니페스트를 반환합니다. 형식: {"sources": {원본 파일: {내용 해시: docstore ID}}}"""
+    return {"version": 1, "sources": {}}
+
+
+def load_chunk_manifest(db_path: str) -> Optional[Dict[str, Any]]:
+    """인덱스와 함께 저장된 청크 매니페스트를 읽습니다. 없으면(이전 버전 인덱스) None."""
+    try:
+        with open(os.path.join(db_path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def embed_chunks_in_batches(vector_db: Optional[FAISS], chunks: Sequence[Document], ids: Sequence[str],
+                            embeddings_model, batch_size: Optional[int] = None,
+                            progress_callback: Optional[ProgressCallback] = None) -> Optional[FAISS]:
+    """
+    청크를 고정 크기 배치로 임베딩하여 인덱스에 바로 추가합니다.
+    전체 임베딩을 한 번에 메모리에 올리지 않고, 배치마다 진행 상황을 알립니다.
+
+    Args:
+        vector_db: 청크를 추가할 인덱스 (None이면 첫 배치로 새로 만듭니다)
+        chunks: 임베딩할 청크
+        ids: 청크별 docstore ID
+        embeddings_model: 임베딩 모델
+        batch_size: 배치 크기 (기본값: EMBEDDING_BATCH_SIZE 환경 변수)
+        progress_callback: 배치마다 (완료된 청크 수, 전체 청크 수)로 호출됩니다
+
+    Returns:
+        FAISS 또는 None: 청크가 추가된 인덱스
+    """
+    batch_size = batch_size or get_embedding_batch_size()
+    total = len(chunks)
+    for start in range(0, total, batch_size):
+        batch = chunks[start:start + batch_size]
+        texts = [chunk.page_content for chunk in batch]
+        text_embeddings = list(zip(texts, embeddings_model.embed_documents(texts)))
+        metadatas = [dict(chunk.metadata) for chunk in batch]
+        batch_ids = list(ids[start:start + batch_size])
+        if vector_db is None:
+            vector_db = FAISS.from_embeddings(text_embeddings, embeddings_model, metadatas=metadatas, ids=batch_ids)
+        else:
+            vector_db.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_ids)
+        if progress_callback:
+            progress_callback(min(start + batch_size, total), total)
+    return vector_db
+
+
+def add_chunks_to_vector_db(vector_db: FAISS, chunks: Sequence[Document], embeddings_model,
+                            manifest: Dict[str, Any],
+                            progress_callback: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    매니페스트에 없는 청크만 임베딩하여 인덱스에 추가합니다 (add_embeddings).
+    이미 있는 청크는 다시 임베딩하지 않고, 페이지 번호 등 메타데이터만 갱신합니다.
+
+    Args:
+        vector_db: 갱신할 FAISS 벡터 데이터베이스
+        chunks: 추가할 청크
+        embeddings_model: 임베딩 모델
+        manifest: 청크 매니페스트 (추가된 청크가 기록됩니다)
+        progress_callback: 임베딩 배치마다 (완료된 청크 수, 새 청크 수)로 호출됩니다
+
+    Returns:
+        dict: 추가(added)/재사용(unchanged) 청크 수
+    """
+    sources = manifest.setdefault("sources", {})
+    new_chunks, new_ids = [], []
+    unchanged = 0
+    for source, by_hash in _group_chunks_by_source(chunks).items():
+        entries = sources.setdefault(source, {})
+        for content_hash, chunk in by_hash.items():
+            doc_id = entries.get(content_hash)
+            if doc_id is None:
+                new_chunks.append(chunk)
+                new_ids.append(_chunk_docstore_id(source, content_hash))
+                continue
+            unchanged += 1
+            stored = vector_db.docstore.search(doc_id)
+            if isinstance(stored, Document) and stored.metadata != chunk.metadata:
+                vector_db.docstore.delete([doc_id])
+                vector_db.docstore.add({doc_id: Document(page_content=chunk.page_content,
+                                                         metadata=dict(chunk.metadata), id=doc_id)})
+
+    if new_chunks:
+        embed_chunks_in_batches(vector_db, new_chunks, new_ids, embeddings_model, progress_callback=progress_callback)
+        for chunk, doc_id in zip(new_chunks, new_ids):
+            sources[get_chunk_source(chunk)][chunk_content_hash(chunk.page_content)] = doc_id
+    return {"added": len(new_chunks), "unchanged": unchanged}
+
+
+def remove_source_from_vector_db(vector_db: FAISS, source: str, manifest: Dict[str, Any]) -> int:
+    """
+    원본 파일의 청크를 인덱스에서 모두 삭제합니다.
+
+    Returns:
+        int: 삭제된 청크 수
+    """
+    entries = manifest.get("sources", {}).pop(source, {})
+    if entries:
+        vector_db.delete(list(entries.values()))
+    return len(entries)
+
+
+def sync_vector_db(vector_db: FAISS, chunks: Sequence[Document], embeddings_model,
+                   manifest: Dict[str, Any], progress_callback: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    인덱스를 주어진 청크 목록과 같아지도록 갱신합니다.
+    빠진 원본 파일과 내용이 바뀐 청크는 삭제하고, 새 청크만 임베딩해 추가합니다.
+
+    Returns:
+        dict: 추가(added)/삭제(removed)/재사용(unchanged) 청크 수
+    """
+    grouped = _group_chunks_by_source(chunks)
+    sources = manifest.setdefault("sources", {})
+    stale_ids = []
+    for source in list(sources):
+        keep = grouped.get(source, {})
+        for content_hash in [h for h in sources[source] if h not in keep]:
+            stale_ids.append(sources[source].pop(content_hash))
+        if not sources[source]:
+            del sources[source]
+    if stale_ids:
+        vector_db.delete(stale_ids)
+
+    stats = add_chunks_to_vector_db(vector_db, chunks, embeddings_model, manifest, progress_callback)
+    return {**stats, "removed": len(stale_ids)}
+
+
+def save_vector_db(vector_db: FAISS, db_path: str, manifest: Dict[str, Any],
+                   metadata: Optional[Dict[str, Any]] = None):
+    """
+    인덱스, 청크 저장소, 청크 매니페스트, 메타데이터를 저장합니다.
+    임시 경로에 저장한 뒤 이름을 바꾸므로 다른 세션이 저장 중인 인덱스를 읽지 않습니다.
+    기존 인덱스는 먼저 옆으로 옮기고 새 인덱스로 교체한 뒤 삭제합니다. 삭제부터 하면 인덱스가 없는
+    구간이 생기고, Windows에서는 다른 세션이 메모리 매핑한 파일 때문에 삭제가 실패해 교체도 실패합니다.
+    """
+    temp_path = f"{db_path}{TEMP_DIR_MARKER}{uuid.uuid4().hex}"
+    os.makedirs(temp_path)
+    faiss.write_index(vector_db.index, os.path.join(temp_path, "index.faiss"))
+    save_chunk_store(temp_path, vector_db.docstore, vector_db.index_to_docstore_id)
+    with open(os.path.join(temp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    now = time.time()
+    _write_index_metadata(temp_path, {
+        **(metadata or {}),
+        "index_type": get_index_type(vector_db.index),
+        "chunk_count": len(vector_db.index_to_docstore_id),
+        "created_at": now,
+        "last_accessed": now,
+    })
+    if os.path.exists(db_path):
+        os.replace(db_path, f"{db_path}{OLD_DIR_MARKER}{uuid.uuid4().hex}")
+    os.replace(temp_path, db_path)
+    _remove_old_versions(db_path)
+
+
+def _remove_old_versions(db_path: str):
+    """교체된 이전 버전 디렉터리를 삭제합니다 (아직 사용 중이라 삭제하지 못한 것은 다음 저장 때 다시 시도)."""
+    parent = os.path.dirname(db_path) or "."
+    prefix = os.path.basename(db_path) + OLD_DIR_MARKER
+    for name in os.listdir(parent):
+        if name.startswith(prefix):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def create_vector_db(chunks: list[Document], embeddings_model, db_path: str = "./vector_db/faiss_index",
+                     metadata: Optional[Dict[str, Any]] = None, progress_callback: Optional[ProgressCallback] = None,
+                     index_config: Optional[VectorIndexConfig] = None):
     """
     청크와 임베딩 모델을 사용하여 FAISS 벡터 데이터베이스를 생성하고 저장합니다.
+    청크 ID는 원본 파일과 내용 해시로 정해지며, 이후 증분 갱신을 위한 청크 매니페스트도 함께 저장합니다.
+    청크는 배치 단위로 임베딩되어 인덱스에 추가되며, 청크 수가 학습 임계값을 넘으면
+    설정된 근사 인덱스(HNSW, IVF, IVF-PQ)로 전환됩니다.
+
+    Args:
+        chunks: 임베딩할 청크
+        embeddings_model: 임베딩 모델
+        db_path: 저장 경로
+        metadata: 인덱스와 함께 저장할 메타데이터 (지문, 청크 설정 등)
+        progress_callback: 임베딩 배치마다 (완료된 청크 수, 전체 청크 수)로 호출됩니다
+        index_config: 인덱스 유형 설정 (기본값: 환경 변수)
     """
     if not chunks:
         st.warning("임베딩할 청크가 없습니다.")
@@ -13,17 +396,30 @@ def create_vector_db(chunks: list[Document], embeddings_model, db_path: str = ".
 
     st.info("FAISS 벡터 데이터베이스를 구축 중입니다...")
     try:
-        vector_db = FAISS.from_documents(chunks, embeddings_model)
-        vector_db.save_local(db_path)
+        manifest = new_chunk_manifest()
+        unique_chunks, ids = [], []
+        for source, by_hash in _group_chunks_by_source(chunks).items():
+            for content_hash, chunk in by_hash.items():
+                doc_id = _chunk_docstore_id(source, content_hash)
+                manifest["sources"].setdefault(source, {})[content_hash] = doc_id
+                unique_chunks.append(chunk)
+                ids.append(doc_id)
+        vector_db = embed_chunks_in_batches(None, unique_chunks, ids, embeddings_model,
+                                            progress_callback=progress_callback)
+        upgrade_index(vector_db, index_config or VectorIndexConfig.from_env())
+        save_vector_db(vector_db, db_path, manifest, metadata)
         st.success(f"FAISS 벡터 데이터베이스가 '{db_path}'에 성공적으로 구축 및 저장되었습니다.")
         return vector_db
     except Exception as e:
         st.error(f"FAISS 벡터 데이터베이스 구축 중 오류 발생: {e}")
         return None
 
-def load_vector_db(embeddings_model, db_path: str = "./vector_db/faiss_index"):
+def load_vector_db(embeddings_model, db_path: str = "./vector_db/faiss_index",
+                   index_config: Optional[VectorIndexConfig] = None):
     """
-    저장된 FAISS 벡터 데이터베이스를 로드합니다.
+    저장된 FAISS 벡터 데이터베이스의 공유 핸들을 반환합니다.
+    프로세스에서 처음 요청될 때만 mmap으로 로드하고 검색 파라미터(efSearch, nprobe)를 적용하며,
+    이후에는 다른 세션이 로드한 읽기 전용 저장소를 그대로 재사용합니다.
     """
     if not os.path.exists(db_path):
         st.warning(f"'{db_path}' 경로에 저장된 벡터 데이터베이스가 없습니다.")
@@ -31,9 +427,101 @@ def load_vector_db(embeddings_model, db_path: str = "./vector_db/faiss_index"):
 
     st.info(f"'{db_path}'에서 FAISS 벡터 데이터베이스를 로드 중입니다...")
     try:
-        vector_db = FAISS.load_local(db_path, embeddings_model, allow_dangerous_deserialization=True)
+        vector_db = get_index_registry().get(db_path, embeddings_model, index_config)
+        touch_index(db_path)
         st.success("FAISS 벡터 데이터베이스가 성공적으로 로드되었습니다.")
         return vector_db
     except Exception as e:
         st.error(f"FAISS 벡터 데이터베이스 로드 중 오류 발생: {e}")
         return None
+
+
+def _load_vector_db_copy(db_path: str, embeddings_model) -> FAISS:
+    """증분 갱신을 위해 저장된 인덱스의 수정 가능한 사본을 로드합니다 (이전 형식의 피클 인덱스도 지원)."""
+    if not os.path.exists(get_chunk_store_path(db_path)):
+        return FAISS.load_local(db_path, embeddings_model, allow_dangerous_deserialization=True)
+    docstore, index_to_docstore_id = load_chunk_store(db_path, read_only=False)
+    return FAISS(embeddings_model, faiss.read_index(os.path.join(db_path, "index.faiss")), docstore,
+                 index_to_docstore_id)
+
+
+# 이 값이 같아야 이전 인덱스를 증분 갱신할 수 있습니다 (값이 없으면 기본값과 비교).
+_INDEX_SETTING_DEFAULTS = {"chunk_size": None, "chunk_overlap": None, "embedding_model": None,
+                           "index_signature": "flat"}
+
+
+def _update_from_base_index(chunks: list[Document], embeddings_model, base_path: str, db_path: str,
+                            metadata: Dict[str, Any], index_config: VectorIndexConfig,
+                            progress_callback: Optional[ProgressCallback] = None):
+    """
+    이전 인덱스를 복사해 새 청크만 임베딩하고 빠진 청크를 삭제한 뒤 db_path에 저장합니다.
+    삭제를 지원하지 않는 인덱스(HNSW)이면 None을 반환하여 새로 구축하게 합니다.
+    """
+    base_metadata = _read_index_metadata(base_path)
+    manifest = load_chunk_manifest(base_path)
+    if not index_exists(base_path) or base_metadata is None or manifest is None:
+        return None
+    if any(base_metadata.get(key, default) != metadata.get(key, default)
+           for key, default in _INDEX_SETTING_DEFAULTS.items()):
+        return None
+
+    try:
+        vector_db = _load_vector_db_copy(base_path, embeddings_model)
+        apply_search_params(vector_db.index, index_config)
+        stats = sync_vector_db(vector_db, chunks, embeddings_model, manifest, progress_callback)
+        if not vector_db.index_to_docstore_id:
+            return None
+        upgrade_index(vector_db, index_config)
+        save_vector_db(vector_db, db_path, manifest, metadata)
+        st.success(f"기존 벡터 DB를 갱신했습니다: 새 청크 {stats['added']}개 임베딩, "
+                   f"{stats['removed']}개 삭제, {stats['unchanged']}개 재사용")
+        return vector_db
+    except Exception as e:
+        print(f"벡터 DB 증분 갱신 실패, 새로 구축합니다: {e}")
+        return None
+
+
+def load_or_create_vector_db(chunks: list[Document], embeddings_model, fingerprint: str,
+                             base_dir: Optional[str] = None, max_indexes: Optional[int] = None,
+                             metadata: Optional[Dict[str, Any]] = None, base_fingerprint: Optional[str] = None,
+                             progress_callback: Optional[ProgressCallback] = None,
+                             index_config: Optional[VectorIndexConfig] = None):
+    """
+    지문이 같은 인덱스가 있으면 로드하고, 없으면 생성해 저장한 뒤 오래된 인덱스를 정리합니다.
+    base_fingerprint의 인덱스가 같은 청크 설정과 임베딩 모델로 만들어졌다면, 처음부터 다시 만들지 않고
+    그 인덱스에 새 청크만 추가(및 빠진 청크 삭제)하여 새 지문으로 저장합니다.
+
+    Args:
+        chunks: 인덱스가 없을 때 임베딩할 청크
+        embeddings_model: 임베딩 모델
+        fingerprint: compute_corpus_fingerprint로 계산한 코퍼스 지문
+        base_dir: 인덱스 저장 경로
+        max_indexes: 보관할 최대 인덱스 수
+        metadata: 새 인덱스와 함께 저장할 메타데이터
+        base_fingerprint: 증분 갱신의 기준이 될 이전 인덱스의 지문
+        progress_callback: 임베딩 배치마다 (완료된 청크 수, 임베딩할 청크 수)로 호출됩니다
+        index_config: 인덱스 유형 설정 (기본값: 환경 변수)
+
+    Returns:
+        FAISS 또는 None: 벡터 데이터베이스
+    """
+    index_config = index_config or VectorIndexConfig.from_env()
+    db_path = get_index_path(fingerprint, base_dir)
+    metadata = {**(metadata or {}), "fingerprint": fingerprint}
+    vector_db = load_vector_db(embeddings_model, db_path, index_config) if index_exists(db_path) else None
+    if vector_db is None:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        if base_fingerprint and base_fingerprint != fingerprint:
+            vector_db = _update_from_base_index(chunks, embeddings_model, get_index_path(base_fingerprint, base_dir),
+                                                db_path, metadata, index_config, progress_callback)
+        if vector_db is None:
+            vector_db = create_vector_db(chunks, embeddings_model, db_path, metadata=metadata,
+                                         progress_callback=progress_callback, index_config=index_config)
+        if vector_db is not None:
+            # 방금 만든 세션도 다른 세션과 같은 공유 핸들을 사용하고, 수정 가능한 사본은 버립니다.
+            vector_db = get_index_registry().get(db_path, embeddings_model, index_config)
+    if vector_db is not None:
+        removed = evict_stale_indexes(base_dir, max_indexes, keep=(fingerprint,))
+        if removed:
+            print(f"오래된 벡터 인덱스 {len(removed)}개를 삭제했습니다.")
+    return vector_db
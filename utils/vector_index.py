@@ -0,0 +1,255 @@
+"""
+FAISS 인덱스 유형 설정.
+
+LangChain 기본값인 전수 탐색 인덱스(IndexFlatL2) 외에 HNSW, IVF, IVF-PQ 인덱스를 사용할 수 있습니다.
+청크 수가 학습 임계값보다 적으면 근사 인덱스의 이점이 없으므로 Flat을 유지하고, 임계값을 넘으면
+저장된 벡터로 학습하여 설정된 인덱스로 자동 전환합니다.
+
+환경 변수:
+    VECTOR_INDEX_TYPE: flat | hnsw | ivf | ivfpq (기본값: flat)
+    VECTOR_INDEX_TRAIN_THRESHOLD: 근사 인덱스로 전환할 최소 청크 수 (기본값: 10000)
+    VECTOR_INDEX_HNSW_M: HNSW 이웃 수 (기본값: 32)
+    VECTOR_INDEX_EF_SEARCH: HNSW 검색 후보 수 efSearch (기본값: 64)
+    VECTOR_INDEX_NLIST: IVF 클러스터 수 (기본값: 0, 청크 수에 따라 자동)
+    VECTOR_INDEX_NPROBE: IVF 검색 클러스터 수 nprobe (기본값: 8)
+    VECTOR_INDEX_PQ_M: IVF-PQ 부분 벡터 수 (기본값: 16, 차원의 약수로 조정)
+
+벤치마크 (Flat 대비 recall@k와 쿼리 지연 시간):
+    python -m utils.vector_index --num-vectors 20000 --dim 256
+"""
+import argparse
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Sequence
+
+import faiss
+import numpy as np
+
+SUPPORTED_INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "")
+    return int(value) if value.isdigit() else default
+
+
+@dataclass
+class VectorIndexConfig:
+    """FAISS 인덱스 유형과 학습/검색 파라미터."""
+    index_type: str = "flat"
+    train_threshold: int = 10000
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    nlist: int = 0
+    nprobe: int = 8
+    pq_m: int = 16
+    pq_nbits: int = 8
+
+    @classmethod
+    def from_env(cls) -> "VectorIndexConfig":
+        """환경 변수에서 설정을 읽습니다. 잘못된 인덱스 유형은 flat으로 대체합니다."""
+        index_type = os.getenv("VECTOR_INDEX_TYPE", "flat").strip().lower()
+        if index_type not in SUPPORTED_INDEX_TYPES:
+            print(f"지원하지 않는 VECTOR_INDEX_TYPE '{index_type}', flat을 사용합니다.")
+            index_type = "flat"
+        return cls(
+            index_type=index_type,
+            train_threshold=_env_int("VECTOR_INDEX_TRAIN_THRESHOLD", 10000),
+            hnsw_m=_env_int("VECTOR_INDEX_HNSW_M", 32),
+            ef_search=_env_int("VECTOR_INDEX_EF_SEARCH", 64),
+            nlist=_env_int("VECTOR_INDEX_NLIST", 0),
+            nprobe=_env_int("VECTOR_INDEX_NPROBE", 8),
+            pq_m=_env_int("VECTOR_INDEX_PQ_M", 16),
+        )
+
+    def signature(self) -> str:
+        """인덱스 구조를 결정하는 설정의 식별 문자열 (검색 파라미터 efSearch/nprobe는 제외)."""
+        if self.index_type == "hnsw":
+            return f"hnsw-M{self.hnsw_m}-efc{self.ef_construction}-min{self.train_threshold}"
+        nlist = self.nlist or "auto"
+        if self.index_type == "ivf":
+            return f"ivf-nlist{nlist}-min{self.train_threshold}"
+        if self.index_type == "ivfpq":
+            return f"ivfpq-nlist{nlist}-m{self.pq_m}x{self.pq_nbits}-min{self.train_threshold}"
+        return "flat"
+
+    def resolve_nlist(self, num_vectors: int) -> int:
+        """IVF 클러스터 수. 자동이면 약 4*sqrt(n)으로 하되, 클러스터당 학습 벡터가 39개 이상 되도록 제한합니다."""
+        nlist = self.nlist or int(4 * math.sqrt(num_vectors))
+        return max(1, min(nlist, num_vectors // 39 or 1))
+
+
+def get_index_type(index: Any) -> str:
+    """FAISS 인덱스 객체의 유형 이름을 반환합니다."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def apply_search_params(index: Any, config: VectorIndexConfig) -> Any:
+    """로드하거나 만든 인덱스에 검색 파라미터(efSearch, nprobe)를 적용합니다."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = max(config.ef_search, 1)
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = max(1, min(config.nprobe, index.nlist))
+    return index
+
+
+def _pq_subquantizers(dim: int, requested: int) -> int:
+    """차원을 나누어떨어지게 하는 가장 큰 부분 벡터 수 (requested 이하)."""
+    for m in range(min(requested, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(vectors: np.ndarray, config: VectorIndexConfig) -> Any:
+    """
+    벡터로 설정된 유형의 FAISS 인덱스를 만들고(필요하면 학습) 벡터를 추가합니다.
+    벡터 수가 학습 임계값보다 적으면 Flat 인덱스를 만듭니다.
+
+    Args:
+        vectors: (n, dim) float32 벡터 (추가 순서가 docstore ID 매핑 순서와 같아야 합니다)
+        config: 인덱스 설정
+
+    Returns:
+        faiss.Index: 벡터가 추가된 인덱스
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    num_vectors, dim = vectors.shape
+    index_type = config.index_type if num_vectors >= config.train_threshold else "flat"
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    elif index_type in ("ivf", "ivfpq"):
+        quantizer = faiss.IndexFlatL2(dim)
+        nlist = config.resolve_nlist(num_vectors)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_L2)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim, config.pq_m), config.pq_nbits)
+        index.train(vectors)
+    else:
+        index = faiss.IndexFlatL2(dim)
+
+    index.add(vectors)
+    return apply_search_params(index, config)
+
+
+def needs_upgrade(index: Any, config: VectorIndexConfig) -> bool:
+    """Flat 인덱스가 학습 임계값을 넘어 설정된 근사 인덱스로 바꿔야 하는지 확인합니다."""
+    return (config.index_type != "flat" and get_index_type(index) == "flat"
+            and index.ntotal >= config.train_threshold)
+
+
+def upgrade_index(vector_db: Any, config: VectorIndexConfig) -> bool:
+    """
+    LangChain FAISS 저장소의 Flat 인덱스를 설정된 근사 인덱스로 교체합니다.
+    벡터를 같은 순서로 다시 추가하므로 index_to_docstore_id 매핑은 그대로 유지됩니다.
+
+    Returns:
+        bool: 인덱스를 교체했으면 True
+    """
+    if not needs_upgrade(vector_db.index, config):
+        return False
+    vectors = vector_db.index.reconstruct_n(0, vector_db.index.ntotal)
+    vector_db.index = build_index(vectors, config)
+    print(f"벡터 인덱스를 {config.index_type}(으)로 전환했습니다 ({vector_db.index.ntotal}개 청크).")
+    return True
+
+
+def benchmark_index_types(vectors: np.ndarray, queries: np.ndarray, configs: Sequence[VectorIndexConfig],
+                          k: int = 5, repeats: int = 3) -> List[Dict[str, Any]]:
+    """
+    Flat 인덱스를 기준으로 각 인덱스 설정의 recall@k, 쿼리 지연 시간, 크기를 측정합니다.
+
+    Args:
+        vectors: 인덱싱할 벡터
+        queries: 검색 쿼리 벡터
+        configs: 비교할 인덱스 설정 (학습 임계값은 무시하고 항상 해당 유형으로 만듭니다)
+        k: 검색 문서 수
+        repeats: 지연 시간 측정 반복 횟수 (가장 짧은 시간 사용)
+
+    Returns:
+        list: 설정별 결과 (index, recall_at_k, ms_per_query, build_seconds, size_mb)
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    ground_truth = None
+    results = []
+    for config in [VectorIndexConfig(index_type="flat")] + list(configs):
+        start = time.perf_counter()
+        index = build_index(vectors, replace(config, train_threshold=0))
+        build_seconds = time.perf_counter() - start
+
+        best = float("inf")
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            _, found = index.search(queries, k)
+            best = min(best, time.perf_counter() - start)
+        if ground_truth is None:
+            ground_truth = found
+
+        hits = sum(len(set(row) & set(truth)) for row, truth in zip(found, ground_truth))
+        results.append({
+            "index": config.signature(),
+            "recall_at_k": hits / (len(queries) * k),
+            "ms_per_query": best / len(queries) * 1000,
+            "build_seconds": build_seconds,
+            "size_mb": len(faiss.serialize_index(index)) / (1024 * 1024),
+        })
+    return results
+
+
+def _synthetic_vectors(num_vectors: int, dim: int, num_queries: int, seed: int = 0):
+    """클러스터 구조가 있는 정규화된 임의 벡터와 쿼리를 만듭니다 (실제 임베딩 분포에 가깝게)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, num_vectors // 100), dim))
+
+    def _sample(n: int) -> np.ndarray:
+        points = centers[rng.integers(len(centers), size=n)] + 0.5 * rng.normal(size=(n, dim))
+        return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+    return _sample(num_vectors), _sample(num_queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 유형별 recall@k / 지연 시간 벤치마크")
+    parser.add_argument("--index-path", default=None, help="저장된 벡터 DB 경로 (지정하면 실제 청크 벡터 사용)")
+    parser.add_argument("--num-vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16])
+    args = parser.parse_args()
+
+    if args.index_path:
+        index = faiss.read_index(os.path.join(args.index_path, "index.faiss"))
+        vectors = index.reconstruct_n(0, index.ntotal)
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), size=min(args.num_queries, len(vectors)), replace=False)]
+        queries = sample + 0.05 * rng.normal(size=sample.shape).astype(np.float32)
+    else:
+        vectors, queries = _synthetic_vectors(args.num_vectors, args.dim, args.num_queries)
+
+    configs = [VectorIndexConfig(index_type="hnsw", ef_search=ef) for ef in args.ef_search]
+    configs += [VectorIndexConfig(index_type=t, nprobe=p) for t in ("ivf", "ivfpq") for p in args.nprobe]
+    results = benchmark_index_types(vectors, queries, configs, k=args.k)
+    for result, config in zip(results, [VectorIndexConfig()] + configs):
+        result["search_params"] = {"ef_search": config.ef_search} if config.index_type == "hnsw" else (
+            {"nprobe": config.nprobe} if config.index_type in ("ivf", "ivfpq") else {})
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()